@@ -0,0 +1,92 @@
+"""
+Compare ConcurrentNestedDict with a NestedDict guarded by a single lock,
+under a mix of reads, iterations and writes from several threads.
+
+Readers of the locked NestedDict hold the lock while iterating,
+readers of the ConcurrentNestedDict take a snapshot and iterate without it.
+
+Run with:
+    python benchmarks/bench_concurrent.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
+from ndicts import ConcurrentNestedDict, NestedDict
+
+TOP_LEVEL = 16
+LEAVES = 100
+OPERATIONS = 2000
+
+
+class LockedNestedDict:
+    """NestedDict with every operation under one lock"""
+
+    def __init__(self, nd: NestedDict) -> None:
+        self.nd = nd
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.nd[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.nd[key] = value
+
+    def iterate(self):
+        with self.lock:
+            return sum(1 for _ in self.nd.values())
+
+
+class SnapshotNestedDict:
+    """ConcurrentNestedDict with the interface of LockedNestedDict"""
+
+    def __init__(self, nd: NestedDict) -> None:
+        self.cnd = ConcurrentNestedDict(nd)
+
+    def get(self, key):
+        return self.cnd[key]
+
+    def set(self, key, value):
+        self.cnd[key] = value
+
+    def iterate(self):
+        return sum(1 for _ in self.cnd.snapshot().values())
+
+
+def work(store, thread: int, write_ratio: float) -> None:
+    writes = int(OPERATIONS * write_ratio)
+    for i in range(OPERATIONS):
+        key = ((thread + i) % TOP_LEVEL, i % LEAVES)
+        if i < writes:
+            store.set(key, i)
+        elif i % 100 == 0:
+            store.iterate()
+        else:
+            store.get(key)
+
+
+def run(store, threads: int, write_ratio: float) -> float:
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda thread: work(store, thread, write_ratio), range(threads)))
+    return perf_counter() - start
+
+
+def main() -> None:
+    nd = NestedDict.from_product([range(TOP_LEVEL), range(LEAVES)], values=0)
+    print(f"{'threads':>7} {'writes':>6} {'locked [s]':>11} {'concurrent [s]':>15} {'speedup':>8}")
+    for write_ratio in (0.01, 0.1, 0.5):
+        for threads in (1, 2, 4, 8):
+            t_locked = run(LockedNestedDict(nd.copy()), threads, write_ratio)
+            t_concurrent = run(SnapshotNestedDict(nd), threads, write_ratio)
+            print(
+                f"{threads:>7} {write_ratio:>6.0%} {t_locked:>11.4f} "
+                f"{t_concurrent:>15.4f} {t_locked / t_concurrent:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
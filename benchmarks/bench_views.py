@@ -0,0 +1,37 @@
+"""
+Compare the single-pass values()/items() views of NestedDict
+with the generic views inherited from MutableMapping.
+
+Run with:
+    python benchmarks/bench_views.py
+"""
+
+from collections.abc import ItemsView, ValuesView
+from timeit import timeit
+
+from ndicts import NestedDict
+
+
+def deep_nested_dict(depth: int, fan_out: int = 2) -> NestedDict:
+    """NestedDict with fan_out ** depth leaves."""
+    return NestedDict.from_product([range(fan_out)] * depth, values=0)
+
+
+def main(number: int = 5) -> None:
+    print(f"{'depth':>5} {'leaves':>8} {'view':>6} {'generic [s]':>12} {'nested [s]':>11} {'speedup':>8}")
+    for depth in (4, 8, 12, 16):
+        nd = deep_nested_dict(depth)
+        for name, generic, nested in (
+            ("values", ValuesView(nd), nd.values()),
+            ("items", ItemsView(nd), nd.items()),
+        ):
+            t_generic = timeit(lambda: list(generic), number=number) / number
+            t_nested = timeit(lambda: list(nested), number=number) / number
+            print(
+                f"{depth:>5} {len(nd):>8} {name:>6} {t_generic:>12.5f} "
+                f"{t_nested:>11.5f} {t_generic / t_nested:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
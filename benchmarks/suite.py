@@ -0,0 +1,178 @@
+"""
+Benchmark suite of the hot paths of NestedDict and DataDict.
+
+Each benchmark runs on trees with a number of leaves and a depth,
+the fan-out being the smallest giving at least that many leaves.
+Results are written as JSON, and compared with a baseline:
+the exit status is 1 if a benchmark is slower than the baseline by more than the threshold.
+
+Run with:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json --threshold 0.2
+    python benchmarks/suite.py --results new.json --baseline results.json
+    python benchmarks/suite.py --leaves 1000 100000 --depths 2 4 8 --filter getitem extract
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ndicts import DataDict, NestedDict, __version__
+
+# Number of keys got, set and deleted by each run
+SAMPLE = 1000
+
+
+def timed(func: Callable, setup: Optional[Callable] = None, repeat: int = 5, min_time: float = 0.01) -> float:
+    """Best time of a call to func over repeat runs, each calling it enough times to last min_time.
+    If setup is given, each call gets a fresh result of setup, prepared outside of the timing."""
+    def once(number):
+        arguments = [(setup(),) if setup is not None else () for _ in range(number)]
+        start = perf_counter()
+        for argument in arguments:
+            func(*argument)
+        return (perf_counter() - start) / number
+
+    number = max(1, math.ceil(min_time / max(once(1), 1e-9)))
+    return min(once(number) for _ in range(repeat))
+
+
+def shape(leaves: int, depth: int) -> Tuple[int, int]:
+    """Fan-out giving at least leaves leaves at depth, and the actual number of leaves."""
+    fan_out = max(1, math.ceil(round(leaves ** (1 / depth), 9)))
+    return fan_out, fan_out ** depth
+
+
+def benchmarks(leaves: int, depth: int) -> Dict[str, Tuple[Callable, Optional[Callable]]]:
+    """Return the function and setup of every benchmark, on a tree of the given shape."""
+    fan_out, leaves = shape(leaves, depth)
+    iterables = [range(fan_out)] * depth
+    values = [float(value) for value in range(leaves)]
+    dd = DataDict.from_product(iterables, values=values)
+    tree = dd.to_dict()
+    rng = random.Random(0)
+    keys = rng.sample(list(dd.keys()), min(SAMPLE, leaves))
+    middle = fan_out // 2
+
+    def getitem(nd=dd):
+        for key in keys:
+            nd[key]
+
+    def setitem(nd=dd):
+        for key in keys:
+            nd[key] = 0.0
+
+    def delitem(nd):
+        for key in keys:
+            del nd[key]
+
+    def iterate():
+        for _ in dd:
+            pass
+
+    def items():
+        for _ in dd.items():
+            pass
+
+    return {
+        "getitem": (getitem, None),
+        "setitem": (setitem, None),
+        "delitem": (delitem, lambda: NestedDict(tree, copy=True)),
+        "iter": (iterate, None),
+        "len": (len, lambda: NestedDict(tree)),
+        "items": (items, None),
+        "extract": (lambda: dd.extract[middle], None),
+        "extract_wildcard": (lambda: dd.extract[("",) * (depth - 1) + (middle,)], None),
+        "from_product": (lambda: DataDict.from_product(iterables, values=values), None),
+        "copy": (dd.copy, None),
+        "copy_cow": (lambda: dd.copy(cow=True), None),
+        "add": (lambda: dd + dd, None),
+        "mul_scalar": (lambda: dd * 2, None),
+        "std": (dd.std, None),
+    }
+
+
+def run(leaves: List[int], depths: List[int], names: List[str], repeat: int) -> dict:
+    results = []
+    for n in leaves:
+        for depth in depths:
+            fan_out, actual = shape(n, depth)
+            for name, (func, setup) in benchmarks(n, depth).items():
+                if names and name not in names:
+                    continue
+                seconds = timed(func, setup, repeat)
+                results.append(
+                    {"benchmark": name, "leaves": actual, "depth": depth, "fan_out": fan_out, "seconds": seconds}
+                )
+                print(f"{name:>16} {actual:>9} {depth:>5} {fan_out:>7} {seconds:>12.6f}", file=sys.stderr)
+    return {
+        "meta": {
+            "ndicts": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Return the benchmarks slower than in the baseline by more than threshold, as a fraction."""
+    def index(report):
+        return {(r["benchmark"], r["leaves"], r["depth"]): r["seconds"] for r in report["results"]}
+
+    before = index(baseline)
+    regressions = []
+    print(f"{'benchmark':>16} {'leaves':>9} {'depth':>5} {'baseline [s]':>13} {'current [s]':>12} {'ratio':>6}")
+    for key, seconds in index(results).items():
+        if key not in before:
+            continue
+        ratio = seconds / before[key] if before[key] else math.inf
+        regressed = ratio > 1 + threshold
+        print(f"{key[0]:>16} {key[1]:>9} {key[2]:>5} {before[key]:>13.6f} {seconds:>12.6f} {ratio:>6.2f}"
+              + ("  REGRESSION" if regressed else ""))
+        if regressed:
+            regressions.append({"benchmark": key[0], "leaves": key[1], "depth": key[2], "ratio": ratio})
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leaves", type=int, nargs="+", default=[1000, 100000], help="numbers of leaves")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 4, 8], help="depths of the trees")
+    parser.add_argument("--filter", nargs="+", default=[], help="names of the benchmarks to run, all by default")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark, the fastest is kept")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument("--baseline", help="results to compare with, as written by --output")
+    parser.add_argument("--results", help="results to compare with the baseline, instead of running the benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown tolerated, as a fraction")
+    args = parser.parse_args(argv)
+
+    if args.results:
+        with open(args.results) as fp:
+            results = json.load(fp)
+    else:
+        results = run(args.leaves, args.depths, args.filter, args.repeat)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
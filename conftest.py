@@ -0,0 +1,19 @@
+import pytest
+from _pytest.doctest import DoctestItem
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+    collect_ignore = ["ndicts/columnar.py"]
+
+# Doctests of methods requiring numpy, outside of ndicts/columnar.py
+NUMPY_DOCTESTS = ["DataDict.from_ndarray", "DataDict.to_ndarray"]
+
+
+def pytest_collection_modifyitems(items):
+    if numpy is None:
+        skip = pytest.mark.skip(reason="numpy is not installed")
+        for item in items:
+            if isinstance(item, DoctestItem) and item.name.endswith(tuple(NUMPY_DOCTESTS)):
+                item.add_marker(skip)
@@ -2,4 +2,10 @@ __version__ = "0.3.0"
 
 from ndicts.nested_dict import NestedDict
 from ndicts.data_dict import DataDict
+from ndicts.frozen_nested_dict import FrozenNestedDict
+from ndicts.concurrent_nested_dict import ConcurrentNestedDict
+from ndicts.lazy_product import LazyProduct
+from ndicts.snapshot import Snapshot
+from ndicts.stats import Statistics
+from ndicts.instrumentation import Instrumentation
 
@@ -0,0 +1,436 @@
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from functools import reduce
+from numbers import Number
+from typing import Any, Callable, Generator, Iterable, List, Tuple, TypeVar, Union
+import operator
+
+import numpy as np
+
+from ndicts.data_dict import DataDict, _Arithmetics, _check_join_options
+from ndicts.nested_dict import NestedDict, _columns, _get, _map_values, _walk, _walk_values
+from ndicts.stats import Statistics
+
+
+T = TypeVar('T', bound='ColumnarDataDict')
+
+
+class ColumnarDataDict(MutableMapping, _Arithmetics):
+    """
+    DataDict storing its leaf values in a contiguous NumPy array.
+
+    The keys are kept as an index, a NestedDict mapping each key
+    to the position of its value in the array.
+    Arithmetics, ufuncs passed to apply and reductions run vectorized,
+    while the mapping interface is the same as for NestedDict.
+
+    Requires numpy.
+
+    Args:
+        dictionary (dict): Input nested dictionary, NestedDict or DataDict with numeric values.
+        dtype: Data type of the array, inferred from the values if None.
+
+    See Also:
+        DataDict.to_columnar: Convert a DataDict.
+
+        ColumnarDataDict.to_datadict: Convert back to a DataDict.
+
+    Examples:
+        >>> cdd = ColumnarDataDict({"a": {"x": 1, "y": 2}, "b": 3})
+        >>> cdd["a", "y"]
+        2
+        >>> cdd * 2 + 1
+        ColumnarDataDict({'a': {'x': 3, 'y': 5}, 'b': 7})
+        >>> cdd.apply(np.sqrt).total()
+        4.146264369941973
+        >>> cdd.to_datadict()
+        DataDict({'a': {'x': 1, 'y': 2}, 'b': 3})
+    """
+
+    @classmethod
+    def from_tuples(cls, tuples: List[Iterable], values: Union[Any, Iterable] = None, dtype=None) -> T:
+        """Initialize from a list of iterables, see NestedDict.from_tuples."""
+        return cls(DataDict.from_tuples(tuples, values), dtype)
+
+    @classmethod
+    def from_product(cls, iterables: List[Iterable], values: Union[Any, Iterable] = None, dtype=None) -> T:
+        """Initialize by cartesian product, see NestedDict.from_product."""
+        return cls(DataDict.from_product(iterables, values), dtype)
+
+    @classmethod
+    def _from_columns(cls, keys: list, column: np.ndarray, positions: NestedDict = None) -> T:
+        """Initialize from the keys and the values in the same order.
+        If positions is passed, it is shared and copied before being modified."""
+        cdd = cls.__new__(cls)
+        cdd._keys = keys
+        cdd._values = column
+        if positions is None:
+            cdd._positions = NestedDict.from_tuples(keys, range(len(keys)))
+            cdd._shared = False
+        else:
+            cdd._positions = positions
+            cdd._shared = True
+        return cdd
+
+    def __init__(self, dictionary: dict = None, dtype=None) -> None:
+        """
+        Initialize a ColumnarDataDict from a dictionary.
+
+        See class docstring.
+        """
+        if isinstance(dictionary, ColumnarDataDict):
+            dictionary = dictionary.to_dict()
+        elif isinstance(dictionary, NestedDict):
+            dictionary = dictionary._tree
+        keys, values = [], []
+        for key, value in _walk(dictionary or {}):
+            keys.append(key)
+            values.append(value)
+        self._keys = keys
+        self._values = np.asarray(values, dtype=dtype)
+        self._positions = NestedDict.from_tuples(keys, range(len(keys)))
+        self._shared = False
+
+    @property
+    def _column(self) -> np.ndarray:
+        """The values, in the order of the positions."""
+        return self._values[:len(self._keys)]
+
+    def _own(self) -> None:
+        """Copy the index if it is shared with another ColumnarDataDict."""
+        if self._shared:
+            self._keys = list(self._keys)
+            self._positions = NestedDict._from_tree(_map_values(self._positions._tree, int), len(self._keys))
+            self._shared = False
+
+    def _with_column(self, column: np.ndarray) -> T:
+        """New ColumnarDataDict with the same keys as self and the given values."""
+        self._shared = True
+        return self._from_columns(self._keys, column, self._positions)
+
+    def __getitem__(self, key: Union[Any, Tuple]) -> Any:
+        """Get item associated to the key, see NestedDict.__getitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        position = _get(self._positions._tree, key)
+        if isinstance(position, dict):
+            values = self._column.tolist()
+            return _map_values(position, values.__getitem__)
+        return self._values[position].item()
+
+    def __setitem__(self, key: Union[Any, Tuple], value: Any) -> None:
+        """Set the key to the given value, see NestedDict.__setitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        self._own()
+        if isinstance(value, NestedDict):
+            value = value.to_dict()
+        position = _get(self._positions._tree, key, None)
+        if isinstance(position, dict) or (isinstance(value, dict) and position is not None):
+            # The key is replaced in place, so that it keeps its position as in a dict
+            self._remove(sorted(_walk_values(position), reverse=True) if isinstance(position, dict) else [position])
+            position = None
+        if isinstance(value, dict):
+            self._positions[key] = {}
+            for sub_key, leaf in _walk(value):
+                self[key + sub_key] = leaf
+            return
+
+        dtype = np.result_type(self._values.dtype, np.asarray(value).dtype)
+        if dtype != self._values.dtype:
+            self._values = self._values.astype(dtype)
+        if position is None:
+            position = len(self._keys)
+            self._positions[key] = position
+            if position == len(self._values):
+                self._values = np.resize(self._values, max(2 * position, 8))
+            self._keys.append(key)
+        self._values[position] = value
+
+    def __delitem__(self, key: Union[Any, Tuple]) -> None:
+        """Delete the item corresponding to the key, see NestedDict.__delitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        self._own()
+        position = _get(self._positions._tree, key)
+        del self._positions[key]
+        if isinstance(position, dict):
+            self._remove(sorted(_walk_values(position), reverse=True))
+        else:
+            self._remove([position])
+
+    def _remove(self, positions: List[int]) -> None:
+        """Remove the values at positions, sorted in decreasing order, without removing their keys from the index.
+        The last value is moved into each hole, largest positions first
+        so that the value moved is never one to be removed."""
+        for position in positions:
+            last = len(self._keys) - 1
+            if position != last:
+                moved = self._keys[last]
+                self._values[position] = self._values[last]
+                self._keys[position] = moved
+                self._positions[moved] = position
+            self._keys.pop()
+
+    def __contains__(self, key: Union[Any, Tuple]) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Generator:
+        """Iterate over the keys of the leaf values."""
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        """Number of leaf values."""
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.to_dict()})"
+
+    def values(self) -> ValuesView:
+        """Return a view of the leaf values."""
+        return _ColumnarValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Return a view of the (key, leaf value) pairs."""
+        return _ColumnarItemsView(self)
+
+    @property
+    def extract(self):
+        """Get item as a ColumnarDataDict, see NestedDict.extract."""
+        return _ColumnarExtractor(self)
+
+    def rows(self) -> Generator:
+        """Yield the ColumnarDataDict row by row, see NestedDict.rows."""
+        return ((*key, value) for key, value in self.items())
+
+    def to_columns(self) -> list:
+        """Return the columns of keys, see NestedDict.to_columns, followed by the values as a NumPy array."""
+        levels, positions, _ = _columns(self._positions._tree)
+        return [*levels, self._column[np.array(positions, dtype=np.intp)]]
+
+    def copy(self) -> T:
+        """Return a copy."""
+        self._shared = True
+        return self._from_columns(self._keys, self._column.copy(), self._positions)
+
+    def to_dict(self) -> dict:
+        """Return a copy as a dictionary."""
+        values = self._column.tolist()
+        return _map_values(self._positions._tree, values.__getitem__)
+
+    def to_datadict(self) -> DataDict:
+        """Return a copy as a dict-backed DataDict."""
+        return DataDict._from_tree(self.to_dict(), len(self._keys))
+
+    def _arithmetic_operation(
+        self,
+        other,
+        operation: str,
+        symbol: str,
+        reflected: bool = False,
+        fill_value: Any = None,
+        how: str = "left",
+    ):
+        """Implements any arithmetic operation on the arrays, see DataDict._arithmetic_operation.
+        A DataDict operand is converted to a ColumnarDataDict first."""
+        _check_join_options(fill_value, how)
+        func = getattr(operator, operation)
+        if isinstance(other, DataDict):
+            other = self.__class__(other)
+
+        if isinstance(other, ColumnarDataDict):
+            if reflected:
+                return other._arithmetic_operation(self, operation, symbol)
+            if self._keys == other._keys:
+                return self._with_column(func(self._column, other._column))
+            return self._join(other, operation, symbol, fill_value, how)
+
+        elif isinstance(other, Number):
+            if reflected:
+                return self._with_column(func(other, self._column))
+            return self._with_column(func(self._column, other))
+
+        return NotImplemented
+
+    def _join(self, other: T, operation: str, symbol: str, fill_value: Any, how: str) -> T:
+        """Align the values of other to the keys of self and apply the operation."""
+        if not self._covers(other):
+            if how == "outer":
+                result = self.to_datadict()._arithmetic_operation(
+                    other.to_datadict(), operation, symbol, fill_value=fill_value, how=how
+                )
+                return self.__class__(result)
+            raise TypeError(f"unsupported operand type(s) for {symbol}: incompatible keys")
+
+        func = getattr(operator, operation)
+        column = self._column
+        matched, right = self._align(other)
+        with np.errstate(all="ignore"):
+            if fill_value is not None:
+                result = func(column, np.where(matched, right, fill_value))
+            else:
+                result = np.where(matched, func(column, right), column)
+        return self._with_column(result)
+
+    def _covers(self, other: T) -> bool:
+        """Check whether each key of other is a key of self or a prefix of one."""
+        return all(key in self._positions for key in other._keys)
+
+    def _align(self, other: T) -> Tuple[np.ndarray, np.ndarray]:
+        """Align the values of other to the keys of self.
+        The leaf of other at each key of self, or at one of its prefixes, is broadcast.
+        Return the mask of the keys matched and the values aligned."""
+        tree = other._positions._tree
+        aligned = np.full(len(self), -1, dtype=np.intp)
+        for position, key in enumerate(self._keys):
+            node = tree
+            for k in key:
+                node = node.get(k)
+                if not isinstance(node, dict):
+                    break
+            if node is not None and not isinstance(node, dict):
+                aligned[position] = node
+
+        matched = aligned >= 0
+        if len(other):
+            right = other._column[np.where(matched, aligned, 0)]
+        else:
+            right = np.zeros_like(self._column)
+        return matched, right
+
+    def _inplace_arithmetic_operation(self, other, operation: str, symbol: str):
+        """Implements any in-place arithmetic operation on the array.
+        The array is replaced only if the result needs a different data type."""
+        if isinstance(other, DataDict):
+            other = self.__class__(other)
+        if isinstance(other, ColumnarDataDict):
+            if self._keys == other._keys:
+                matched, right = None, other._column
+            elif self._covers(other):
+                matched, right = self._align(other)
+            else:
+                raise TypeError(f"unsupported operand type(s) for {symbol}: incompatible keys")
+        elif isinstance(other, Number):
+            matched, right = None, other
+        else:
+            return NotImplemented
+
+        func = getattr(operator, operation)
+        column = self._column
+        dtype = func(column[:1], right if matched is None else right[:1]).dtype
+        with np.errstate(all="ignore"):
+            if dtype != column.dtype:
+                result = func(column, right)
+                self._values = result if matched is None else np.where(matched, result, column)
+            elif matched is None:
+                getattr(operator, "__i" + operation[2:])(column, right)
+            else:
+                column[matched] = func(column[matched], right[matched])
+        return self
+
+    def apply(self, func: Callable, inplace: bool = False, vectorized: bool = None):
+        """
+        Apply func to all values.
+
+        Args:
+            func: Function to apply.
+            inplace: Set to True to modify the values in place.
+            vectorized:
+                Set to True if func can be called once with the array of all values.
+                By default, only NumPy ufuncs are called with the array.
+        """
+        if vectorized is None:
+            vectorized = isinstance(func, np.ufunc)
+        if vectorized:
+            column = np.asarray(func(self._column))
+        else:
+            column = np.array([func(value) for value in self._column.tolist()])
+        if inplace:
+            self._values = column
+        else:
+            return self._with_column(column)
+
+    def reduce(self, func: Callable, *initial: Any):
+        """Pass func and initial to functools.reduce and apply it to all values."""
+        return reduce(func, self.values(), *initial)
+
+    def total(self) -> Number:
+        """Returns sum of all values."""
+        return self._column.sum().item()
+
+    def mean(self) -> Number:
+        """Returns mean of all values."""
+        return self._column.mean().item()
+
+    def stats(self, sketch_size: int = None) -> Statistics:
+        """Returns the Statistics of all values, see DataDict.stats."""
+        return Statistics(sketch_size).update(self._column.tolist())
+
+    def var(self, ddof: int = 1) -> Number:
+        """Returns variance of all values."""
+        return self._column.var(ddof=ddof).item()
+
+    def std(self, ddof: int = 1) -> Number:
+        """Returns standard deviation of all values."""
+        return self._column.std(ddof=ddof).item()
+
+    def min(self) -> Number:
+        """Returns minimum of all values."""
+        return self._column.min().item()
+
+    def max(self) -> Number:
+        """Returns maximum of all values."""
+        return self._column.max().item()
+
+    def count(self) -> int:
+        """Returns number of values."""
+        return len(self)
+
+    def quantile(self, q: float) -> Number:
+        """Returns q-quantile of all values."""
+        return np.quantile(self._column, q).item()
+
+    def describe(self) -> dict:
+        """Returns summary statistics of all values, see DataDict.describe."""
+        quartiles = np.quantile(self._column, [0.25, 0.5, 0.75]).tolist()
+        return {
+            "count": self.count(),
+            "mean": self.mean(),
+            "std": self.std(),
+            "min": self.min(),
+            "25%": quartiles[0],
+            "50%": quartiles[1],
+            "75%": quartiles[2],
+            "max": self.max(),
+        }
+
+
+class _ColumnarValuesView(ValuesView):
+    """ValuesView yielding the values in the order of the keys"""
+
+    def __iter__(self):
+        values = self._mapping._column.tolist()
+        return (values[position] for position in _walk_values(self._mapping._positions._tree))
+
+
+class _ColumnarItemsView(ItemsView):
+    """ItemsView yielding the items in the order of the keys"""
+
+    def __iter__(self):
+        values = self._mapping._column.tolist()
+        return ((key, values[position]) for key, position in _walk(self._mapping._positions._tree))
+
+
+class _ColumnarExtractor:
+    """Extract from the index, then gather the values of the keys extracted"""
+
+    def __init__(self, extractee):
+        self._extractee = extractee
+
+    def __getitem__(self, key):
+        positions = self._extractee._positions.extract[key]
+        keys, gathered = [], []
+        for sub_key, position in _walk(positions._tree):
+            keys.append(sub_key)
+            gathered.append(position)
+        column = self._extractee._column[np.asarray(gathered, dtype=np.intp)]
+        return self._extractee._from_columns(keys, column)
@@ -0,0 +1,203 @@
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from copy import deepcopy
+from threading import Lock
+from typing import Any, Generator, Tuple, Union
+
+from ndicts.nested_dict import _MISSING, NestedDict, _count_leaves, _walk
+
+
+class ConcurrentNestedDict(MutableMapping):
+    """
+    Thread-safe NestedDict, with lock-free reads and writers serialised per top-level key.
+
+    The nested dictionaries are never mutated once published, as in read-copy-update.
+    Readers take the current version with no lock, and can traverse it
+    while writers are running, which only ever publish new versions.
+    A writer holds the lock of the top-level key it changes,
+    copies the nodes on the path of the key, as a copy-on-write NestedDict does,
+    then publishes a new root under a short lock.
+    Writers on different top-level keys only wait for each other while publishing,
+    which copies the root.
+
+    Each method is atomic. Methods combining several of them,
+    such as update or setdefault, are not.
+
+    Args:
+        dictionary: Input nested dictionary, or NestedDict, which is copied.
+
+    See Also:
+        NestedDict.copy: Copy-on-write copies.
+
+    Examples:
+        >>> cnd = ConcurrentNestedDict({"a": {"x": 0}, "b": 1})
+        >>> cnd["a", "y"] = 2
+        >>> snapshot = cnd.snapshot()
+        >>> del cnd["a"]
+        >>> snapshot
+        NestedDict({'a': {'x': 0, 'y': 2}, 'b': 1})
+        >>> cnd
+        ConcurrentNestedDict({'b': 1})
+    """
+
+    def __init__(self, dictionary: Union[NestedDict, dict] = None) -> None:
+        if isinstance(dictionary, NestedDict):
+            dictionary = dictionary._tree
+        root = deepcopy(dictionary) if dictionary is not None else {}
+        counts = {key: _count_leaves(value) if isinstance(value, dict) else 1 for key, value in root.items()}
+        # Root, leaf count of each top-level key and total leaf count, replaced together
+        self._state = (root, counts, sum(counts.values()))
+        self._locks = {}
+        self._publish_lock = Lock()
+
+    def snapshot(self) -> NestedDict:
+        """
+        Return the current version as a NestedDict, in constant time.
+
+        The NestedDict shares the nodes of the version copy-on-write,
+        it is not affected by later writes, nor can it affect them.
+        """
+        root, _, length = self._state
+        return _wrap(root, length)
+
+    def _lock(self, key: Any) -> Lock:
+        """Return the lock of a top-level key, dict.setdefault is atomic."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks.setdefault(key, Lock())
+        return lock
+
+    def _publish(self, top: Any, subtree: Any, count: int) -> None:
+        """Publish a new version, where the top-level key holds subtree and count leaves."""
+        with self._publish_lock:
+            root, counts, length = self._state
+            root = dict(root)
+            counts = dict(counts)
+            length -= counts.pop(top, 0)
+            if subtree is _MISSING:
+                root.pop(top, None)
+            else:
+                root[top] = subtree
+                counts[top] = count
+                length += count
+            self._state = (root, counts, length)
+
+    def __getitem__(self, key: Union[Any, Tuple]) -> Any:
+        """Get item associated to the key, subtrees are returned as snapshots, see NestedDict.__getitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        item = self._state[0]
+        for k in key:
+            try:
+                item = item[k]
+            except (KeyError, TypeError):
+                raise KeyError(key)
+        if isinstance(item, dict):
+            return _wrap(item)
+        return item
+
+    def __contains__(self, key: Union[Any, Tuple]) -> bool:
+        if not isinstance(key, tuple):
+            key = (key,)
+        item = self._state[0]
+        for k in key:
+            try:
+                item = item[k]
+            except (KeyError, TypeError):
+                return False
+        return True
+
+    def __setitem__(self, key: Union[Any, Tuple], value: Any) -> None:
+        """Set the key to the given value, see NestedDict.__setitem__.
+        Dictionaries are copied, so that they cannot be mutated once published."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if isinstance(value, dict):
+            value = deepcopy(value)
+        top = key[0]
+        with self._lock(top):
+            root, counts, _ = self._state
+            count = counts.get(top, 0)
+            if len(key) == 1:
+                subtree = value
+                count = 0
+                old_value = _MISSING
+            else:
+                # Copy the nodes on the path, published nodes are never mutated
+                subtree = node = _copy_node(root.get(top, _MISSING), key, 1)
+                for depth, k in enumerate(key[1:-1], 2):
+                    node[k] = node = _copy_node(node.get(k, _MISSING), key, depth)
+                old_value = node.get(key[-1], _MISSING)
+                node[key[-1]] = value
+            if old_value is not _MISSING:
+                count -= _count_leaves(old_value) if isinstance(old_value, dict) else 1
+            count += _count_leaves(value) if isinstance(value, dict) else 1
+            self._publish(top, subtree, count)
+
+    def __delitem__(self, key: Union[Any, Tuple]) -> None:
+        """Delete the item corresponding to the key, see NestedDict.__delitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        top = key[0]
+        with self._lock(top):
+            root, counts, _ = self._state
+            nodes = [root]
+            for k in key[:-1]:
+                try:
+                    nodes.append(nodes[-1][k])
+                except (KeyError, TypeError):
+                    raise KeyError(key)
+            if not isinstance(nodes[-1], dict) or key[-1] not in nodes[-1]:
+                raise KeyError(key)
+
+            # Copy the nodes on the path below the root, published nodes are never mutated
+            nodes = [dict(node) for node in nodes[1:]]
+            for depth, node in enumerate(nodes[1:], 1):
+                nodes[depth - 1][key[depth]] = node
+            value = nodes[-1].pop(key[-1]) if nodes else root[top]
+            # Prune the levels left empty, deepest first
+            for depth in range(len(nodes) - 1, 0, -1):
+                if nodes[depth]:
+                    break
+                del nodes[depth - 1][key[depth]]
+            subtree = nodes[0] if nodes and nodes[0] else _MISSING
+            count = counts[top] - (_count_leaves(value) if isinstance(value, dict) else 1)
+            self._publish(top, subtree, count)
+
+    def __iter__(self) -> Generator:
+        """Iterate over the keys of the leaf values of the current version."""
+        return (key for key, _ in _walk(self._state[0]))
+
+    def __len__(self) -> int:
+        """Number of leaf values."""
+        return self._state[2]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self._state[0]})"
+
+    def values(self) -> ValuesView:
+        """Return a view of the leaf values of the current version."""
+        return self.snapshot().values()
+
+    def items(self) -> ItemsView:
+        """Return a view of the (key, leaf value) pairs of the current version."""
+        return self.snapshot().items()
+
+    def to_dict(self) -> dict:
+        """Return a copy of the current version as a dictionary."""
+        return deepcopy(self._state[0])
+
+
+def _copy_node(node: Any, key: Tuple, depth: int) -> dict:
+    """Return a copy of a node on the path of key, or a new node if it is missing."""
+    if node is _MISSING:
+        return {}
+    if not isinstance(node, dict):
+        raise TypeError(f"cannot set {key}, {key[:depth]} is a leaf")
+    return dict(node)
+
+
+def _wrap(ndict: dict, length: int = None) -> NestedDict:
+    """Wrap a published nested dictionary in a NestedDict sharing it copy-on-write."""
+    nd = NestedDict._from_tree(ndict, length)
+    nd._share([ndict])
+    return nd
@@ -1,9 +1,18 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
 from functools import reduce
+from itertools import repeat
+from math import prod
 from numbers import Number
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+import operator
+import os
 
 from ndicts import NestedDict
+from ndicts.nested_dict import (
+    _MISSING, _build_from_items, _build_from_product, _columns, _identity, _map_values, _walk, _walk_values
+)
+from ndicts.stats import Statistics
 
 
 class _Arithmetics(ABC):
@@ -14,10 +23,17 @@ class _Arithmetics(ABC):
 
     @abstractmethod
     def _arithmetic_operation(
-        self, other, operation: str = "__add__", symbol: str = "+"
+        self,
+        other,
+        operation: str = "__add__",
+        symbol: str = "+",
+        reflected: bool = False,
+        fill_value: Any = None,
+        how: str = "left",
     ):
         """General implementation of any arithmetic operation, just pass the operation and symbol
-        Once this is defined all methods below should work"""
+        Once this is defined all methods below should work
+        Return NotImplemented if the operation is not supported with other"""
         raise NotImplementedError
 
     def __add__(self, other):
@@ -41,64 +57,609 @@ class _Arithmetics(ABC):
     def __pow__(self, other):
         return self._arithmetic_operation(other, "__pow__", "**")
 
+    def __radd__(self, other):
+        return self._arithmetic_operation(other, "__add__", "+", reflected=True)
+
+    def __rsub__(self, other):
+        return self._arithmetic_operation(other, "__sub__", "-", reflected=True)
+
+    def __rmul__(self, other):
+        return self._arithmetic_operation(other, "__mul__", "*", reflected=True)
+
+    def __rtruediv__(self, other):
+        return self._arithmetic_operation(other, "__truediv__", "/", reflected=True)
+
+    def __rfloordiv__(self, other):
+        return self._arithmetic_operation(other, "__floordiv__", "//", reflected=True)
+
+    def __rmod__(self, other):
+        return self._arithmetic_operation(other, "__mod__", "%", reflected=True)
+
+    def __rpow__(self, other):
+        return self._arithmetic_operation(other, "__pow__", "**", reflected=True)
+
+    @abstractmethod
+    def _inplace_arithmetic_operation(self, other, operation: str = "__add__", symbol: str = "+"):
+        """General implementation of any in-place arithmetic operation, updating self
+        Return self, or NotImplemented if the operation is not supported with other"""
+        raise NotImplementedError
+
+    def __iadd__(self, other):
+        return self._inplace_arithmetic_operation(other, "__add__", "+=")
+
+    def __isub__(self, other):
+        return self._inplace_arithmetic_operation(other, "__sub__", "-=")
+
+    def __imul__(self, other):
+        return self._inplace_arithmetic_operation(other, "__mul__", "*=")
+
+    def __itruediv__(self, other):
+        return self._inplace_arithmetic_operation(other, "__truediv__", "/=")
+
+    def __ifloordiv__(self, other):
+        return self._inplace_arithmetic_operation(other, "__floordiv__", "//=")
+
+    def __imod__(self, other):
+        return self._inplace_arithmetic_operation(other, "__mod__", "%=")
+
+    def __ipow__(self, other):
+        return self._inplace_arithmetic_operation(other, "__pow__", "**=")
+
     def __neg__(self):
         return self * -1
 
+    def _named_operation(self, other, operation: str, symbol: str, fill_value: Any, how: str):
+        result = self._arithmetic_operation(
+            other, operation, symbol, fill_value=fill_value, how=how
+        )
+        if result is NotImplemented:
+            raise TypeError(
+                f"unsupported operand type(s) for {symbol}: {type(self)} and {type(other)}"
+            )
+        return result
+
+    def add(self, other, fill_value: Any = None, how: str = "left"):
+        """
+        Addition, with options to handle missing keys.
+
+        The same options are available for sub, mul, truediv, floordiv, mod and pow.
+
+        Args:
+            other: Number or object of the same class.
+            fill_value:
+                Value used in place of the leaves missing on either side.
+                If None, leaves missing from other are left unchanged.
+            how:
+                "left" to keep the keys of self only,
+                "outer" to keep the keys of both. An outer join requires a fill_value.
+
+        Examples:
+            >>> dd1 = DataDict({"a": 1, "b": 2})
+            >>> dd2 = DataDict({"a": 10, "c": 30})
+            >>> dd1.add(dd2, fill_value=0, how="outer")
+            DataDict({'a': 11, 'b': 2, 'c': 30})
+        """
+        return self._named_operation(other, "__add__", "+", fill_value, how)
+
+    def sub(self, other, fill_value: Any = None, how: str = "left"):
+        """Subtraction, see add."""
+        return self._named_operation(other, "__sub__", "-", fill_value, how)
+
+    def mul(self, other, fill_value: Any = None, how: str = "left"):
+        """Multiplication, see add."""
+        return self._named_operation(other, "__mul__", "*", fill_value, how)
+
+    def truediv(self, other, fill_value: Any = None, how: str = "left"):
+        """Division, see add."""
+        return self._named_operation(other, "__truediv__", "/", fill_value, how)
+
+    def floordiv(self, other, fill_value: Any = None, how: str = "left"):
+        """Floor division, see add."""
+        return self._named_operation(other, "__floordiv__", "//", fill_value, how)
+
+    def mod(self, other, fill_value: Any = None, how: str = "left"):
+        """Modulo, see add."""
+        return self._named_operation(other, "__mod__", "%", fill_value, how)
+
+    def pow(self, other, fill_value: Any = None, how: str = "left"):
+        """Exponentiation, see add."""
+        return self._named_operation(other, "__pow__", "**", fill_value, how)
+
 
 class DataDict(NestedDict, _Arithmetics):
     """A NestedDict that supports arithmetics.
     Other methods are included that make DataDict similar to DataFrames."""
 
-    def _arithmetic_operation(self, other, operation: str, symbol: str):
+    def _arithmetic_operation(
+        self,
+        other,
+        operation: str,
+        symbol: str,
+        reflected: bool = False,
+        fill_value: Any = None,
+        how: str = "left",
+    ):
         """Implements any arithmetic operation, just pass the underlying method as string
         The symbol, passed as a string, will appear in the exception message if any
-        The operation is performed only between NestedProperties or with numbers"""
-        result = self.copy()
+        The operation is performed only between NestedProperties or with numbers
+
+        Keys of other can be a prefix of the keys of self,
+        in which case the value of other is broadcast to the whole subtree"""
+        _check_join_options(fill_value, how)
+        func = getattr(operator, operation)
+
         if isinstance(other, self.__class__):
-            for other_key, other_value in other.items():
-                if other_key in self:
-                    for key, value in self.extract[other_key].items():
-                        result[key] = getattr(value, operation).__call__(other_value)
-                else:
+            if reflected:
+                return other._arithmetic_operation(self, operation, symbol)
+            # Subtrees of self missing from other are shared with the result,
+            # unless they may be mutated from outside
+            shared = None if self._escaped else []
+            result = self._from_tree(
+                _join(self._tree, other._tree, func, symbol, fill_value, how == "outer", shared),
+                len(self) if how == "left" else None,
+            )
+            if shared:
+                self._share(shared)
+                result._share(shared)
+            return result
+
+        elif isinstance(other, Number):
+            if reflected:
+                return self._from_tree(_map_values(self._tree, lambda value: func(other, value)), len(self))
+            return self._from_tree(_map_values(self._tree, lambda value: func(value, other)), len(self))
+
+        return NotImplemented
+
+    def _inplace_arithmetic_operation(self, other, operation: str, symbol: str):
+        """Implements any in-place arithmetic operation, with the same rules as _arithmetic_operation
+        The leaves of self are updated without building a new DataDict"""
+        if isinstance(other, self.__class__):
+            for key in other:
+                if key not in self:
                     raise TypeError(
                         f"unsupported operand type(s) for {symbol}: incompatible keys"
                     )
-            return result
-
+            right = other._tree
         elif isinstance(other, Number):
-            for key, value in self.items():
-                result[key] = getattr(value, operation).__call__(other)
-            return result
+            right = other
+        else:
+            return NotImplemented
 
-        return TypeError(
-            f"unsupported operand type(s) for {symbol}: {type(self)} and {type(other)}"
-        )
+        func = getattr(operator, operation)
+        if self._digests:
+            self._digests.clear()
+        root = self._tree
+        if id(root) in self._shared:
+            root = self._tree = self._own(root)
+        stack = [(root, right)]
+        while stack:
+            node, right = stack.pop()
+            for key, value in node.items():
+                right_value = right.get(key, _MISSING) if isinstance(right, dict) else right
+                if right_value is _MISSING:
+                    continue
+                if isinstance(value, dict):
+                    if id(value) in self._shared:
+                        value = node[key] = self._own(value)
+                    stack.append((value, right_value))
+                elif not isinstance(right_value, dict):
+                    node[key] = func(value, right_value)
+        return self
+
+    def apply(
+        self,
+        func: Callable,
+        inplace: bool = False,
+        workers: int = None,
+        executor: Executor = None,
+        level: int = 1,
+    ):
+        """
+        Apply func to all values.
+
+        If workers or executor is given, the subtrees at level are split in batches
+        which are mapped in parallel, and the result is assembled in the order of the keys.
+        With a process pool, func must be picklable, as a function defined at module level.
+
+        Args:
+            func: Function applied to each value.
+            inplace: Set to True to replace the values of self.
+            workers: Number of processes of the ProcessPoolExecutor created, by default the number of CPUs.
+            executor: concurrent.futures.Executor to map the batches with, instead of a new process pool.
+            level: Depth of the subtrees the DataDict is split into.
+
+        Examples:
+            >>> dd = DataDict.from_product(["ab", "xy"], values=range(4))
+            >>> dd.apply(abs, workers=2) == dd.apply(abs)
+            True
+        """
+        if workers is None and executor is None:
+            if inplace:
+                for key, leaf in self.items():
+                    self[key] = func(leaf)
+                return
+            return self._from_tree(_map_values(self._tree, func), len(self))
+
+        results = self._map_batches(_apply_batch, func, workers, executor, level)
+        tree = _build_from_items(item for batch in results for item in batch)[0]
+        if not inplace:
+            return self._from_tree(tree, len(self))
+        self._replace_tree(tree, len(self))
+
+    def _map_batches(self, batch_func: Callable, func: Any, workers: int, executor: Executor, level: int) -> list:
+        """Split the subtrees at level in batches, return the results of batch_func(func, batch) in order."""
+        chunks = list(_walk(self._tree, max_depth=level))
+        if executor is None:
+            with ProcessPoolExecutor(workers) as executor:
+                return self._map_batches(batch_func, func, workers, executor, level)
+        # A few batches per worker balance the load, without pickling each subtree separately
+        size = -(-len(chunks) // (4 * (workers or os.cpu_count() or 1))) or 1
+        batches = [chunks[start:start + size] for start in range(0, len(chunks), size)]
+        return list(executor.map(batch_func, repeat(func, len(batches)), batches))
+
+    def to_columnar(self, dtype=None):
+        """
+        Return a copy as a ColumnarDataDict, storing the values in a NumPy array.
+
+        Requires numpy.
+        """
+        from ndicts.columnar import ColumnarDataDict
+
+        return ColumnarDataDict(self, dtype)
+
+    @classmethod
+    def from_ndarray(cls, array, labels: Sequence[Iterable] = None) -> "DataDict":
+        """
+        Initialize a DataDict from a dense NumPy array, as returned by DataDict.to_ndarray.
+
+        Requires numpy.
+
+        Args:
+            array: Array, or nested sequences, with one level of keys per axis.
+            labels: Keys on each axis. If None, the keys are the positions on each axis.
+
+        Returns:
+            DataDict
+
+        Raises:
+            ValueError: If the labels do not match the shape of the array.
+
+        Examples:
+            >>> import numpy as np
+            >>> DataDict.from_ndarray(np.arange(4).reshape(2, 2), labels=["ab", "xy"])
+            DataDict({'a': {'x': 0, 'y': 1}, 'b': {'x': 2, 'y': 3}})
+        """
+        import numpy as np
+
+        array = np.asarray(array)
+        if labels is None:
+            labels = [range(size) for size in array.shape]
+        labels = [list(label) for label in labels]
+        if not labels or [len(label) for label in labels] != list(array.shape):
+            raise ValueError(f"labels do not match the shape {array.shape} of the array")
+        return cls._from_tree(*_build_from_product(labels, array.reshape(-1).tolist()))
+
+    def to_ndarray(self, dtype=None) -> Tuple[Any, List[list]]:
+        """
+        Return the values as a dense NumPy array, with the keys on each axis.
 
-    def apply(self, func: Callable, inplace: bool = False):
-        """Apply func to all values."""
-        if inplace:
-            for key, leaf in self.items():
-                self[key] = func(leaf)
+        The keys must be a cartesian product, as in a DataDict built with from_product.
+        Keys on each axis are in the order they first appear.
+
+        Requires numpy.
+
+        Args:
+            dtype: Data type of the array, inferred from the values if None.
+
+        Returns:
+            Tuple of the array and the list of keys on each axis.
+
+        Raises:
+            ValueError: If the keys are not a cartesian product.
+
+        Examples:
+            >>> dd = DataDict.from_product(["ab", "xyz"], values=range(6))
+            >>> array, labels = dd.to_ndarray()
+            >>> array
+            array([[0, 1, 2],
+                   [3, 4, 5]])
+            >>> labels
+            [['a', 'b'], ['x', 'y', 'z']]
+        """
+        import numpy as np
+
+        levels, values, ragged = _columns(self._tree)
+        if ragged or not values:
+            raise ValueError("the keys of the DataDict are not a cartesian product")
+        positions = [{} for _ in levels]
+        indices = [
+            np.fromiter((position.setdefault(key, len(position)) for key in level), np.intp, len(level))
+            for level, position in zip(levels, positions)
+        ]
+        shape = tuple(len(position) for position in positions)
+        if prod(shape) != len(values):
+            raise ValueError("the keys of the DataDict are not a cartesian product")
+
+        column = np.asarray(values, dtype)
+        flat = np.ravel_multi_index(indices, shape)
+        if (flat[1:] > flat[:-1]).all():
+            # Keys already in the order of the product
+            array = column.reshape(shape)
         else:
-            new_self = self.copy()
-            for key, leaf in new_self.items():
-                new_self[key] = func(leaf)
-            return new_self
+            array = np.empty_like(column)
+            array[flat] = column
+            array = array.reshape(shape)
+        return array, [list(position) for position in positions]
+
+    def groupby(self, level: Union[int, Sequence[int]]) -> "DataDictGroupBy":
+        """
+        Group the values by the keys on some levels.
 
-    def reduce(self, func: Callable, *initial: Any):
-        """Pass func and initial to functools.reduce and apply it to all values."""
-        return reduce(func, self.values(), *initial)
+        Args:
+            level: Level, or sequence of levels, of the keys to group by.
 
-    def total(self):
-        """Returns sum of all values."""
-        return sum(self.values())
+        Returns:
+            DataDictGroupBy, whose methods return a DataDict keyed by the levels grouped by.
+
+        Examples:
+            >>> dd = DataDict.from_product(["ab", "xy", "uv"], values=range(8))
+            >>> dd.groupby(0).sum()
+            DataDict({'a': 6, 'b': 22})
+
+            Sum over the second level.
+
+            >>> dd.groupby([0, 2]).sum()
+            DataDict({'a': {'u': 2, 'v': 4}, 'b': {'u': 10, 'v': 12}})
+        """
+        return DataDictGroupBy(self, level)
+
+    def reduce(self, func: Callable, *initial: Any, workers: int = None, executor: Executor = None, level: int = 1):
+        """
+        Pass func and initial to functools.reduce and apply it to all values.
+
+        If workers or executor is given, the values are reduced in parallel batches as in apply,
+        and the partial results are reduced with func, which must be associative.
+        """
+        if workers is None and executor is None:
+            return reduce(func, self.values(), *initial)
+        partials = [
+            partial for found, partial in self._map_batches(_reduce_batch, func, workers, executor, level) if found
+        ]
+        return reduce(func, partials, *initial)
+
+    def total(self, workers: int = None, executor: Executor = None, level: int = 1):
+        """Returns sum of all values, in parallel batches if workers or executor is given, see apply."""
+        if workers is None and executor is None:
+            return sum(self.values())
+        return sum(self._map_batches(_sum_batch, None, workers, executor, level))
 
     def mean(self) -> Number:
         """Returns mean of all values."""
         return self.total() / len(self)
 
-    def std(self) -> Number:
-        """Returns standard deviation of all values."""
-        step = self.reduce(lambda a, b: a + (b - self.mean()) ** 2, 0)
-        step /= len(self) - 1
-        return step**0.5
\ No newline at end of file
+    def stats(
+        self, sketch_size: int = None, workers: int = None, executor: Executor = None, level: int = 1
+    ) -> Statistics:
+        """
+        Returns the Statistics of all values, computed in one traversal.
+
+        Statistics of different DataDicts, or of parts of a DataDict, can be merged.
+
+        Examples:
+            >>> dd = DataDict({"a": {"a": 1, "b": 2}, "b": 3})
+            >>> stats = dd.stats()
+            >>> stats.mean(), stats.std(), stats.max
+            (2.0, 1.0, 3)
+            >>> dd.extract["a"].stats().merge(dd.extract["b"].stats()).mean()
+            2.0
+
+            The Statistics of parallel batches are merged the same way, see apply.
+
+            >>> dd.stats(workers=2).std()
+            1.0
+        """
+        if workers is None and executor is None:
+            return Statistics(sketch_size).update(self.values())
+        return reduce(
+            Statistics.merge,
+            self._map_batches(_stats_batch, sketch_size, workers, executor, level),
+            Statistics(sketch_size),
+        )
+
+    def var(self, ddof: int = 1, workers: int = None, executor: Executor = None, level: int = 1) -> Number:
+        """Returns variance of all values, in parallel batches if workers or executor is given, see apply."""
+        return self.stats(workers=workers, executor=executor, level=level).var(ddof)
+
+    def std(self, ddof: int = 1, workers: int = None, executor: Executor = None, level: int = 1) -> Number:
+        """Returns standard deviation of all values, in parallel batches if workers or executor is given, see apply."""
+        return self.stats(workers=workers, executor=executor, level=level).std(ddof)
+
+    def min(self) -> Any:
+        """Returns minimum of all values."""
+        return min(self.values())
+
+    def max(self) -> Any:
+        """Returns maximum of all values."""
+        return max(self.values())
+
+    def count(self) -> int:
+        """Returns number of values."""
+        return len(self)
+
+    def quantile(self, q: float, sketch_size: int = 256) -> Number:
+        """Returns approximate q-quantile of all values, exact up to sketch_size values."""
+        return self.stats(sketch_size).quantile(q)
+
+    def describe(self, sketch_size: int = 256) -> dict:
+        """
+        Returns summary statistics of all values, computed in one traversal.
+
+        Examples:
+            >>> DataDict({"a": {"a": 1, "b": 2}, "b": 3}).describe()
+            {'count': 3, 'mean': 2.0, 'std': 1.0, 'min': 1, '25%': 1.5, '50%': 2.0, '75%': 2.5, 'max': 3}
+        """
+        return self.stats(sketch_size).describe()
+
+
+def _batch_values(batch: List[Tuple[Tuple, Any]]):
+    """Yield the values of a batch of (key, subtree or value) pairs."""
+    for _, value in batch:
+        if isinstance(value, dict):
+            yield from _walk_values(value)
+        else:
+            yield value
+
+
+def _apply_batch(func: Callable, batch: List[Tuple[Tuple, Any]]) -> List[Tuple[Tuple, Any]]:
+    return [(key, _map_values(value, func) if isinstance(value, dict) else func(value)) for key, value in batch]
+
+
+def _reduce_batch(func: Callable, batch: List[Tuple[Tuple, Any]]) -> Tuple[bool, Any]:
+    """Reduce the values of a batch, return whether there were any and the result."""
+    values = _batch_values(batch)
+    for first in values:
+        return True, reduce(func, values, first)
+    return False, None
+
+
+def _sum_batch(_, batch: List[Tuple[Tuple, Any]]):
+    return sum(_batch_values(batch))
+
+
+def _stats_batch(sketch_size: int, batch: List[Tuple[Tuple, Any]]) -> Statistics:
+    return Statistics(sketch_size).update(_batch_values(batch))
+
+
+class DataDictGroupBy:
+    """
+    Values of a DataDict grouped by the keys on some levels.
+
+    The groups are computed in one traversal, the first time they are needed.
+    See DataDict.groupby.
+    """
+
+    def __init__(self, data_dict: DataDict, level: Union[int, Sequence[int]]) -> None:
+        self._data_dict = data_dict
+        self._levels = (level,) if isinstance(level, int) else tuple(level)
+        if not self._levels:
+            raise ValueError("at least one level is needed to group by")
+        self._groups = None
+
+    def groups(self) -> dict:
+        """Return a dictionary mapping each group to the list of its values."""
+        if self._groups is None:
+            levels = self._levels
+            groups = {}
+            for key, value in self._data_dict.items():
+                try:
+                    group = tuple([key[level] for level in levels])
+                except IndexError:
+                    raise ValueError(f"key {key} is too short to be grouped by levels {levels}")
+                values = groups.get(group)
+                if values is None:
+                    groups[group] = [value]
+                else:
+                    values.append(value)
+            self._groups = groups
+        return self._groups
+
+    def agg(self, func: Callable[[list], Any]) -> DataDict:
+        """Apply func to the list of values of each group."""
+        result = self._data_dict.__class__()
+        for group, values in self.groups().items():
+            result[group] = func(values)
+        return result
+
+    def sum(self) -> DataDict:
+        """Sum of the values of each group."""
+        return self.agg(sum)
+
+    def mean(self) -> DataDict:
+        """Mean of the values of each group."""
+        return self.agg(lambda values: sum(values) / len(values))
+
+    def count(self) -> DataDict:
+        """Number of values of each group."""
+        return self.agg(len)
+
+    def min(self) -> DataDict:
+        """Minimum of the values of each group."""
+        return self.agg(min)
+
+    def max(self) -> DataDict:
+        """Maximum of the values of each group."""
+        return self.agg(max)
+
+
+def _check_join_options(fill_value: Any, how: str) -> None:
+    """Validate the options of an arithmetic operation."""
+    if how not in ("left", "outer"):
+        raise ValueError(f"how must be 'left' or 'outer', got {how!r}")
+    if how == "outer" and fill_value is None:
+        raise ValueError("an outer join requires a fill_value")
+
+
+def _join(
+    left: dict,
+    right: dict,
+    func: Callable,
+    symbol: str,
+    fill_value: Any,
+    outer: bool,
+    shared: Optional[list],
+) -> dict:
+    """Traverse both nested dictionaries together and apply func to the aligned leaves.
+
+    A leaf of right aligned with a subtree of left is broadcast to the whole subtree.
+    Leaves of left missing from right are combined with fill_value, or kept if it is None,
+    in which case the subtrees kept are appended to shared rather than copied, unless shared is None.
+    Leaves of right missing from left raise an exception, unless the join is outer."""
+    result = {}
+    stack = [(left, right, result)]
+    while stack:
+        left, right, joined = stack.pop()
+        for key, left_value in left.items():
+            right_value = right.get(key, _MISSING)
+            if isinstance(right_value, dict) and not _has_leaves(right_value):
+                right_value = _MISSING
+
+            if right_value is _MISSING:
+                if fill_value is None:
+                    joined[key] = left_value
+                    if isinstance(left_value, dict):
+                        if shared is None:
+                            joined[key] = _map_values(left_value, _identity)
+                        else:
+                            shared.append(left_value)
+                elif isinstance(left_value, dict):
+                    joined[key] = _map_values(left_value, lambda value: func(value, fill_value))
+                else:
+                    joined[key] = func(left_value, fill_value)
+            elif isinstance(left_value, dict):
+                if isinstance(right_value, dict):
+                    joined[key] = {}
+                    stack.append((left_value, right_value, joined[key]))
+                else:
+                    joined[key] = _map_values(left_value, lambda value: func(value, right_value))
+            elif isinstance(right_value, dict):
+                raise TypeError(f"unsupported operand type(s) for {symbol}: incompatible keys")
+            else:
+                joined[key] = func(left_value, right_value)
+
+        for key, right_value in right.items():
+            if key in left or (isinstance(right_value, dict) and not _has_leaves(right_value)):
+                continue
+            if not outer:
+                raise TypeError(f"unsupported operand type(s) for {symbol}: incompatible keys")
+            if isinstance(right_value, dict):
+                joined[key] = _map_values(right_value, lambda value: func(fill_value, value))
+            else:
+                joined[key] = func(fill_value, right_value)
+    return result
+
+
+def _has_leaves(ndict: dict) -> bool:
+    """Check whether a nested dictionary has any leaf value."""
+    for _ in _walk_values(ndict):
+        return True
+    return False
@@ -0,0 +1,293 @@
+from collections.abc import ItemsView, Mapping, ValuesView
+from sys import intern
+from typing import Any, Generator, Tuple, TypeVar, Union
+
+from ndicts.nested_dict import _MISSING, NestedDict
+
+T = TypeVar('T', bound='FrozenNestedDict')
+
+
+class FrozenNestedDict(Mapping):
+    """
+    Immutable, hashable and compact NestedDict.
+
+    Each node stores its children in a tuple. Their positions are stored in a dictionary
+    shared by all the nodes with the same keys, as it is common in nested dictionaries.
+    Key components which are strings are interned,
+    and the number of leaves and the hash of each node are computed once.
+    Subtrees are never copied: getting a subtree or extracting items
+    returns a FrozenNestedDict sharing the nodes.
+
+    Empty dictionaries have no leaves, and are dropped.
+
+    Args:
+        dictionary: NestedDict, FrozenNestedDict or dictionary.
+
+    Examples:
+        >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+        >>> fnd = FrozenNestedDict(nd)
+        >>> fnd["a", "y"]
+        1
+        >>> fnd["a"]
+        FrozenNestedDict({'x': 0, 'y': 1})
+        >>> len(fnd), fnd == nd
+        (3, True)
+        >>> {fnd: "hashable"}[FrozenNestedDict(nd)]
+        'hashable'
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, dictionary: Union[NestedDict, dict, "FrozenNestedDict"] = None) -> None:
+        if dictionary is None:
+            self._root = _Node((), (), {})
+        elif isinstance(dictionary, FrozenNestedDict):
+            self._root = dictionary._root
+        else:
+            if isinstance(dictionary, NestedDict):
+                dictionary = dictionary._tree
+            self._root = _freeze(dictionary)
+
+    @classmethod
+    def _from_node(cls, node: "_Node") -> T:
+        fnd = cls.__new__(cls)
+        fnd._root = node
+        return fnd
+
+    def __getitem__(self, key: Union[Any, Tuple]) -> Any:
+        """Get item associated to the key, subtrees are returned as FrozenNestedDicts."""
+        node = self._root
+        try:
+            # Going past a leaf raises AttributeError, leaves are never nodes
+            for k in key if type(key) is tuple else (key,):
+                node = node.children[node.positions[k]]
+        except (AttributeError, KeyError, TypeError):
+            raise KeyError(key) from None
+        if type(node) is not _Node:
+            return node
+        return self._from_node(node)
+
+    def __contains__(self, key: Union[Any, Tuple]) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Generator:
+        """Iterate over the keys of the leaf values."""
+        return (key for key, _ in _walk_nodes(self._root))
+
+    def __len__(self) -> int:
+        """Number of leaf values."""
+        return self._root.length
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FrozenNestedDict):
+            if self._root is other._root:
+                return True
+            if len(self) != len(other):
+                return False
+            if None not in (self._root.hash, other._root.hash) and self._root.hash != other._root.hash:
+                return False
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        if self._root.hash is None:
+            raise TypeError(f"unhashable leaf value in {self.__class__.__qualname__}")
+        return self._root.hash
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.to_dict()})"
+
+    def values(self) -> ValuesView:
+        """Return a view of the leaf values."""
+        return _FrozenValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Return a view of the (key, leaf value) pairs."""
+        return _FrozenItemsView(self)
+
+    @property
+    def extract(self):
+        """
+        Get item as a FrozenNestedDict, see NestedDict.extract.
+
+        The subtrees extracted are shared, not copied.
+
+        Examples:
+            >>> fnd = FrozenNestedDict({"a": {"x": 0, "y": 1}, "b": {"x": 2}})
+            >>> fnd.extract["", "x"]
+            FrozenNestedDict({'a': {'x': 0}, 'b': {'x': 2}})
+        """
+        return _FrozenExtractor(self)
+
+    def rows(self) -> Generator:
+        """Yield the FrozenNestedDict row by row, see NestedDict.rows."""
+        return ((*key, value) for key, value in _walk_nodes(self._root))
+
+    def walk(self, max_depth: int = None, preorder: bool = False) -> Generator:
+        """Traverse the FrozenNestedDict, see NestedDict.walk.
+        Subtrees are yielded as FrozenNestedDicts."""
+        for key, value in _walk_nodes(self._root, max_depth, preorder):
+            yield key, self._from_node(value) if type(value) is _Node else value
+
+    def copy(self) -> T:
+        """Return the FrozenNestedDict itself, which is immutable."""
+        return self
+
+    def to_dict(self) -> dict:
+        """Return a copy as a dictionary."""
+        root = {}
+        stack = [(root, self._root)]
+        while stack:
+            ndict, node = stack.pop()
+            for key, child in node.branches():
+                if type(child) is _Node:
+                    ndict[key] = {}
+                    stack.append((ndict[key], child))
+                else:
+                    ndict[key] = child
+        return root
+
+    def to_nested_dict(self) -> NestedDict:
+        """Return a copy as a mutable NestedDict."""
+        return NestedDict._from_tree(self.to_dict(), len(self))
+
+
+class _Node:
+    """Immutable node of a FrozenNestedDict, with its leaf count and hash.
+    The positions of the keys in the tuple of children are shared
+    by all the nodes with the same keys, found in layouts."""
+
+    __slots__ = ("positions", "children", "length", "hash")
+
+    def __init__(self, keys: tuple, children: tuple, layouts: dict) -> None:
+        positions = layouts.get(keys)
+        if positions is None:
+            positions = layouts[keys] = {key: position for position, key in enumerate(keys)}
+        self.positions = positions
+        self.children = children
+        self.length = 0
+        hashes = []
+        for key, child in zip(keys, children):
+            if type(child) is _Node:
+                self.length += child.length
+                hashes.append((key, child.hash))
+            else:
+                self.length += 1
+                hashes.append((key, child))
+        try:
+            self.hash = hash(frozenset(hashes))
+        except TypeError:
+            # Some leaf value is not hashable
+            self.hash = None
+        else:
+            if any(type(child) is _Node and child.hash is None for child in children):
+                self.hash = None
+
+    def branches(self):
+        """Iterate over the (key, child) pairs."""
+        return zip(self.positions, self.children)
+
+
+def _freeze(ndict: dict) -> _Node:
+    """Build the nodes of the nested dictionary bottom up, with an explicit stack."""
+    layouts = {}
+    stack = [(None, iter(ndict.items()), [], [])]
+    while True:
+        _, branches, keys, children = stack[-1]
+        for key, branch in branches:
+            if type(key) is str:
+                key = intern(key)
+            if isinstance(branch, dict):
+                stack.append((key, iter(branch.items()), [], []))
+                break
+            keys.append(key)
+            children.append(branch)
+        else:
+            key, _, keys, children = stack.pop()
+            node = _Node(tuple(keys), tuple(children), layouts)
+            if not stack:
+                return node
+            if keys:
+                stack[-1][2].append(key)
+                stack[-1][3].append(node)
+
+
+def _walk_nodes(root: _Node, max_depth: int = None, preorder: bool = False) -> Generator:
+    """Traverse the nodes with an explicit stack, see nested_dict._walk."""
+    stack = [((), root.branches())]
+    while stack:
+        prefix, branches = stack[-1]
+        for node, branch in branches:
+            key = prefix + (node,)
+            if type(branch) is _Node and (max_depth is None or len(key) < max_depth):
+                if preorder:
+                    yield key, branch
+                stack.append((key, branch.branches()))
+                break
+            yield key, branch
+        else:
+            stack.pop()
+
+
+def _child(node: _Node, key: Any) -> Any:
+    """Return the child of node on key, or _MISSING."""
+    try:
+        return node.children[node.positions[key]]
+    except (KeyError, TypeError):
+        return _MISSING
+
+
+def _extract(node: Any, pattern: Tuple, layouts: dict) -> Any:
+    """Return the node restricted to the keys matching pattern, or _MISSING if none matches.
+    Nodes below the pattern are shared."""
+    if not pattern:
+        return node
+    if type(node) is not _Node:
+        return _MISSING
+    k, rest = pattern[0], pattern[1:]
+    if k == "":
+        branches = node.branches()
+    else:
+        child = _child(node, k)
+        branches = [] if child is _MISSING else [(k, child)]
+    keys, children = [], []
+    for key, child in branches:
+        child = _extract(child, rest, layouts)
+        if child is not _MISSING:
+            keys.append(key)
+            children.append(child)
+    return _Node(tuple(keys), tuple(children), layouts) if keys else _MISSING
+
+
+class _FrozenValuesView(ValuesView):
+    """ValuesView traversing the nodes"""
+
+    def __iter__(self):
+        return (value for _, value in _walk_nodes(self._mapping._root))
+
+
+class _FrozenItemsView(ItemsView):
+    """ItemsView traversing the nodes"""
+
+    def __iter__(self):
+        return _walk_nodes(self._mapping._root)
+
+
+class _FrozenExtractor:
+    """Restrict the nodes to the keys extracted"""
+
+    def __init__(self, extractee):
+        self._extractee = extractee
+
+    def __getitem__(self, key):
+        if type(key) is not tuple:
+            key = (key,)
+        node = _extract(self._extractee._root, key, {})
+        if node is _MISSING:
+            if "" not in key:
+                raise KeyError(key)
+            node = _Node((), (), {})
+        return self._extractee._from_node(node)
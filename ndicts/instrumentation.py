@@ -0,0 +1,302 @@
+"""Opt-in counters of the traversals and copies made by NestedDicts, and of the time spent in their methods."""
+
+import sys
+import threading
+from copy import deepcopy
+from functools import wraps
+from inspect import isfunction, iscoroutinefunction, isgeneratorfunction
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ndicts import data_dict, nested_dict
+from ndicts.data_dict import DataDict, _Arithmetics
+from ndicts.nested_dict import NestedDict
+
+# Helpers traversing a whole nested dictionary, or subtree, and helpers copying one
+_TRAVERSALS = {
+    "_walk": nested_dict._walk,
+    "_walk_values": nested_dict._walk_values,
+    "_walk_pattern": nested_dict._walk_pattern,
+    "_count_leaves": nested_dict._count_leaves,
+}
+_COPIES = {
+    "_map_values": nested_dict._map_values,
+    "_join": data_dict._join,
+}
+_TIMED_CLASSES = (NestedDict, DataDict, _Arithmetics)
+_TIMED_PRIVATE = {"_arithmetic_operation", "_inplace_arithmetic_operation"}
+
+# Instrumentations enabled, replaced as a whole so that the wrappers can read it without the lock
+_active: Tuple["Instrumentation", ...] = ()
+# Attributes replaced while instrumentation is enabled, with their original value
+_patches: list = []
+# Held while enabling and disabling, so that the attributes are replaced and restored once
+_lock = threading.RLock()
+# Set while a thread records an event, so that the events of the callbacks are not recorded
+_local = threading.local()
+
+
+class Instrumentation:
+    """
+    Counters of the traversals and copies made by NestedDicts, and of the time spent in their methods.
+
+    Instrumentation is off by default, and costs nothing then:
+    the methods of NestedDict and DataDict, and the helpers they use,
+    are only replaced by counting wrappers while an Instrumentation is enabled,
+    and restored once none is.
+    Instrumentations can be nested, each one counts what happens while it is enabled.
+    They can be enabled and disabled from any thread,
+    and count what happens in every thread while they are enabled.
+    What the callbacks do is not counted.
+
+    The counters are not synchronized, the counts of threads running at the same time may be lost.
+
+    Attributes:
+        node_visits:
+            What the traversals report, which depends on the helper:
+            the items yielded by the walks, that is the leaves, or the subtrees as well when walking in preorder,
+            and the matches of a pattern; the leaves counted by _count_leaves;
+            and every entry, subtrees and leaves, of the dictionaries copied.
+            The subtrees that are walked but not yielded, or not counted, are not visits.
+        traversals: Traversals of a nested dictionary, or of a subtree.
+        deepcopies: Calls to copy.deepcopy.
+        bytes_copied:
+            Estimate of the bytes copied, as the sum of sys.getsizeof
+            of the dictionaries copied and of the leaf values deep copied.
+        calls: Number of calls of each method.
+        time: Wall time spent in each method, in seconds.
+            Methods returning a generator only count the time to create it.
+
+    Args:
+        callback:
+            Called with the kind of event, the name of the method or helper, and an amount,
+            for each event counted. Kinds are the names of the attributes.
+
+    Examples:
+        >>> with Instrumentation() as stats:
+        ...     nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+        ...     length = len(nd)
+        ...     nd_copy = nd.copy()
+        >>> stats.traversals, stats.node_visits, stats.deepcopies
+        (1, 3, 1)
+        >>> stats.calls["NestedDict.__len__"], stats.calls["NestedDict.copy"]
+        (1, 1)
+
+        Collect the events.
+
+        >>> events = []
+        >>> with Instrumentation(callback=lambda *event: events.append(event)):
+        ...     nd.extract["", "x"]
+        NestedDict({'a': {'x': 0}})
+        >>> sorted({kind for kind, _, _ in events})
+        ['node_visits', 'time', 'traversals']
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, str, Any], Any]] = None) -> None:
+        self.callback = callback
+        self.reset()
+
+    def reset(self) -> None:
+        """Set all counters to zero."""
+        self.node_visits = 0
+        self.traversals = 0
+        self.deepcopies = 0
+        self.bytes_copied = 0
+        self.calls: Dict[str, int] = {}
+        self.time: Dict[str, float] = {}
+
+    def enable(self) -> "Instrumentation":
+        """Start counting, return the Instrumentation."""
+        global _active
+        with _lock:
+            if self not in _active:
+                if not _active:
+                    _patch()
+                _active = _active + (self,)
+        return self
+
+    def disable(self) -> None:
+        """Stop counting, the counters are kept."""
+        global _active
+        with _lock:
+            if self in _active:
+                _active = tuple(instrumentation for instrumentation in _active if instrumentation is not self)
+                if not _active:
+                    _unpatch()
+
+    @property
+    def enabled(self) -> bool:
+        return self in _active
+
+    def __enter__(self) -> "Instrumentation":
+        return self.enable()
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+    def _record(self, kind: str, name: str, amount: Any) -> None:
+        if kind == "time":
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.time[name] = self.time.get(name, 0.0) + amount
+        else:
+            setattr(self, kind, getattr(self, kind) + amount)
+        if self.callback is not None:
+            self.callback(kind, name, amount)
+
+    def summary(self) -> dict:
+        """Return the counters as a dictionary."""
+        return {
+            "node_visits": self.node_visits,
+            "traversals": self.traversals,
+            "deepcopies": self.deepcopies,
+            "bytes_copied": self.bytes_copied,
+            "calls": dict(self.calls),
+            "time": dict(self.time),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__qualname__}(node_visits={self.node_visits}, traversals={self.traversals}, "
+            f"deepcopies={self.deepcopies}, bytes_copied={self.bytes_copied})"
+        )
+
+
+def _emit(kind: str, name: str, amount: Any) -> None:
+    if getattr(_local, "recording", False):
+        return
+    _local.recording = True
+    try:
+        for instrumentation in _active:
+            instrumentation._record(kind, name, amount)
+    finally:
+        _local.recording = False
+
+
+def _size(value: Any) -> int:
+    """Sum of sys.getsizeof of the nodes and leaf values of a nested dictionary, or of a value."""
+    if isinstance(value, NestedDict):
+        value = value._tree
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(branch) for _, branch in _TRAVERSALS["_walk"](value, preorder=True))
+    return size
+
+
+def _entries(ndict: dict) -> int:
+    return sum(1 for _ in _TRAVERSALS["_walk"](ndict, preorder=True))
+
+
+def _counted_traversal(name: str, func: Callable) -> Callable:
+    if isgeneratorfunction(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            _emit("traversals", name, 1)
+            visits = 0
+            try:
+                for item in func(*args, **kwargs):
+                    visits += 1
+                    yield item
+            finally:
+                _emit("node_visits", name, visits)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            _emit("traversals", name, 1)
+            result = func(*args, **kwargs)
+            _emit("node_visits", name, result)
+            return result
+    return wrapper
+
+
+def _counted_copy(name: str, func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        _emit("traversals", name, 1)
+        _emit("node_visits", name, _entries(result))
+        _emit("bytes_copied", name, _size(result))
+        return result
+    return wrapper
+
+
+@wraps(deepcopy)
+def _counted_deepcopy(*args, **kwargs):
+    result = deepcopy(*args, **kwargs)
+    _emit("deepcopies", "deepcopy", 1)
+    _emit("bytes_copied", "deepcopy", _size(result))
+    return result
+
+
+def _counted_own(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(self, node):
+        result = func(self, node)
+        _emit("bytes_copied", "NestedDict._own", sys.getsizeof(result))
+        return result
+    return wrapper
+
+
+def _timed(name: str, func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _emit("time", name, perf_counter() - start)
+    return wrapper
+
+
+def _replace(owner: Any, name: str, value: Any) -> None:
+    _patches.append((owner, name, owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)))
+    setattr(owner, name, value)
+
+
+def _patch() -> None:
+    """Replace the helpers in every module of ndicts binding them, and the methods of the classes timed.
+    If replacing any fails, those replaced are restored."""
+    try:
+        _replace_all()
+    except BaseException:
+        _unpatch()
+        raise
+
+
+def _replace_all() -> None:
+    wrappers = {}
+    for name, func in _TRAVERSALS.items():
+        wrappers[id(func)] = _counted_traversal(name, func)
+    for name, func in _COPIES.items():
+        wrappers[id(func)] = _counted_copy(name, func)
+    wrappers[id(deepcopy)] = _counted_deepcopy
+    for module_name, module in list(sys.modules.items()):
+        if module is None or module_name == __name__ or not module_name.startswith("ndicts."):
+            continue
+        for name, value in list(vars(module).items()):
+            if id(value) in wrappers:
+                _replace(module, name, wrappers[id(value)])
+
+    for cls in _TIMED_CLASSES:
+        for name, attribute in list(vars(cls).items()):
+            dunder = name.startswith("__") and name.endswith("__") and name != "__init__"
+            if name.startswith("_") and not dunder and name not in _TIMED_PRIVATE:
+                continue
+            qualname = f"{cls.__qualname__}.{name}"
+            if isinstance(attribute, classmethod):
+                _replace(cls, name, classmethod(_timed(qualname, attribute.__func__)))
+            elif isfunction(attribute) and not iscoroutinefunction(attribute):
+                _replace(cls, name, _timed(qualname, attribute))
+    _replace(NestedDict, "_own", _counted_own(NestedDict.__dict__["_own"]))
+
+
+def _unpatch() -> None:
+    """Restore the attributes replaced, last replaced first, even if restoring one fails."""
+    errors = []
+    while _patches:
+        owner, name, value = _patches.pop()
+        try:
+            setattr(owner, name, value)
+        except Exception as error:
+            errors.append(error)
+    if errors:
+        raise errors[0]
@@ -0,0 +1,302 @@
+from collections.abc import Callable, ItemsView, MutableMapping, ValuesView
+from itertools import product
+from typing import Any, Generator, Iterable, List, Tuple, Type, Union
+
+from more_itertools import UnequalIterablesError
+
+from ndicts.nested_dict import _MISSING, NestedDict, _build_from_items, _walk
+
+
+class LazyProduct(MutableMapping):
+    """
+    Cartesian product of iterables, with the interface of a NestedDict.
+
+    Unlike NestedDict.from_product, the nested dictionaries are never built.
+    Items are computed from the iterables and the values when they are accessed.
+    Items set or deleted are stored in a small delta layer on top of the product.
+    Items set outside the product are iterated after the items of the product.
+
+    Args:
+        iterables: Input iterables, one per level.
+        values:
+            If values is callable, it is called with the key to get each value.
+            If values is an iterable but not a string,
+            its elements are the values in the order of the cartesian product.
+            Otherwise it is the value of every key.
+
+    Raises:
+        UnequalIterablesError: If the keys and values have different length.
+
+    See Also:
+        NestedDict.from_product: Build the nested dictionaries.
+
+    Examples:
+        >>> lp = LazyProduct([("A", "B"), range(1000), range(1000)], values=lambda key: key[1] * key[2])
+        >>> len(lp)
+        2000000
+        >>> lp["B", 3, 4]
+        12
+        >>> ("C", 0, 0) in lp
+        False
+
+        Set and delete items.
+
+        >>> lp = LazyProduct(["ab", "xy"], values=range(4))
+        >>> lp["a", "x"] = 10
+        >>> del lp["b", "y"]
+        >>> lp["c"] = 20
+        >>> lp.materialize()
+        NestedDict({'a': {'x': 10, 'y': 1}, 'b': {'x': 2}, 'c': 20})
+    """
+
+    def __init__(self, iterables: List[Iterable], values: Union[Any, Iterable, Callable] = None) -> None:
+        iterables = [list(iterable) for iterable in iterables]
+        # Repeated keys are listed once, their last occurrence gives the value as in from_product
+        self._levels = [dict.fromkeys(iterable) for iterable in iterables]
+        self._positions = [{k: i for i, k in enumerate(iterable)} for iterable in iterables]
+        self._strides = []
+        size = 1
+        for iterable in reversed(iterables):
+            self._strides.insert(0, size)
+            size *= len(iterable)
+
+        self._value = self._values = self._source = None
+        if isinstance(values, Callable):
+            self._source = values
+        elif isinstance(values, Iterable) and not isinstance(values, str):
+            self._values = values if isinstance(values, (list, tuple, range)) else list(values)
+            if len(self._values) != (size if all(iterables) else 0):
+                raise UnequalIterablesError
+        else:
+            self._value = values
+
+        self._overrides = {}
+        self._deleted = set()
+        self._extra = NestedDict()
+        self._length = self._count_under(())
+
+    def _count_under(self, key: Tuple) -> int:
+        """Number of leaves of the product below key, without the delta layer."""
+        count = 1
+        for level in self._levels[len(key):]:
+            count *= len(level)
+        return count if self._levels else 0
+
+    def _in_product(self, key: Tuple) -> bool:
+        """Check whether key is a key, or a prefix of keys, of the product."""
+        if len(key) > len(self._levels):
+            return False
+        try:
+            return all(k in level for k, level in zip(key, self._levels))
+        except TypeError:
+            return False
+
+    def _is_deleted(self, key: Tuple) -> bool:
+        return any(key[:depth] in self._deleted for depth in range(1, len(key) + 1))
+
+    def _product_value(self, key: Tuple) -> Any:
+        if self._source is not None:
+            return self._source(key)
+        if self._values is None:
+            return self._value
+        index = sum(positions[k] * stride for k, positions, stride in zip(key, self._positions, self._strides))
+        return self._values[index]
+
+    def _items(self, prefix: Tuple = ()) -> Generator:
+        """Yield the items whose key starts with prefix."""
+        if self._in_product(prefix):
+            depth = len(self._levels)
+            levels = [[k] for k in prefix] + self._levels[len(prefix):]
+            if not self._deleted and not self._overrides:
+                yield from ((key, self._product_value(key)) for key in product(*levels))
+            elif depth:
+                # Traverse level by level, skipping the subtrees deleted
+                stack = [((), iter(levels[0]))]
+                while stack:
+                    key, children = stack[-1]
+                    for k in children:
+                        child = key + (k,)
+                        if child in self._deleted:
+                            continue
+                        if len(child) < depth:
+                            stack.append((child, iter(levels[len(child)])))
+                            break
+                        value = self._overrides.get(child, _MISSING)
+                        yield child, self._product_value(child) if value is _MISSING else value
+                    else:
+                        stack.pop()
+        for key, value in self._extra.items():
+            if key[:len(prefix)] == prefix:
+                yield key, value
+
+    def __getitem__(self, key: Union[Any, Tuple]) -> Any:
+        """Get item associated to the key, see NestedDict.__getitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if self._in_product(key) and not self._is_deleted(key):
+            if len(key) == len(self._levels):
+                value = self._overrides.get(key, _MISSING)
+                return self._product_value(key) if value is _MISSING else value
+            subtree = _build_from_items((sub_key[len(key):], value) for sub_key, value in self._items(key))[0]
+            if subtree:
+                return subtree
+        return self._extra[key]
+
+    def __contains__(self, key: Union[Any, Tuple]) -> bool:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if self._in_product(key) and not self._is_deleted(key):
+            if len(key) == len(self._levels):
+                return True
+            return next(self._items(key), None) is not None
+        return key in self._extra
+
+    def __setitem__(self, key: Union[Any, Tuple], value: Any) -> None:
+        """Set the key to the given value, see NestedDict.__setitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        depth = len(self._levels)
+        if isinstance(value, (dict, NestedDict)):
+            if key in self:
+                del self[key]
+            items = value.items() if isinstance(value, NestedDict) else _walk(value)
+            for sub_key, leaf in list(items):
+                self[key + sub_key] = leaf
+            return
+
+        if self._in_product(key) and len(key) == depth:
+            if key in self._extra:
+                # A subtree set in place of the leaf of the product is replaced
+                length = len(self._extra)
+                del self._extra[key]
+                self._length -= length - len(self._extra)
+            if key in self._deleted:
+                self._deleted.remove(key)
+                self._length += 1
+            if not self._is_deleted(key):
+                self._overrides[key] = value
+                return
+        elif len(key) > depth and self._in_product(key[:depth]) and not self._is_deleted(key[:depth]):
+            raise TypeError(f"cannot set {key}, {key[:depth]} is a leaf")
+        elif self._in_product(key) and key in self:
+            # A subtree of the product is replaced by a leaf
+            del self[key]
+
+        length = len(self._extra)
+        self._extra[key] = value
+        self._length += len(self._extra) - length
+
+    def __delitem__(self, key: Union[Any, Tuple]) -> None:
+        """Delete the item corresponding to the key, see NestedDict.__delitem__."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        removed = 0
+        if key and self._in_product(key) and not self._is_deleted(key):
+            removed = self._count_under(key)
+            for deleted in [deleted for deleted in self._deleted if deleted[:len(key)] == key]:
+                removed -= self._count_under(deleted)
+                self._deleted.remove(deleted)
+            for overridden in [overridden for overridden in self._overrides if overridden[:len(key)] == key]:
+                del self._overrides[overridden]
+            self._deleted.add(key)
+        if key in self._extra:
+            length = len(self._extra)
+            del self._extra[key]
+            removed += length - len(self._extra)
+        if not removed:
+            raise KeyError(key)
+        self._length -= removed
+
+    def __iter__(self) -> Generator:
+        """Iterate over the keys of the leaf values."""
+        return (key for key, _ in self._items())
+
+    def __len__(self) -> int:
+        """Number of leaf values."""
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self._levels}, {len(self)} leaves)"
+
+    def values(self) -> ValuesView:
+        """Return a view of the leaf values."""
+        return _LazyValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Return a view of the (key, leaf value) pairs."""
+        return _LazyItemsView(self)
+
+    @property
+    def extract(self):
+        """Get item as a LazyProduct, see NestedDict.extract."""
+        return _LazyExtractor(self)
+
+    def rows(self) -> Generator:
+        """Yield the LazyProduct row by row, see NestedDict.rows."""
+        return ((*key, value) for key, value in self._items())
+
+    def materialize(self, cls: Type[NestedDict] = NestedDict) -> NestedDict:
+        """Build the nested dictionaries, return them as a NestedDict or as an instance of cls."""
+        nd = cls()
+        nd._tree, nd._length = _build_from_items(self._items())
+        return nd
+
+    def to_dict(self) -> dict:
+        """Return the items as a nested dictionary."""
+        return _build_from_items(self._items())[0]
+
+
+class _LazyValuesView(ValuesView):
+    """ValuesView yielding the values computed from the product"""
+
+    def __iter__(self):
+        return (value for _, value in self._mapping._items())
+
+
+class _LazyItemsView(ItemsView):
+    """ItemsView yielding the items computed from the product"""
+
+    def __iter__(self):
+        return self._mapping._items()
+
+
+class _LazyExtractor:
+    """Narrow the levels of the product to the keys extracted"""
+
+    def __init__(self, extractee):
+        self._extractee = extractee
+
+    def __getitem__(self, key):
+        if type(key) is not tuple:
+            key = (key,)
+        lazy = self._extractee
+        levels = list(lazy._levels)
+        if len(key) > len(levels):
+            levels = [{} for _ in levels]
+        for depth, k in enumerate(key[:len(levels)]):
+            if k != "":
+                levels[depth] = {k: None} if k in levels[depth] else {}
+
+        item = lazy.__class__.__new__(lazy.__class__)
+        item.__dict__.update(lazy.__dict__)
+        item._levels = levels
+        item._deleted = {
+            deleted for deleted in lazy._deleted
+            if all(k in level for k, level in zip(deleted, levels))
+        }
+        item._overrides = {
+            overridden: value for overridden, value in lazy._overrides.items()
+            if all(k in level for k, level in zip(overridden, levels))
+        }
+        try:
+            item._extra = lazy._extra.extract[key].copy()
+        except KeyError:
+            item._extra = NestedDict()
+        item._length = (
+            item._count_under(())
+            - sum(item._count_under(deleted) for deleted in item._deleted)
+            + len(item._extra)
+        )
+        if not item._length and "" not in key:
+            raise KeyError(key)
+        return item
@@ -1,14 +1,26 @@
-from collections.abc import MutableMapping
-from copy import deepcopy
-from itertools import product
+import asyncio
+import os
+from collections.abc import ItemsView, MutableMapping, Sized, ValuesView
+from copy import copy as shallow_copy, deepcopy
+from hashlib import blake2b
+from itertools import repeat
 
-from typing import Any, Generator, Iterable, List, Tuple, TypeVar, Union
+from typing import IO, Any, Callable, Generator, Iterable, List, Optional, Tuple, TypeVar, Union
 
-from more_itertools import zip_equal
+from more_itertools import UnequalIterablesError, chunked, zip_equal
+
+from ndicts.snapshot import Snapshot, write_snapshot
+from ndicts.streaming import iter_json, iter_ndjson, write_ndjson
 
 
 T = TypeVar('T', bound='Parent')
 
+_MISSING = object()
+_DIGEST_SIZE = 16
+_EMPTY_DIGEST = blake2b(b"", digest_size=_DIGEST_SIZE, person=b"node").digest()
+# Types of the keys and leaf values whose type and repr identify them, see _identified
+_IDENTIFIED_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
 
 class NestedDict(MutableMapping):
     """
@@ -19,7 +31,10 @@ class NestedDict(MutableMapping):
 
     Args:
         dictionary (dict): Input nested dictionary.
-        copy (bool): Set to True to copy the input dictionary.
+        copy (bool):
+            Set to True to copy the input dictionary.
+            Otherwise it is wrapped, and since it may be mutated from outside,
+            len counts the leaves on each call and the index is not used.
 
     See Also:
         NestedDict.from_product: Initialize from cartesian product.
@@ -113,14 +128,12 @@ class NestedDict(MutableMapping):
             ...
             more_itertools.recipes.UnequalIterablesError: Iterables have different lengths...
         """
-        nd = cls()
         if isinstance(values, Iterable) and not isinstance(values, str):
-            for key, value in zip_equal(tuples, values):
-                nd[key] = value
+            items = zip_equal(tuples, values)
         else:
-            for key in tuples:
-                nd[key] = values
-        return nd
+            items = ((key, values) for key in tuples)
+        tree, length = _build_from_items(items)
+        return cls._from_tree(tree, length, escaped=length is None)
 
     @classmethod
     def from_product(cls, iterables: List[Iterable], values: Union[Any, Iterable] = None) -> T:
@@ -142,6 +155,9 @@ class NestedDict(MutableMapping):
         Raises:
             UnequalIterablesError: If the keys and values have different length.
 
+        See Also:
+            LazyProduct: Cartesian product without building the nested dictionaries.
+
         Examples:
             >>> iterables = [("A", "B"), ("a", "b")]
             >>> NestedDict.from_product(iterables)
@@ -164,8 +180,130 @@ class NestedDict(MutableMapping):
             ...
             more_itertools.recipes.UnequalIterablesError: Iterables have different lengths
         """
-        keys = product(*iterables)
-        return cls.from_tuples(keys, values)
+        iterables = [list(iterable) for iterable in iterables]
+        tree, length = _build_from_product(iterables, values)
+        return cls._from_tree(tree, length, escaped=length is None)
+
+    @classmethod
+    def from_json(cls, fp: IO[str], prefix: Tuple = (), chunk_size: int = 65536) -> T:
+        """
+        Initialize a NestedDict from a JSON file, parsed incrementally.
+
+        Unlike wrapping the output of json.load, the whole document
+        is never held in memory, only the leaves kept.
+
+        Args:
+            fp: Text file containing a JSON object.
+            prefix:
+                Only the leaves whose key starts with prefix are kept,
+                other subtrees are skipped without being built.
+                As in NestedDict.extract, an empty string matches any key.
+            chunk_size: Number of characters read from fp at a time.
+
+        Returns:
+            NestedDict
+
+        See Also:
+            ndicts.streaming.iter_json: Yield the leaves of a JSON file.
+
+        Examples:
+            >>> from io import StringIO
+            >>> fp = StringIO('{"a": {"x": 0, "y": 1}, "b": {"x": 2}}')
+            >>> NestedDict.from_json(fp, prefix=("", "x"))
+            NestedDict({'a': {'x': 0}, 'b': {'x': 2}})
+        """
+        return cls._from_tree(*_build_from_items(iter_json(fp, prefix, chunk_size)))
+
+    @classmethod
+    def from_ndjson(cls, fp: Iterable[str], prefix: Tuple = ()) -> T:
+        """
+        Initialize a NestedDict from rows written by NestedDict.to_ndjson.
+
+        Args:
+            fp: Text file, or any iterable of lines.
+            prefix:
+                Only the leaves whose key starts with prefix are kept.
+                As in NestedDict.extract, an empty string matches any key.
+
+        Returns:
+            NestedDict
+
+        Examples:
+            >>> NestedDict.from_ndjson(['["a", 0, 1]', '["b", 2]'])
+            NestedDict({'a': {0: 1}, 'b': 2})
+        """
+        return cls._from_tree(*_build_from_items(iter_ndjson(fp, prefix)))
+
+    @classmethod
+    def open_snapshot(cls, path: Union[str, os.PathLike], cache_size: int = 4096) -> Snapshot:
+        """
+        Open a snapshot written by NestedDict.to_snapshot, without loading it.
+
+        The snapshot is mapped in memory, and its nodes are decoded when they are accessed.
+        Snapshot.materialize returns an instance of the class open_snapshot is called on.
+
+        Args:
+            path: Path of the snapshot file.
+            cache_size: Maximum number of decoded nodes kept.
+
+        Returns:
+            Read-only Snapshot
+
+        Examples:
+            >>> import os, tempfile
+            >>> path = os.path.join(tempfile.mkdtemp(), "nd.snapshot")
+            >>> NestedDict({"a": {"x": 0, "y": 1}, "b": 2}).to_snapshot(path)
+            >>> with NestedDict.open_snapshot(path) as snapshot:
+            ...     snapshot["a", "x"], snapshot["a"].materialize()
+            (0, NestedDict({'x': 0, 'y': 1}))
+        """
+        return Snapshot(path, cls, cache_size)
+
+    @classmethod
+    def from_columns(cls, columns: List[Iterable]) -> T:
+        """
+        Initialize a NestedDict from columns, as returned by NestedDict.to_columns.
+
+        Args:
+            columns:
+                One column of keys per level, followed by the column of values.
+                Keys padded with trailing None are shortened.
+
+        Returns:
+            NestedDict
+
+        Raises:
+            UnequalIterablesError: If the columns have different length.
+            ValueError: If there are values but no column of keys.
+
+        Examples:
+            >>> NestedDict.from_columns([["a", "a", "b"], ["x", "y", None], [0, 1, 2]])
+            NestedDict({'a': {'x': 0, 'y': 1}, 'b': 2})
+        """
+        columns = [column if isinstance(column, Sized) else list(column) for column in columns]
+        if len({len(column) for column in columns}) > 1:
+            raise UnequalIterablesError
+        *levels, values = columns or [[]]
+        if not levels:
+            if len(values):
+                raise ValueError("values without a column of keys")
+            return cls()
+        keys = zip(*levels)
+        if any(key is None for key in levels[-1]):
+            keys = map(_strip, keys)
+        tree, length = _build_from_items(zip(keys, values))
+        return cls._from_tree(tree, length, escaped=length is None)
+
+    @classmethod
+    def _from_tree(cls, tree: dict, length: Optional[int] = None, escaped: bool = False) -> T:
+        """Wrap a nested dictionary built by the NestedDict, with its number of leaves if known.
+        If escaped, subtrees of the caller may be in the nested dictionary, see NestedDict._escape."""
+        nd = cls()
+        nd._tree = tree
+        nd._length = length
+        if escaped:
+            nd._escape((), tree)
+        return nd
 
     def __init__(self, dictionary: dict = None, copy: bool = False) -> None:
         """
@@ -173,9 +311,136 @@ class NestedDict(MutableMapping):
         
         See class docstring.
         """
+        self._indexed = False
+        self._index = None
+        self._shared = {}
+        # Incremented whenever nodes may be added, removed, replaced or shared
+        self._version = 0
+        # Incremented whenever a subtree starts being referenced from outside
+        self._escape_count = 0
+        self._digests = None
+        # Subtrees referenced from outside, by key, which may be mutated without the NestedDict knowing
+        self._escaped = {}
         if dictionary is None:
-            dictionary = {}
-        self._ndict = deepcopy(dictionary) if copy else dictionary
+            self._tree = {}
+            self._length = 0
+        else:
+            self._tree = deepcopy(dictionary) if copy else dictionary
+            self._length = None
+            if not copy:
+                self._escaped[()] = self._tree
+
+    @property
+    def _ndict(self) -> dict:
+        """
+        The wrapped nested dictionary.
+
+        Accessing it from outside hands out a reference that can be mutated
+        without the NestedDict knowing, see NestedDict._escape.
+        """
+        return self._hand_out()
+
+    @_ndict.setter
+    def _ndict(self, dictionary: dict) -> None:
+        self._replace_tree(dictionary)
+        self._escape((), dictionary)
+
+    def _replace_tree(self, tree: dict, length: Optional[int] = None) -> None:
+        """Replace the wrapped nested dictionary, and drop the caches of the previous one."""
+        self._tree = tree
+        self._length = length
+        self._shared = {}
+        self._escaped = {}
+        self._index = None
+        self._version += 1
+        if self._digests:
+            self._digests.clear()
+
+    def _escape(self, key: Tuple, subtree: dict) -> None:
+        """Record that the subtree at key is referenced from outside.
+
+        It may be mutated without the NestedDict knowing, from now on,
+        so the caches that cannot be kept up to date are dropped and no longer trusted:
+        the leaves are counted again by each call to len, the index is not looked up inside the subtree,
+        which is traversed instead, and the digests are computed again.
+        No node changes, so the version is kept, and handing out the same subtree again costs nothing.
+        """
+        if self._escaped.get(key) is subtree:
+            return
+        self._escaped[key] = subtree
+        self._escape_count += 1
+        self._length = None
+        if self._digests:
+            # The nodes below are dropped when the subtree is replaced or deleted
+            self._drop_digests(key)
+
+    def _live_escapes(self) -> dict:
+        """Return the subtrees referenced from outside, by key, that are still in the nested dictionary.
+        The others are forgotten, since mutating them cannot affect the NestedDict anymore."""
+        escaped = self._escaped
+        for key in [key for key, subtree in escaped.items() if _get(self._tree, key, None) is not subtree]:
+            del escaped[key]
+        return escaped
+
+    def _escapes(self, key: Tuple) -> bool:
+        """Check whether the item at key is, or contains, a subtree referenced from outside."""
+        return any(escaped[:len(key)] == key or key[:len(escaped)] == escaped for escaped in self._escaped)
+
+    def _hand_out(self, key: Tuple = ()) -> dict:
+        """Prepare the subtree at key to be handed out and return it.
+        The nodes shared with copy-on-write copies are copied, since it may be mutated."""
+        if not self._shared:
+            subtree = _get(self._tree, key)
+            self._escape(key, subtree)
+            return subtree
+        subtree = self._own_path(key)[-1]
+        stack = [subtree]
+        while stack:
+            node = stack.pop()
+            for k, child in node.items():
+                if not isinstance(child, dict):
+                    continue
+                if id(child) in self._shared:
+                    del self._shared[id(child)]
+                    node[k] = _map_values(child, _identity)
+                else:
+                    stack.append(child)
+        self._escape(key, subtree)
+        return subtree
+
+    def _share(self, nodes: Iterable[dict]) -> None:
+        """Mark nodes as shared with another NestedDict."""
+        self._version += 1
+        for node in nodes:
+            self._shared[id(node)] = node
+
+    def _own(self, node: dict) -> dict:
+        """Return a copy of a shared node, whose subtrees become shared in turn.
+        Subtrees referenced from outside are never shared, see NestedDict.copy."""
+        self._version += 1
+        del self._shared[id(node)]
+        if self._digests:
+            self._digests.pop(id(node), None)
+        node = dict(node)
+        escaped = {id(subtree) for subtree in self._escaped.values()}
+        self._share(child for child in node.values() if isinstance(child, dict) and id(child) not in escaped)
+        return node
+
+    def _own_path(self, key: Tuple) -> List[dict]:
+        """Copy the shared nodes on the path to key and return the nodes on the path.
+        Missing levels are created."""
+        shared = self._shared
+        node = self._tree
+        if id(node) in shared:
+            node = self._tree = self._own(node)
+        nodes = [node]
+        for k in key:
+            child = node.setdefault(k, {})
+            if id(child) in shared:
+                child = node[k] = self._own(child)
+            node = child
+            nodes.append(node)
+        return nodes
 
     def __getitem__(self, key: Union[Any, Tuple]) -> Any:
         """
@@ -218,7 +483,7 @@ class NestedDict(MutableMapping):
         """
         if not isinstance(key, tuple):
             key = (key,)
-        item = self._ndict
+        item = self._tree
 
         for k in key:
             try:
@@ -227,8 +492,24 @@ class NestedDict(MutableMapping):
                 raise KeyError(key)
             except TypeError:
                 raise KeyError(key)
+        if isinstance(item, dict):
+            # A subtree escapes and may be mutated behind our back
+            if self._shared:
+                return self._hand_out(key)
+            self._escape(key, item)
         return item
 
+    def __contains__(self, key: Union[Any, Tuple]) -> bool:
+        if not isinstance(key, tuple):
+            key = (key,)
+        item = self._tree
+        for k in key:
+            try:
+                item = item[k]
+            except (KeyError, TypeError):
+                return False
+        return True
+
     def __setitem__(self, key: Union[Any, Tuple], value: Any) -> None:
         """
         Set the key to the given value.
@@ -254,10 +535,35 @@ class NestedDict(MutableMapping):
         """
         if not isinstance(key, tuple):
             key = (key,)
-        item = self._ndict
-        for k in key[:-1]:
-            item = item.setdefault(k, {})
+        if self._index is not None:
+            self._update_index(key)
+        try:
+            if self._shared:
+                item = self._own_path(key[:-1])[-1]
+            else:
+                item = self._tree
+                for k in key[:-1]:
+                    item = item.setdefault(k, {})
+        except AttributeError:
+            item = None
+        if not isinstance(item, dict):
+            raise TypeError(f"cannot set {key}, one of its prefixes holds a leaf value")
+
+        # The caches are only updated once the value is set
+        old_value = item.get(key[-1], _MISSING)
         item[key[-1]] = value
+        if isinstance(value, dict):
+            # The caller keeps a reference to the new subtree
+            self._version += 1
+            self._escape(key, value)
+            if self._index is not None:
+                _index_subtree(self._index, key, value)
+        elif old_value is _MISSING or isinstance(old_value, dict):
+            self._version += 1
+            if self._length is not None:
+                self._length += 1 - (_count_leaves(old_value) if old_value is not _MISSING else 0)
+        if self._digests:
+            self._drop_digests(key, old_value)
 
     def __delitem__(self, key: Union[Any, Tuple]) -> None:
         """
@@ -283,11 +589,56 @@ class NestedDict(MutableMapping):
         """
         if not isinstance(key, tuple):
             key = (key,)
-        new_key, last_key = key[:-1], key[-1]
-        del self[new_key][last_key]
-
-        if (new_key != ()) & (self[new_key] == {}):
-            self.__delitem__(new_key)
+        nodes = [self._tree]
+        for k in key[:-1]:
+            try:
+                nodes.append(nodes[-1][k])
+            except (KeyError, TypeError):
+                raise KeyError(key)
+        if self._shared:
+            nodes = self._own_path(key[:-1])
+        try:
+            value = nodes[-1].pop(key[-1])
+        except (KeyError, TypeError, AttributeError):
+            raise KeyError(key)
+        self._version += 1
+        if self._digests:
+            self._drop_digests(key, value)
+
+        if self._length is not None:
+            self._length -= _count_leaves(value) if isinstance(value, dict) else 1
+        index = self._index
+        if index is not None:
+            _index_discard(index, key)
+            if isinstance(value, dict):
+                for sub_key, _ in _walk(value, preorder=True):
+                    _index_discard(index, key + sub_key)
+
+        # Prune the levels left empty, deepest first
+        for depth in range(len(key) - 1, 0, -1):
+            if nodes[depth]:
+                break
+            del nodes[depth - 1][key[depth - 1]]
+            if index is not None:
+                _index_discard(index, key[:depth])
+
+    def _update_index(self, key: Tuple) -> None:
+        """Update the index before the key is set to a leaf value."""
+        index = self._index
+        item = self._tree
+        for depth, k in enumerate(key):
+            if not isinstance(item, dict):
+                # Setting the key is going to fail
+                return
+            if k not in item:
+                for new_depth in range(depth + 1, len(key) + 1):
+                    _index_add(index, key[:new_depth])
+                return
+            item = item[k]
+        if isinstance(item, dict):
+            # A subtree is replaced by a leaf
+            for sub_key, _ in _walk(item, preorder=True):
+                _index_discard(index, key + sub_key)
 
     def __iter__(self) -> Generator:
         """
@@ -320,35 +671,59 @@ class NestedDict(MutableMapping):
             >>> [item for item in nd.items()]
             [(('a', 'aa'), 0), (('a', 'ab'), 1), (('b',), 2)]
         """
-        def wrapped(ndict, key=[]):
-            """Traverse the nested dictionary recursively,
-            yield the key once a leaf value is reached."""
-            if not isinstance(ndict, dict):
-                yield tuple(key)
-            else:
-                for node, branch in ndict.items():
-                    key.append(node)
-                    yield from wrapped(branch, key)
-                    key.pop()
-
-        return wrapped(self._ndict)
+        return (key for key, _ in _walk(self._tree))
 
     def __len__(self) -> int:
         """
         Number of leaf values.
 
+        The count is cached and kept up to date by the methods of NestedDict,
+        so that len() runs in constant time.
+        Once a reference to the wrapped dictionary or to one of its subtrees
+        is held outside, as the dictionary passed to NestedDict or a subtree got,
+        it may be mutated without the NestedDict knowing, and each call counts the leaves again.
+
         Examples:
             >>> nd = NestedDict({"a": {"aa": 0, "ab": 0}, "b": 0})
             >>> len(nd)
             3
         """
-        length = 0
-        for _ in self:
-            length += 1
-        return length
+        if self._length is None:
+            if self._live_escapes():
+                return _count_leaves(self._tree)
+            self._length = _count_leaves(self._tree)
+        return self._length
 
     def __repr__(self) -> str:
-        return f"{self.__class__.__qualname__}({self._ndict})"
+        return f"{self.__class__.__qualname__}({self._tree})"
+
+    def values(self) -> ValuesView:
+        """
+        Return a view of the leaf values.
+
+        Values are yielded while traversing the NestedDict,
+        without looking up each key from the root.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"aa": 0}, "b": 1})
+            >>> list(nd.values())
+            [0, 1]
+        """
+        return _NestedValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Return a view of the (key, leaf value) pairs.
+
+        Items are yielded while traversing the NestedDict,
+        without looking up each key from the root.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"aa": 0}, "b": 1})
+            >>> list(nd.items())
+            [(('a', 'aa'), 0), (('b',), 1)]
+        """
+        return _NestedItemsView(self)
 
     @property
     def extract(self):
@@ -381,7 +756,8 @@ class NestedDict(MutableMapping):
 
         Notes:
             This method can be useful to export
-            a NestedDict to a pandas DataFrame.
+            a NestedDict to a pandas DataFrame,
+            though NestedDict.to_columns is faster.
 
         Yields:
             A row of the NestedDict.
@@ -391,15 +767,1122 @@ class NestedDict(MutableMapping):
             >>> [row for row in nd.rows()]
             [('a', 0), ('b', 'ba', 1), ('c', 2)]
         """
-        return ((*key, value) for key, value in self.items())
+        return ((*key, value) for key, value in _walk(self._tree))
+
+    def to_columns(self) -> List[list]:
+        """
+        Return the NestedDict column by column.
+
+        There is a column of keys for each level, followed by the column of values.
+        Keys shorter than the deepest ones are padded with None.
+        The columns are built in a single traversal,
+        each key is added once for all the leaves below it.
+
+        Notes:
+            This method is faster than rows
+            to export a NestedDict to a pandas DataFrame.
+
+        Returns:
+            List of columns.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+            >>> nd.to_columns()
+            [['a', 'a', 'b'], ['x', 'y', None], [0, 1, 2]]
+        """
+        levels, values, _ = _columns(self._tree)
+        return [*levels, values]
+
+    def walk(self, max_depth: int = None, preorder: bool = False) -> Generator:
+        """
+        Traverse the NestedDict, yielding keys and values.
+
+        The traversal uses an explicit stack rather than recursion,
+        so that arbitrarily deep NestedDicts can be traversed.
+
+        Args:
+            max_depth:
+                Do not descend below this depth.
+                Subtrees found at max_depth are yielded as values.
+            preorder:
+                Also yield each subtree before its children.
+
+        Yields:
+            Tuples (key, value).
+
+        Examples:
+            >>> nd = NestedDict({"a": {"aa": 0, "ab": {"aba": 1}}, "b": 2})
+            >>> list(nd.walk())
+            [(('a', 'aa'), 0), (('a', 'ab', 'aba'), 1), (('b',), 2)]
 
-    def copy(self) -> T:
-        """Return a deep copy."""
-        return deepcopy(self)
+            Limit the depth of the traversal.
+
+            >>> list(nd.walk(max_depth=1))
+            [(('a',), {'aa': 0, 'ab': {'aba': 1}}), (('b',), 2)]
+
+            Yield the subtrees too.
+
+            >>> [key for key, _ in nd.walk(preorder=True)]
+            [('a',), ('a', 'aa'), ('a', 'ab'), ('a', 'ab', 'aba'), ('b',)]
+        """
+        if max_depth is not None or preorder:
+            # Subtrees are handed out
+            self._hand_out()
+        return _walk(self._tree, max_depth, preorder)
+
+    def accessor(self, *keys: Union[Any, Tuple]) -> "NestedDictAccessor":
+        """
+        Return a getter and setter for fixed keys.
+
+        The node holding each key is found once and cached,
+        so getting and setting leaf values skips walking from the root.
+        The cache is refreshed when nodes are added, removed or replaced.
+        With several keys, values are got and set all at once,
+        as with operator.itemgetter.
+
+        Args:
+            keys: One or more keys as defined in NestedDict.__getitem__.
+
+        Returns:
+            NestedDictAccessor
+
+        Examples:
+            >>> nd = NestedDict({"a": {"b": {"c": 0}}, "x": 1})
+            >>> abc = nd.accessor(("a", "b", "c"))
+            >>> abc.get()
+            0
+            >>> abc.set(2)
+            >>> nd
+            NestedDict({'a': {'b': {'c': 2}}, 'x': 1})
+
+            Get several values at once.
+
+            >>> nd.accessor(("a", "b", "c"), "x", "y").get(default=None)
+            (2, 1, None)
+        """
+        return NestedDictAccessor(self, keys)
+
+    def get_many(self, keys: Iterable, default: Any = _MISSING) -> list:
+        """
+        Get the values of many keys at once.
+
+        The keys are looked up in a single loop,
+        without the overhead of calling NestedDict.__getitem__ for each of them.
+
+        Args:
+            keys: Keys as defined in NestedDict.__getitem__.
+            default: Value of the keys missing. If not passed, KeyError is raised.
+
+        Returns:
+            List of the values, in the order of the keys.
+
+        Raises:
+            KeyError: If a key does not belong to the NestedDict and no default is passed.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+            >>> nd.get_many([("a", "y"), "b", ("a", "z")], default=None)
+            [1, 2, None]
+        """
+        tree = self._tree
+        values = []
+        for key in keys:
+            if not isinstance(key, tuple):
+                key = (key,)
+            node = tree
+            try:
+                for k in key:
+                    node = node[k]
+            except (KeyError, TypeError):
+                if default is _MISSING:
+                    raise KeyError(key) from None
+                node = default
+            else:
+                if isinstance(node, dict):
+                    # The subtree escapes, as in NestedDict.__getitem__
+                    node = self[key]
+            values.append(node)
+        return values
+
+    def set_many(self, keys: Iterable, values: Union[Any, Iterable] = None) -> None:
+        """
+        Set many keys at once.
+
+        The nodes on the path shared with the previous key are not walked again,
+        so that keys grouped by prefix, as when iterating over a NestedDict,
+        visit each node once.
+
+        Args:
+            keys: Keys as defined in NestedDict.__setitem__.
+            values:
+                If values is an iterable but not a string,
+                its elements are set to the keys in order.
+                Otherwise it is set to every key.
+
+        Raises:
+            UnequalIterablesError: If the keys and values have different length.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0}})
+            >>> nd.set_many([("a", "x"), ("a", "y"), "b"], values=[1, 2, 3])
+            >>> nd
+            NestedDict({'a': {'x': 1, 'y': 2}, 'b': 3})
+        """
+        if isinstance(values, Iterable) and not isinstance(values, str):
+            items = zip_equal(keys, values)
+        else:
+            items = ((key, values) for key in keys)
+        path = ()
+        nodes = [self._tree]
+        if self._shared:
+            nodes = self._own_path(())
+        for key, value in items:
+            if not isinstance(key, tuple):
+                key = (key,)
+            if self._index is not None:
+                self._update_index(key)
+            parent = key[:-1]
+            if parent != path:
+                try:
+                    if self._shared:
+                        nodes = self._own_path(parent)
+                    else:
+                        depth = 0
+                        for k, previous in zip(parent, path):
+                            if k != previous:
+                                break
+                            depth += 1
+                        del nodes[depth + 1:]
+                        node = nodes[-1]
+                        for k in parent[depth:]:
+                            node = node.setdefault(k, {})
+                            nodes.append(node)
+                except AttributeError:
+                    nodes = [None]
+                path = parent
+
+            node = nodes[-1]
+            if not isinstance(node, dict):
+                raise TypeError(f"cannot set {key}, one of its prefixes holds a leaf value")
+            old_value = node.get(key[-1], _MISSING)
+            node[key[-1]] = value
+            if isinstance(value, dict):
+                # The caller keeps a reference to the new subtree
+                self._version += 1
+                self._escape(key, value)
+                if self._index is not None:
+                    _index_subtree(self._index, key, value)
+            elif old_value is _MISSING or isinstance(old_value, dict):
+                self._version += 1
+                if self._length is not None:
+                    self._length += 1 - (_count_leaves(old_value) if old_value is not _MISSING else 0)
+            if self._digests:
+                self._drop_digests(key, old_value)
+
+    def delete_many(self, keys: Iterable) -> None:
+        """
+        Delete many keys at once.
+
+        As in NestedDict.set_many, the nodes on the path shared with the previous key
+        are not walked again. The levels left empty are deleted once,
+        after all keys are deleted, rather than after each key.
+
+        Args:
+            keys: Keys as defined in NestedDict.__delitem__.
+
+        Raises:
+            KeyError: If a key does not belong to the NestedDict, the keys before it are deleted.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": {"z": 2}})
+            >>> nd.delete_many([("a", "x"), ("b", "z")])
+            >>> nd
+            NestedDict({'a': {'y': 1}})
+        """
+        index = self._index
+        path = None
+        nodes = None
+        parents = {}
+        try:
+            for key in keys:
+                if not isinstance(key, tuple):
+                    key = (key,)
+                parent = key[:-1]
+                if parent != path:
+                    depth = 0
+                    if path is not None:
+                        for k, previous in zip(parent, path):
+                            if k != previous:
+                                break
+                            depth += 1
+                        del nodes[depth + 1:]
+                    else:
+                        nodes = [self._tree]
+                    for k in parent[depth:]:
+                        try:
+                            nodes.append(nodes[-1][k])
+                        except (KeyError, TypeError):
+                            raise KeyError(key)
+                    if self._shared:
+                        nodes = self._own_path(parent)
+                    path = parent
+                    parents[parent] = list(nodes)
+                try:
+                    value = nodes[-1].pop(key[-1])
+                except (KeyError, TypeError, AttributeError):
+                    raise KeyError(key)
+                self._version += 1
+                if self._digests:
+                    self._drop_digests(key, value)
+
+                if self._length is not None:
+                    self._length -= _count_leaves(value) if isinstance(value, dict) else 1
+                if index is not None:
+                    _index_discard(index, key)
+                    if isinstance(value, dict):
+                        for sub_key, _ in _walk(value, preorder=True):
+                            _index_discard(index, key + sub_key)
+        finally:
+            # Prune the levels left empty, deepest first, if they are still in the tree
+            for parent in sorted(parents, key=len, reverse=True):
+                nodes = parents[parent]
+                for depth in range(len(parent), 0, -1):
+                    if nodes[depth] or nodes[depth - 1].get(parent[depth - 1]) is not nodes[depth]:
+                        break
+                    del nodes[depth - 1][parent[depth - 1]]
+                    if index is not None:
+                        _index_discard(index, parent[:depth])
+
+    def merge(self, other: Union["NestedDict", dict], strategy: Union[str, Callable] = "overwrite") -> None:
+        """
+        Merge another NestedDict into this one, in place.
+
+        Unlike NestedDict.update, both nested dictionaries are traversed together once,
+        rather than setting each leaf of other from the root.
+        Subtrees of other missing from self are grafted whole:
+        subtrees of a NestedDict are shared copy-on-write, see NestedDict.copy,
+        while subtrees of a dictionary are grafted by reference, as by NestedDict.__setitem__.
+
+        Args:
+            other: NestedDict or nested dictionary to merge.
+            strategy:
+                How to resolve a key found in both, holding a leaf value in at least one.
+                "overwrite" takes the value of other, "keep" keeps the value of self
+                and "raise" raises ValueError unless the values are equal.
+                A callable is called with the value of self and the value of other,
+                and returns the merged value.
+
+        Raises:
+            ValueError:
+                If the strategy is "raise" and a key conflicts,
+                the keys traversed before it are merged.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+            >>> nd.merge(NestedDict({"a": {"y": 3, "z": 4}, "c": {"x": 5}}))
+            >>> nd
+            NestedDict({'a': {'x': 0, 'y': 3, 'z': 4}, 'b': 2, 'c': {'x': 5}})
+
+            Combine the values of the keys in both.
+
+            >>> nd.merge({"a": {"x": 10}, "b": 20}, strategy=lambda value, other_value: value + other_value)
+            >>> nd
+            NestedDict({'a': {'x': 10, 'y': 3, 'z': 4}, 'b': 22, 'c': {'x': 5}})
+        """
+        combine = None
+        if callable(strategy):
+            combine = strategy
+        elif strategy not in ("overwrite", "keep", "raise"):
+            raise ValueError(f"unknown merge strategy {strategy!r}")
+        share = isinstance(other, NestedDict)
+        other_tree = other._tree if share else other
+        if not other_tree or (other_tree is self._tree and combine is None):
+            return
+
+        shared = self._shared
+        if id(self._tree) in shared:
+            self._tree = self._own(self._tree)
+        stack = [((), self._tree, iter(other_tree.items()))]
+        try:
+            while stack:
+                prefix, node, branches = stack[-1]
+                for k, other_value in branches:
+                    value = node.get(k, _MISSING)
+                    if value is _MISSING:
+                        new_value = other_value
+                    elif isinstance(value, dict) and isinstance(other_value, dict):
+                        if value is other_value and combine is None:
+                            # Shared subtree, nothing to merge
+                            continue
+                        if id(value) in shared:
+                            value = node[k] = self._own(value)
+                        stack.append((prefix + (k,), value, iter(other_value.items())))
+                        break
+                    elif combine is not None:
+                        # A subtree of self is passed as a copy, it may be shared
+                        new_value = combine(
+                            _map_values(value, _identity) if isinstance(value, dict) else value, other_value)
+                    elif strategy == "keep":
+                        continue
+                    elif strategy == "raise":
+                        if value is other_value or (
+                                not isinstance(value, dict) and not isinstance(other_value, dict)
+                                and value == other_value):
+                            continue
+                        raise ValueError(f"conflicting values for key {prefix + (k,)}")
+                    else:
+                        new_value = other_value
+
+                    key = prefix + (k,)
+                    copied = share and isinstance(new_value, dict) and new_value is other_value and other._escapes(key)
+                    if copied:
+                        # The subtree may be mutated from outside, it is copied rather than shared
+                        new_value = _map_values(other_value, _identity)
+                    if self._index is not None and (value is _MISSING or isinstance(value, dict)):
+                        self._update_index(key)
+                    # The caches are only updated once the value is set
+                    node[k] = new_value
+                    if self._digests:
+                        self._drop_digests(key, value)
+                    if isinstance(new_value, dict):
+                        if copied:
+                            self._length = None
+                        elif share and new_value is other_value:
+                            self._share([new_value])
+                            other._share([new_value])
+                            if self._digests is not None and other._digests:
+                                digest = other._digests.get(id(new_value))
+                                if digest is not None:
+                                    self._digests[id(new_value)] = digest
+                            self._length = None
+                        else:
+                            # The caller keeps a reference to the subtree grafted
+                            self._escape(key, new_value)
+                        if self._index is not None:
+                            _index_subtree(self._index, key, new_value)
+                    elif value is _MISSING or isinstance(value, dict):
+                        self._version += 1
+                        if self._length is not None:
+                            self._length += 1 - (_count_leaves(value) if value is not _MISSING else 0)
+                else:
+                    stack.pop()
+        finally:
+            self._version += 1
+
+    async def apply_async(
+        self,
+        coro_func: Callable,
+        concurrency: int = 8,
+        inplace: bool = False,
+        batch_size: int = None,
+        return_exceptions: bool = False,
+    ) -> Optional[T]:
+        """
+        Apply a coroutine function to all leaf values, with bounded concurrency.
+
+        At most concurrency calls are awaited at the same time.
+        Each result is set as soon as its call returns,
+        into a new NestedDict of the same class, or into self if inplace is True.
+
+        Args:
+            coro_func: Coroutine function called with each leaf value.
+            concurrency: Maximum number of calls awaited at the same time.
+            inplace: Set to True to replace the values of self.
+            batch_size:
+                If given, coro_func is called with lists of up to batch_size leaf values
+                and must return the list of their results.
+            return_exceptions:
+                If False, the first exception raised by a call is raised, after cancelling the other calls.
+                The values already set are kept.
+                If True, the exception raised by a call is set as the value of its keys,
+                so that the failures can be found once the calls are done.
+
+        Returns:
+            The new NestedDict, or None if inplace is True.
+
+        Raises:
+            ValueError: If concurrency is smaller than 1.
+            UnequalIterablesError: If a batch of results has a different length than its values.
+
+        Examples:
+            >>> import asyncio
+            >>> async def lookup(value):
+            ...     await asyncio.sleep(0)
+            ...     return {0: "zero", 1: "one"}[value]
+            >>> nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+            >>> result = asyncio.run(nd.apply_async(lookup, concurrency=2, return_exceptions=True))
+            >>> result
+            NestedDict({'a': {'x': 'zero', 'y': 'one'}, 'b': KeyError(2)})
+            >>> [key for key, value in result.items() if isinstance(value, Exception)]
+            [('b',)]
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        result = self if inplace else self._from_tree(_map_values(self._tree, _identity), self._length)
+        items = _walk(self._tree)
+        batches = ([item] for item in items) if batch_size is None else chunked(items, batch_size)
+
+        async def worker():
+            # The batches are shared by the workers, each one takes the next when it is free
+            for batch in batches:
+                try:
+                    if batch_size is None:
+                        outputs = [await coro_func(batch[0][1])]
+                    else:
+                        outputs = list(await coro_func([value for _, value in batch]))
+                        if len(outputs) != len(batch):
+                            raise UnequalIterablesError
+                except Exception as error:
+                    if not return_exceptions:
+                        raise
+                    outputs = [error] * len(batch)
+                for (key, _), output in zip(batch, outputs):
+                    result[key] = output
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return None if inplace else result
+
+    def build_index(self) -> None:
+        """
+        Index the keys of the NestedDict level by level.
+
+        The index maps each key on each level to the subtrees containing it,
+        and it is kept up to date when items are set or deleted.
+        Extracting with wildcards then looks up the index
+        instead of traversing the whole NestedDict.
+
+        Note:
+            Extracted items may come in a different order with the index.
+            Subtrees referenced from outside, such as a subtree got from the NestedDict,
+            may be mutated without it knowing, so they are traversed instead of looked up.
+            In particular, the index is not used while the NestedDict wraps a dictionary passed without copy,
+            pass copy=True or build it with one of the from_ class methods to use the index.
+
+        See Also:
+            NestedDict.drop_index: Remove the index.
+
+        Examples:
+            >>> nd = NestedDict.from_product(["ab", "xy", "uv"], values=0)
+            >>> nd.build_index()
+            >>> nd.extract["", "", "u"]
+            NestedDict({'a': {'x': {'u': 0}, 'y': {'u': 0}}, 'b': {'x': {'u': 0}, 'y': {'u': 0}}})
+        """
+        self._indexed = True
+        self._index = _build_index(self._tree)
+
+    def drop_index(self) -> None:
+        """Remove the index built by NestedDict.build_index."""
+        self._indexed = False
+        self._index = None
+
+    def _match(self, pattern: Tuple) -> Generator:
+        """Yield the keys and values at the depth of the pattern that match it.
+        An empty string in the pattern matches any key on that level."""
+        levels = [(depth, k) for depth, k in enumerate(pattern) if k != ""]
+        if not self._indexed or not levels:
+            return _walk_pattern(self._tree, pattern)
+        escaped = self._live_escapes()
+        if () in escaped:
+            return _walk_pattern(self._tree, pattern)
+        if self._index is None:
+            self._index = _build_index(self._tree)
+        # The index is not up to date inside the subtrees referenced from outside, they are traversed
+        escaped = [
+            key for key in escaped
+            if len(key) < len(pattern) and not any(key[:len(other)] == other for other in escaped if other != key)
+        ]
+
+        def wrapped(index):
+            postings = [index.get(level, {}) for level in levels]
+            depth, k = levels[min(range(len(levels)), key=lambda i: len(postings[i]))]
+            for prefix in list(index.get((depth, k), ())):
+                if any(prefix[d] != c for d, c in levels if d < depth):
+                    continue
+                if any(len(prefix) > len(key) and prefix[:len(key)] == key for key in escaped):
+                    continue
+                try:
+                    branch = _get(self._tree, prefix)
+                except KeyError:
+                    # Left by a subtree mutated from outside, then removed
+                    continue
+                for key, value in _walk_pattern(branch, pattern[depth + 1:]):
+                    yield prefix + key, value
+            for prefix in escaped:
+                if all(c == "" or c == k for c, k in zip(pattern, prefix)):
+                    for key, value in _walk_pattern(_get(self._tree, prefix), pattern[len(prefix):]):
+                        yield prefix + key, value
+
+        return wrapped(self._index)
+
+    def digest(self) -> bytes:
+        """
+        Digest of the NestedDict, computed from the digests of its subtrees.
+
+        Once this method is called, the digest of each subtree is cached,
+        and only the digests of the subtrees above the keys changed are computed again.
+        Leaf values and keys are digested from their type and repr.
+        NestedDict.diff and equality skip the subtrees with equal digests,
+        in time proportional to the changes, if their keys and leaves are None, booleans,
+        numbers other than NaN, strings, bytes or tuples of them, whose type and repr identify them.
+        Subtrees holding other values are always compared.
+        While a subtree is referenced from outside, see NestedDict.__len__,
+        digests are computed again on each call and never used to skip comparisons.
+
+        Returns:
+            Digest as bytes.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"x": 0}, "b": 1})
+            >>> nd.digest() == NestedDict({"b": 1, "a": {"x": 0}}).digest()
+            True
+            >>> nd["a", "x"] = 2
+            >>> nd.digest() == NestedDict({"b": 1, "a": {"x": 0}}).digest()
+            False
+        """
+        if self._digests is None:
+            self._digests = {}
+        if self._live_escapes():
+            return _digest(self._tree, {})
+        return _digest(self._tree, self._digests)
+
+    def _drop_digests(self, key: Tuple, old_value: Any = None) -> None:
+        """Drop the digests of the nodes above key, and of the old subtree at key."""
+        digests = self._digests
+        node = self._tree
+        digests.pop(id(node), None)
+        for k in key[:-1]:
+            node = node.get(k) if isinstance(node, dict) else None
+            if not isinstance(node, dict):
+                break
+            digests.pop(id(node), None)
+        if isinstance(old_value, dict):
+            digests.pop(id(old_value), None)
+            for _, branch in _walk(old_value, preorder=True):
+                if isinstance(branch, dict):
+                    digests.pop(id(branch), None)
+
+    def diff(self, other: "NestedDict") -> Generator:
+        """
+        Yield the leaf keys added, removed and changed from self to other.
+
+        Both NestedDicts are traversed together. Subtrees shared by the two,
+        or with equal digests if NestedDict.digest was called on both, are skipped.
+
+        Args:
+            other: NestedDict, or nested dictionary, to compare with.
+
+        Yields:
+            Pairs of "added", "removed" or "changed", and a leaf key.
+
+        Examples:
+            >>> old = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+            >>> new = NestedDict({"a": {"x": 0, "y": 10}, "c": 3})
+            >>> list(old.diff(new))
+            [('changed', ('a', 'y')), ('removed', ('b',)), ('added', ('c',))]
+        """
+        left_digests = right_digests = None
+        if isinstance(other, NestedDict):
+            # Digests are only trusted while no subtree may be mutated from outside
+            if (self._digests is not None and other._digests is not None
+                    and not self._live_escapes() and not other._live_escapes()):
+                self.digest()
+                other.digest()
+                left_digests, right_digests = self._digests, other._digests
+            other = other._tree
+        return _diff(self._tree, other, left_digests, right_digests)
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Compare the leaves of the NestedDicts, see NestedDict.diff.
+
+        Subtrees shared by the two, or with equal digests, are not compared again.
+        Empty subtrees have no leaves and are ignored.
+        """
+        if not isinstance(other, NestedDict):
+            return super().__eq__(other)
+        return next(self.diff(other), None) is None
+
+    def copy(self, cow: bool = False) -> T:
+        """
+        Return a deep copy.
+
+        Args:
+            cow:
+                Set to True to return a copy-on-write copy instead.
+                The copy shares all its nodes with the original, so copying costs O(1).
+                Either of them copies the nodes on the path of a key
+                when the key is set or deleted, and the shared nodes of a subtree when it is handed out.
+                Leaf values are shared, not copied.
+
+        Examples:
+            >>> nd = NestedDict({"a": {"aa": 0}, "b": {"ba": 1}})
+            >>> nd_copy = nd.copy(cow=True)
+            >>> nd_copy["a", "aa"] = 2
+            >>> nd, nd_copy
+            (NestedDict({'a': {'aa': 0}, 'b': {'ba': 1}}), NestedDict({'a': {'aa': 2}, 'b': {'ba': 1}}))
+            >>> nd["b"] is nd_copy["b"]
+            False
+        """
+        if not cow:
+            new = deepcopy(self)
+            # The index and the count may be stale in the subtrees referenced from outside,
+            # the index is built again when needed
+            new._index = None
+            if self._live_escapes():
+                new._length = None
+            new._shared = {}
+            new._escaped = {}
+            new._digests = None if self._digests is None else {}
+            return new
+        new = shallow_copy(self)
+        new._index = None
+        new._shared = {}
+        new._escaped = {}
+        new._digests = None if self._digests is None else dict(self._digests)
+        # Subtrees referenced from outside may be mutated, so they are copied rather than shared
+        if () in self._escaped:
+            new._tree = _map_values(self._tree, _identity)
+            return new
+        new._share([self._tree])
+        self._share([self._tree])
+        for key, subtree in self._escaped.items():
+            if _get(self._tree, key, None) is subtree:
+                new._own_path(key[:-1])[-1][key[-1]] = _map_values(subtree, _identity)
+        return new
 
     def to_dict(self) -> dict:
         """Return a copy as a dictionary."""
-        return deepcopy(self._ndict)
+        return deepcopy(self._tree)
+
+    def to_snapshot(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Write the NestedDict to a binary snapshot, read back by NestedDict.open_snapshot.
+
+        Integer and float leaves are stored as 8 bytes values,
+        keys and other leaf values are pickled.
+
+        Args:
+            path: Path of the snapshot file.
+
+        See Also:
+            ndicts.snapshot.write_snapshot: Description of the format.
+        """
+        write_snapshot(self, path)
+
+    def to_ndjson(self, fp: IO[str]) -> None:
+        """
+        Write the NestedDict row by row as newline delimited JSON.
+
+        Each line is a JSON array holding the keys of a leaf followed by its value.
+        Keys are written as they are, so keys which are not strings are preserved.
+
+        Args:
+            fp: Text file, or any object with a write method.
+
+        Examples:
+            >>> import sys
+            >>> NestedDict({"a": {0: 1}, "b": 2}).to_ndjson(sys.stdout)
+            ["a", 0, 1]
+            ["b", 2]
+        """
+        write_ndjson(self, fp)
+
+
+def _walk(ndict: dict, max_depth: int = None, preorder: bool = False) -> Generator:
+    """Traverse the nested dictionary with an explicit stack,
+    yield the key and the value once a leaf value is reached.
+
+    Only leaves are yielded, unless preorder is True.
+    Subtrees at max_depth are not entered and are yielded as leaves."""
+    stack = [((), iter(ndict.items()))]
+    while stack:
+        prefix, branches = stack[-1]
+        for node, branch in branches:
+            key = prefix + (node,)
+            if isinstance(branch, dict) and (max_depth is None or len(key) < max_depth):
+                if preorder:
+                    yield key, branch
+                stack.append((key, iter(branch.items())))
+                break
+            yield key, branch
+        else:
+            stack.pop()
+
+
+def _walk_values(ndict: dict) -> Generator:
+    """Traverse the nested dictionary with an explicit stack, yield the leaf values."""
+    stack = [iter(ndict.values())]
+    while stack:
+        for branch in stack[-1]:
+            if isinstance(branch, dict):
+                stack.append(iter(branch.values()))
+                break
+            yield branch
+        else:
+            stack.pop()
+
+
+def _walk_pattern(ndict: dict, pattern: Tuple) -> Generator:
+    """Traverse the nested dictionary with an explicit stack,
+    yield the keys and values at the depth of the pattern that match it.
+
+    An empty string in the pattern matches any key on that level."""
+    depth = len(pattern)
+    stack = [((), ndict)]
+    while stack:
+        prefix, branch = stack.pop()
+        if len(prefix) == depth:
+            yield prefix, branch
+            continue
+        if not isinstance(branch, dict):
+            continue
+        k = pattern[len(prefix)]
+        if k == "":
+            children = [(prefix + (node,), child) for node, child in branch.items()]
+            stack.extend(reversed(children))
+        elif k in branch:
+            stack.append((prefix + (k,), branch[k]))
+
+
+def _build_index(ndict: dict) -> dict:
+    """Map each (depth, key) to the keys of the nodes where it appears."""
+    index = {}
+    for key, _ in _walk(ndict, preorder=True):
+        _index_add(index, key)
+    return index
+
+
+def _index_add(index: dict, key: Tuple) -> None:
+    """Add the node at key to the index."""
+    index.setdefault((len(key) - 1, key[-1]), {})[key] = None
+
+
+def _index_subtree(index: dict, key: Tuple, subtree: dict) -> None:
+    """Add the nodes of the subtree at key to the index."""
+    for sub_key, _ in _walk(subtree, preorder=True):
+        _index_add(index, key + sub_key)
+
+
+def _index_discard(index: dict, key: Tuple) -> None:
+    """Remove the node at key from the index, if present."""
+    level = (len(key) - 1, key[-1])
+    postings = index.get(level)
+    if postings is not None:
+        postings.pop(key, None)
+        if not postings:
+            del index[level]
+
+
+def _map_values(ndict: dict, func: Callable) -> dict:
+    """Copy the structure of the nested dictionary, applying func to the leaf values."""
+    result = {}
+    stack = [(ndict, result)]
+    while stack:
+        node, mapped = stack.pop()
+        for key, value in node.items():
+            if isinstance(value, dict):
+                mapped[key] = {}
+                stack.append((value, mapped[key]))
+            else:
+                mapped[key] = func(value)
+    return result
+
+
+def _build_from_items(items: Iterable[Tuple[Any, Any]]) -> Tuple[dict, Optional[int]]:
+    """Build a nested dictionary from (key, value) pairs, return it with its number of leaves.
+
+    The nodes on the path of the previous key are reused for the prefix
+    it shares with the next key, instead of walking again from the root."""
+    tree = node = {}
+    length = 0
+    subtrees = False
+    path = ()
+    nodes = [tree]
+    for key, value in items:
+        if not isinstance(key, tuple):
+            key = (key,)
+        parent = key[:-1]
+        if parent != path:
+            depth = 0
+            for k, previous in zip(parent, path):
+                if k != previous:
+                    break
+                depth += 1
+            del nodes[depth + 1:]
+            node = nodes[-1]
+            for k in parent[depth:]:
+                node = node.setdefault(k, {})
+                nodes.append(node)
+            path = parent
+
+        last = key[-1]
+        if last not in node:
+            length += 1
+        elif isinstance(node[last], dict):
+            length += 1 - _count_leaves(node[last])
+        if isinstance(value, dict):
+            # The caller keeps a reference to the subtree
+            subtrees = True
+        node[last] = value
+    return tree, None if subtrees else length
+
+
+def _columns(ndict: dict) -> Tuple[List[list], list, bool]:
+    """Return the columns of keys and the column of values of the nested dictionary,
+    and whether keys were padded with None.
+
+    The key of a node is added to its column at once for all the leaves
+    below it, when the traversal leaves the node."""
+    levels = []
+    values = []
+    ragged = False
+    stack = [(None, 0, iter(ndict.items()))]
+    while stack:
+        branches = stack[-1][2]
+        depth = len(stack) - 1
+        for node, branch in branches:
+            if isinstance(branch, dict):
+                stack.append((node, len(values), iter(branch.items())))
+                break
+            if depth >= len(levels) or len(levels[depth]) < len(values):
+                ragged |= _pad(levels, depth, len(values))
+            levels[depth].append(node)
+            values.append(branch)
+        else:
+            node, start, _ = stack.pop()
+            if stack and start < len(values):
+                ragged |= _pad(levels, depth - 1, start)
+                levels[depth - 1].extend(repeat(node, len(values) - start))
+    for depth in range(len(levels)):
+        ragged |= _pad(levels, depth, len(values))
+    return levels, values, ragged
+
+
+def _pad(levels: List[list], depth: int, length: int) -> bool:
+    """Pad the column of keys on depth with None up to length, return whether it was padded."""
+    while len(levels) <= depth:
+        levels.append([])
+    column = levels[depth]
+    if len(column) < length:
+        column.extend(repeat(None, length - len(column)))
+        return True
+    return False
+
+
+def _strip(key: Tuple) -> Tuple:
+    """Remove the trailing None padding a key."""
+    end = len(key)
+    while end > 1 and key[end - 1] is None:
+        end -= 1
+    return key[:end]
+
+
+def _build_from_product(iterables: List[list], values: Union[Any, Iterable]) -> Tuple[dict, Optional[int]]:
+    """Build a nested dictionary by cartesian product, return it with its number of leaves.
+
+    The dictionaries of each level are built directly, one level after the other."""
+    scalar = not isinstance(values, Iterable) or isinstance(values, str)
+    if not all(iterables):
+        if not scalar and next(iter(values), _MISSING) is not _MISSING:
+            raise UnequalIterablesError
+        return {}, 0
+
+    tree = {}
+    parents = [tree]
+    for iterable in iterables[:-1]:
+        children = []
+        for parent in parents:
+            for k in iterable:
+                child = parent[k] = {}
+                children.append(child)
+        parents = children
+
+    length = 1
+    for iterable in iterables:
+        length *= len(dict.fromkeys(iterable))
+
+    leaves = iterables[-1]
+    if scalar:
+        for parent in parents:
+            parent.update(dict.fromkeys(leaves, values))
+    else:
+        values = iter(values)
+        try:
+            for parent in parents:
+                for k in leaves:
+                    value = parent[k] = next(values)
+                    if isinstance(value, dict):
+                        # The caller keeps a reference to the subtree
+                        length = None
+        except StopIteration:
+            raise UnequalIterablesError
+        if next(values, _MISSING) is not _MISSING:
+            raise UnequalIterablesError
+    return tree, length
+
+
+def _digest(ndict: dict, digests: dict) -> bytes:
+    """Digest the nested dictionary bottom up, with the digests of its subtrees cached by id.
+    Empty subtrees have no leaves, and are left out of the digests.
+
+    Each subtree is cached with whether all its keys and leaves are identified by their digest,
+    only then are equal digests trusted, see _same."""
+    cached = digests.get(id(ndict))
+    if cached is not None:
+        return cached[1]
+    # Key, node, remaining branches, digests of the entries, and whether they are identified
+    stack = [[None, ndict, iter(ndict.items()), [], True]]
+    while True:
+        frame = stack[-1]
+        for key, branch in frame[2]:
+            if isinstance(branch, dict):
+                cached = digests.get(id(branch))
+                if cached is None:
+                    stack.append([key, branch, iter(branch.items()), [], True])
+                    break
+                _, value, identified = cached
+            else:
+                value = _digest_leaf(branch)
+                identified = _identified(branch)
+            if value != _EMPTY_DIGEST:
+                frame[3].append(_digest_leaf(key) + value)
+                frame[4] = frame[4] and identified and _identified(key)
+        else:
+            key, node, _, entries, identified = stack.pop()
+            entries.sort()
+            value = blake2b(b"".join(entries), digest_size=_DIGEST_SIZE, person=b"node").digest()
+            if not entries:
+                value = _EMPTY_DIGEST
+            # The node is kept with its digest, so that its id is not reused
+            digests[id(node)] = (node, value, identified)
+            if not stack:
+                return value
+            if value != _EMPTY_DIGEST:
+                stack[-1][3].append(_digest_leaf(key) + value)
+                stack[-1][4] = stack[-1][4] and identified and _identified(key)
+
+
+def _digest_leaf(value: Any) -> bytes:
+    data = f"{type(value).__module__}.{type(value).__qualname__}:{value!r}".encode()
+    return blake2b(data, digest_size=_DIGEST_SIZE, person=b"leaf").digest()
+
+
+def _identified(value: Any) -> bool:
+    """Check whether the type and repr of a value identify it among the values equal to themselves.
+    The repr of other types, such as NumPy arrays, may leave out part of the value."""
+    if type(value) is tuple:
+        return all(_identified(item) for item in value)
+    # NaN is not equal to itself
+    return type(value) in _IDENTIFIED_TYPES and value == value
+
+
+def _diff(left: dict, right: dict, left_digests: dict = None, right_digests: dict = None) -> Generator:
+    """Traverse the nested dictionaries together, yield the leaf keys added, removed and changed.
+    Identical subtrees, or with equal digests, are skipped."""
+    if _same(left, right, left_digests, right_digests):
+        return
+    stack = [((), left, right, iter(left.items()))]
+    while stack:
+        prefix, left, right, branches = stack[-1]
+        for k, value in branches:
+            key = prefix + (k,)
+            other = right.get(k, _MISSING)
+            if isinstance(value, dict) and isinstance(other, dict):
+                if not _same(value, other, left_digests, right_digests):
+                    stack.append((key, value, other, iter(value.items())))
+                    break
+            elif isinstance(value, dict):
+                yield from (("removed", key + sub_key) for sub_key, _ in _walk(value))
+                if other is not _MISSING:
+                    yield "added", key
+            elif other is _MISSING:
+                yield "removed", key
+            elif isinstance(other, dict):
+                yield "removed", key
+                yield from (("added", key + sub_key) for sub_key, _ in _walk(other))
+            elif value is not other and value != other:
+                yield "changed", key
+        else:
+            stack.pop()
+            for k, other in right.items():
+                if k in left:
+                    continue
+                if isinstance(other, dict):
+                    yield from (("added", prefix + (k,) + sub_key) for sub_key, _ in _walk(other))
+                else:
+                    yield "added", prefix + (k,)
+
+
+def _same(left: dict, right: dict, left_digests: Optional[dict], right_digests: Optional[dict]) -> bool:
+    """Check whether two subtrees are known to be equal, without comparing them.
+    Equal digests are only trusted if all the keys and leaves of both subtrees are identified by them."""
+    if left is right:
+        return True
+    if left_digests is None or right_digests is None:
+        return False
+    left_digest = left_digests.get(id(left))
+    right_digest = right_digests.get(id(right))
+    return (
+        left_digest is not None and right_digest is not None
+        and left_digest[2] and right_digest[2] and left_digest[1] == right_digest[1]
+    )
+
+
+def _lookup_missing(key: Any, default: Any) -> Any:
+    """Lookup of keys which cannot be in the NestedDict."""
+    return _MISSING
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _get(ndict: dict, key: Tuple, default: Any = _MISSING) -> Any:
+    """Get the item at key in the nested dictionary, or default.
+    If no default is passed, KeyError is raised."""
+    item = ndict
+    for k in key:
+        try:
+            item = item[k]
+        except (KeyError, TypeError):
+            if default is _MISSING:
+                raise KeyError(key) from None
+            return default
+    return item
+
+
+def _count_leaves(ndict: dict) -> int:
+    """Count the leaf values of a nested dictionary."""
+    length = 0
+    stack = [ndict]
+    while stack:
+        for value in stack.pop().values():
+            if isinstance(value, dict):
+                stack.append(value)
+            else:
+                length += 1
+    return length
+
+
+class _NestedValuesView(ValuesView):
+    """ValuesView yielding the leaves in a single traversal"""
+
+    def __iter__(self):
+        return _walk_values(self._mapping._tree)
+
+
+class _NestedItemsView(ItemsView):
+    """ItemsView yielding the items in a single traversal"""
+
+    def __iter__(self):
+        return _walk(self._mapping._tree)
 
 
 class _Extractor:
@@ -418,20 +1901,150 @@ class _Extractor:
         item = self._extractee.__class__()
 
         if "" in key:
-            for self_key in self._extractee.keys():
-                if len(self_key) < len(key):
-                    continue
-                for k, s_k in zip(key, self_key):
-                    if k == "":
-                        continue
-                    elif k != s_k:
-                        break
+            for prefix, branch in self._extractee._match(key):
+                if isinstance(branch, dict):
+                    for sub_key, value in _walk(branch):
+                        item[prefix + sub_key] = value
                 else:
-                    item[self_key] = self._extractee[self_key]
+                    item[prefix] = branch
         else:
-            item[key] = self._extractee[key]
+            extractee = self._extractee
+            value = _get(extractee._tree, key)
+            if isinstance(value, dict):
+                if extractee._escapes(key):
+                    # The subtree may be mutated from outside, it is copied rather than shared
+                    value = _map_values(value, _identity)
+                else:
+                    extractee._share([value])
+                    item._share([value])
+            item._own_path(key[:-1])[-1][key[-1]] = value
+            item._length = None if isinstance(value, dict) else 1
 
         return item
 
 
+class NestedDictAccessor:
+    """
+    Getter and setter for fixed keys of a NestedDict.
 
+    See NestedDict.accessor.
+    """
+
+    __slots__ = ("_nd", "_keys", "_single", "_parents", "_writable", "_lookup", "_last", "_version", "_escape_count")
+
+    def __init__(self, nd: NestedDict, keys: Tuple) -> None:
+        if not keys:
+            raise ValueError("at least one key is needed")
+        self._nd = nd
+        self._keys = tuple(key if isinstance(key, tuple) else (key,) for key in keys)
+        if () in self._keys:
+            raise ValueError("keys cannot be empty")
+        self._single = len(self._keys) == 1
+        self._last = self._keys[0][-1]
+        self._parents = self._writable = self._lookup = None
+        self._version = self._escape_count = None
+
+    def _resolve(self) -> None:
+        """Find the node holding each key, or None if there is none."""
+        nd = self._nd
+        shared = nd._shared
+        self._parents = []
+        self._writable = []
+        for key in self._keys:
+            node = nd._tree
+            nodes = [node]
+            try:
+                hash(key[-1])
+                for k in key[:-1]:
+                    node = node[k]
+                    nodes.append(node)
+                if not isinstance(node, dict):
+                    node = None
+            except (KeyError, TypeError):
+                node = None
+            self._parents.append(node)
+            # Nodes shared with copy-on-write copies must be copied before being written
+            self._writable.append(node is not None and not any(id(node) in shared for node in nodes))
+        # Bound lookup of the first key, returning _MISSING if the key cannot be in the NestedDict
+        self._lookup = _lookup_missing if self._parents[0] is None else self._parents[0].get
+        # Nodes below a subtree referenced from outside may be replaced without the version changing,
+        # the keys going through one are found again on each call
+        escaped = nd._live_escapes()
+        self._escape_count = nd._escape_count
+        stale = any(
+            len(prefix) < len(key) - 1 and key[:len(prefix)] == prefix for key in self._keys for prefix in escaped
+        )
+        self._version = None if stale else nd._version
+
+    def get(self, default: Any = _MISSING) -> Any:
+        """
+        Get the value of each key, or a tuple of values if there are several keys.
+
+        Args:
+            default: Value of the keys missing. If not passed, KeyError is raised.
+
+        Raises:
+            KeyError: If a key does not belong to the NestedDict and no default is passed.
+        """
+        if self._version != self._nd._version or self._escape_count != self._nd._escape_count:
+            self._resolve()
+        if self._single:
+            value = self._lookup(self._last, _MISSING)
+            if value is _MISSING or isinstance(value, dict):
+                return self._value(self._keys[0], value, default)
+            return value
+        return tuple(
+            self._value(key, _MISSING if parent is None else parent.get(key[-1], _MISSING), default)
+            for key, parent in zip(self._keys, self._parents)
+        )
+
+    def _value(self, key: Tuple, value: Any, default: Any) -> Any:
+        """Return the value found at key, the default if it is missing, or hand out a subtree."""
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        if isinstance(value, dict):
+            # The subtree escapes, as in NestedDict.__getitem__
+            return self._nd[key]
+        return value
+
+    def set(self, value: Any) -> None:
+        """
+        Set the value of each key, see NestedDict.__setitem__.
+
+        Args:
+            value: Value of the key, or iterable of the values of each key if there are several keys.
+
+        Raises:
+            UnequalIterablesError: If there are several keys and the number of values differs.
+        """
+        nd = self._nd
+        if self._single:
+            if (self._version == nd._version and self._escape_count == nd._escape_count and self._writable[0]
+                    and not isinstance(value, dict)):
+                old_value = self._lookup(self._last, _MISSING)
+                if old_value is not _MISSING and not isinstance(old_value, dict):
+                    # Only a leaf value changes, the caches stay valid
+                    if nd._digests:
+                        nd._drop_digests(self._keys[0])
+                    self._parents[0][self._last] = value
+                    return
+            values = (value,)
+        else:
+            values = list(value)
+            if len(values) != len(self._keys):
+                raise UnequalIterablesError
+        for i, (key, value) in enumerate(zip(self._keys, values)):
+            if self._version != nd._version or self._escape_count != nd._escape_count:
+                self._resolve()
+            if self._writable[i] and not isinstance(value, dict):
+                parent = self._parents[i]
+                old_value = parent.get(key[-1], _MISSING)
+                if old_value is not _MISSING and not isinstance(old_value, dict):
+                    # Only a leaf value changes, the caches stay valid
+                    if nd._digests:
+                        nd._drop_digests(key)
+                    parent[key[-1]] = value
+                    continue
+            nd[key] = value
@@ -0,0 +1,300 @@
+"""Binary snapshots of NestedDicts, read through mmap without loading them."""
+
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Any, Generator, Tuple, Type, Union
+
+_MAGIC = b"NDSNAP01"
+# Magic and offset of the root node
+_HEADER = struct.Struct("<8sQ")
+# Number of leaves, number of children and size of the pickled keys of a node
+_NODE = struct.Struct("<QII")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_SIZE = struct.Struct("<Q")
+_SLOT = 8
+
+# Kinds of children
+_SUBTREE, _INTEGER, _REAL, _PICKLED = range(4)
+
+
+def write_snapshot(nd, path: Union[str, os.PathLike]) -> None:
+    """
+    Write a NestedDict to a binary snapshot.
+
+    Each node is written once all its children are, so that it holds their offsets.
+    A node stores its keys, pickled together, the kind of each child,
+    and an array of 8 bytes slots. Integers and floats are stored in their slot,
+    while subtrees and other leaf values are stored at the offset in their slot.
+
+    Args:
+        nd: NestedDict, or nested dictionary.
+        path: Path of the snapshot file.
+
+    See Also:
+        NestedDict.to_snapshot: Write a NestedDict to a binary snapshot.
+    """
+    tree = nd if isinstance(nd, dict) else nd._tree
+    with open(path, "wb") as fp:
+        fp.write(_HEADER.pack(_MAGIC, 0))
+        # Each frame holds the branches left, the keys, kinds and slots of the children, and the leaf count
+        stack = [(iter(tree.items()), [], bytearray(), [], [0])]
+        while True:
+            branches, keys, kinds, slots, length = stack[-1]
+            for key, value in branches:
+                keys.append(key)
+                if isinstance(value, dict):
+                    stack.append((iter(value.items()), [], bytearray(), [], [0]))
+                    break
+                kind, slot = _write_leaf(fp, value)
+                kinds.append(kind)
+                slots.append(slot)
+                length[0] += 1
+            else:
+                _, keys, kinds, slots, length = stack.pop()
+                offset = _write_node(fp, keys, kinds, slots, length[0])
+                if not stack:
+                    break
+                stack[-1][2].append(_SUBTREE)
+                stack[-1][3].append(_INT.pack(offset))
+                stack[-1][4][0] += length[0]
+        fp.seek(0)
+        fp.write(_HEADER.pack(_MAGIC, offset))
+
+
+def _align(fp) -> int:
+    """Pad the file to the size of a slot, return the offset reached."""
+    offset = fp.tell()
+    padding = -offset % _SLOT
+    fp.write(bytes(padding))
+    return offset + padding
+
+
+def _write_leaf(fp, value: Any) -> Tuple[int, bytes]:
+    """Return the kind and slot of a leaf value, pickling it to the file if needed."""
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return _INTEGER, _INT.pack(value)
+    if type(value) is float:
+        return _REAL, _FLOAT.pack(value)
+    offset = _align(fp)
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    fp.write(_SIZE.pack(len(data)))
+    fp.write(data)
+    return _PICKLED, _INT.pack(offset)
+
+
+def _write_node(fp, keys: list, kinds: bytearray, slots: list, length: int) -> int:
+    offset = _align(fp)
+    data = pickle.dumps(tuple(keys), protocol=pickle.HIGHEST_PROTOCOL)
+    fp.write(_NODE.pack(length, len(keys), len(data)))
+    fp.write(data)
+    fp.write(kinds)
+    _align(fp)
+    fp.write(b"".join(slots))
+    return offset
+
+
+class Snapshot(Mapping):
+    """
+    Read-only NestedDict backed by a binary snapshot file mapped in memory.
+
+    Opening a snapshot only reads its header.
+    The nodes on the path of a key are decoded the first time they are accessed,
+    and up to cache_size decoded nodes are kept, the oldest are dropped first.
+    Integers and floats are read directly from the mapped pages,
+    so a snapshot bigger than the memory can be queried.
+
+    Subtrees are returned as Snapshots sharing the mapped file and the cache.
+
+    Warning:
+        Keys and leaf values other than integers and floats are pickled.
+        As with pickle, only open snapshots from a trusted source.
+
+    Args:
+        path: Path of a file written by NestedDict.to_snapshot.
+        cls: Class of the NestedDict returned by Snapshot.materialize, NestedDict by default.
+        cache_size: Maximum number of decoded nodes kept.
+
+    Raises:
+        ValueError: If the file is not a snapshot.
+
+    See Also:
+        NestedDict.open_snapshot: Open a snapshot.
+
+    Examples:
+        >>> import os, tempfile
+        >>> from ndicts import NestedDict
+        >>> path = os.path.join(tempfile.mkdtemp(), "nd.snapshot")
+        >>> NestedDict({"a": {"x": 0, "y": 1.5}, "b": "c"}).to_snapshot(path)
+        >>> snapshot = Snapshot(path)
+        >>> snapshot["a", "y"], len(snapshot)
+        (1.5, 3)
+        >>> snapshot["a"]
+        Snapshot(2 leaves)
+        >>> snapshot.materialize()
+        NestedDict({'a': {'x': 0, 'y': 1.5}, 'b': 'c'})
+        >>> snapshot.close()
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], cls: Type = None, cache_size: int = 4096) -> None:
+        with open(path, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self._offset = _HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = None
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a snapshot")
+        self._cls = cls
+        self._cache_size = cache_size
+        self._nodes = {}
+
+    def _from_offset(self, offset: int) -> "Snapshot":
+        snapshot = self.__class__.__new__(self.__class__)
+        snapshot.__dict__.update(self.__dict__)
+        snapshot._offset = offset
+        return snapshot
+
+    def _node(self, offset: int) -> Tuple[dict, bytes, int]:
+        """Decode the node at offset, return the positions of its keys, the kinds of its children
+        and the offset of its slots."""
+        node = self._nodes.get(offset)
+        if node is None:
+            _, count, size = _NODE.unpack_from(self._mmap, offset)
+            start = offset + _NODE.size
+            keys = pickle.loads(self._mmap[start:start + size])
+            kinds = self._mmap[start + size:start + size + count]
+            slots = start + size + count
+            slots += -slots % _SLOT
+            node = ({key: position for position, key in enumerate(keys)}, kinds, slots)
+            if len(self._nodes) >= self._cache_size:
+                # Evict the node decoded first
+                del self._nodes[next(iter(self._nodes))]
+            self._nodes[offset] = node
+        return node
+
+    def _child(self, kind: int, slot: int) -> Any:
+        """Return the offset of a subtree, or the leaf value stored in the slot."""
+        if kind == _REAL:
+            return _FLOAT.unpack_from(self._mmap, slot)[0]
+        value = _INT.unpack_from(self._mmap, slot)[0]
+        if kind == _PICKLED:
+            size = _SIZE.unpack_from(self._mmap, value)[0]
+            start = value + _SIZE.size
+            return pickle.loads(self._mmap[start:start + size])
+        return value
+
+    def __getitem__(self, key: Union[Any, Tuple]) -> Any:
+        """Get item associated to the key, subtrees are returned as Snapshots."""
+        if type(key) is not tuple:
+            key = (key,)
+        offset = self._offset
+        for depth, k in enumerate(key):
+            positions, kinds, slots = self._node(offset)
+            try:
+                position = positions[k]
+            except (KeyError, TypeError):
+                raise KeyError(key) from None
+            kind = kinds[position]
+            value = self._child(kind, slots + position * _SLOT)
+            if kind != _SUBTREE:
+                if depth < len(key) - 1:
+                    raise KeyError(key)
+                return value
+            offset = value
+        return self._from_offset(offset)
+
+    def __iter__(self) -> Generator:
+        """Iterate over the keys of the leaf values."""
+        return (key for key, _ in self._walk())
+
+    def __len__(self) -> int:
+        """Number of leaf values, read without decoding the node."""
+        return _NODE.unpack_from(self._mmap, self._offset)[0]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({len(self)} leaves)"
+
+    def _branches(self, offset: int) -> Generator:
+        """Yield the key, kind and value of the children of the node at offset."""
+        positions, kinds, slots = self._node(offset)
+        for key, position in positions.items():
+            kind = kinds[position]
+            yield key, kind, self._child(kind, slots + position * _SLOT)
+
+    def _walk(self) -> Generator:
+        """Traverse the nodes with an explicit stack, see nested_dict._walk."""
+        stack = [((), self._branches(self._offset))]
+        while stack:
+            prefix, branches = stack[-1]
+            for key, kind, value in branches:
+                if kind == _SUBTREE:
+                    stack.append((prefix + (key,), self._branches(value)))
+                    break
+                yield prefix + (key,), value
+            else:
+                stack.pop()
+
+    def values(self) -> ValuesView:
+        """Return a view of the leaf values."""
+        return _SnapshotValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Return a view of the (key, leaf value) pairs."""
+        return _SnapshotItemsView(self)
+
+    def rows(self) -> Generator:
+        """Yield the Snapshot row by row, see NestedDict.rows."""
+        return ((*key, value) for key, value in self._walk())
+
+    def to_dict(self) -> dict:
+        """Decode the whole snapshot into a nested dictionary."""
+        root = {}
+        stack = [(root, self._offset)]
+        while stack:
+            ndict, offset = stack.pop()
+            for key, kind, value in self._branches(offset):
+                if kind == _SUBTREE:
+                    ndict[key] = {}
+                    stack.append((ndict[key], value))
+                else:
+                    ndict[key] = value
+        return root
+
+    def materialize(self, cls: Type = None):
+        """Decode the whole snapshot, return it as a NestedDict or as an instance of cls."""
+        cls = cls or self._cls
+        if cls is None:
+            from ndicts.nested_dict import NestedDict as cls
+        nd = cls()
+        nd._tree, nd._length = self.to_dict(), len(self)
+        return nd
+
+    def close(self) -> None:
+        """Unmap the file, the Snapshot and its subtrees cannot be used anymore."""
+        self._nodes.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _SnapshotValuesView(ValuesView):
+    """ValuesView decoding the nodes"""
+
+    def __iter__(self):
+        return (value for _, value in self._mapping._walk())
+
+
+class _SnapshotItemsView(ItemsView):
+    """ItemsView decoding the nodes"""
+
+    def __iter__(self):
+        return self._mapping._walk()
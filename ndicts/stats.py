@@ -0,0 +1,194 @@
+from math import floor, sqrt
+from numbers import Number
+from typing import Dict, Iterable, Optional
+
+
+class Statistics:
+    """
+    Summary statistics accumulated in a single pass.
+
+    Mean and variance are updated with Welford's algorithm,
+    approximate quantiles with a mergeable compacting sketch.
+    Accumulators built on separate chunks of data can be merged,
+    giving the same result as a single accumulator over all data.
+
+    Args:
+        sketch_size:
+            Number of values kept on each level of the quantile sketch.
+            Quantiles are exact as long as fewer values are added.
+            If None, quantiles are not tracked.
+
+    Examples:
+        >>> stats = Statistics().update([1, 2, 3, 4])
+        >>> stats.count, stats.total, stats.min, stats.max
+        (4, 10, 1, 4)
+        >>> stats.mean()
+        2.5
+        >>> round(stats.std(), 4)
+        1.291
+
+        Merge statistics computed separately.
+
+        >>> stats.merge(Statistics().update([5, 6])).mean()
+        3.5
+    """
+
+    def __init__(self, sketch_size: Optional[int] = None) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._sketch = None if sketch_size is None else _QuantileSketch(sketch_size)
+
+    def add(self, value: Number) -> "Statistics":
+        """Add a value, return the updated Statistics."""
+        self.count += 1
+        self.total += value
+        if self.count == 1:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self._sketch is not None:
+            self._sketch.add(value)
+        return self
+
+    def update(self, values: Iterable[Number]) -> "Statistics":
+        """Add all values, return the updated Statistics."""
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "Statistics") -> "Statistics":
+        """Merge the statistics of other, return the updated Statistics."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        if self._sketch is not None:
+            if other._sketch is None:
+                raise ValueError("cannot merge statistics without quantiles")
+            self._sketch.merge(other._sketch)
+        return self
+
+    def mean(self) -> Number:
+        """Mean of the values."""
+        if self.count == 0:
+            raise ZeroDivisionError("mean of empty data")
+        return self._mean
+
+    def var(self, ddof: int = 1) -> Number:
+        """Variance of the values, with ddof delta degrees of freedom."""
+        return self._m2 / (self.count - ddof)
+
+    def std(self, ddof: int = 1) -> Number:
+        """Standard deviation of the values, with ddof delta degrees of freedom."""
+        return sqrt(self.var(ddof))
+
+    def quantile(self, q: float) -> Number:
+        """
+        Approximate q-quantile of the values.
+
+        Raises:
+            ValueError: If the quantiles are not tracked or q is not between 0 and 1.
+
+        Examples:
+            >>> Statistics(sketch_size=256).update(range(101)).quantile(0.25)
+            25.0
+        """
+        if self._sketch is None:
+            raise ValueError("quantiles are not tracked, pass a sketch_size")
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            raise ValueError("quantile of empty data")
+        return self._sketch.quantile(q)
+
+    def describe(self) -> Dict[str, Number]:
+        """
+        Summary of the statistics as a dictionary.
+
+        Quartiles are included if quantiles are tracked.
+
+        Examples:
+            >>> Statistics(sketch_size=64).update([1, 2, 3, 4, 5]).describe()
+            {'count': 5, 'mean': 3.0, 'std': 1.5811388300841898, 'min': 1, '25%': 2.0, '50%': 3.0, '75%': 4.0, 'max': 5}
+        """
+        summary = {"count": self.count, "mean": self.mean(), "std": self.std(), "min": self.min}
+        if self._sketch is not None:
+            for q in (0.25, 0.5, 0.75):
+                summary[f"{q:.0%}"] = self.quantile(q)
+        summary["max"] = self.max
+        return summary
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(count={self.count}, total={self.total})"
+
+
+class _QuantileSketch:
+    """Compacting quantile sketch.
+    Values on level i stand for 2**i values. When a level is full it is sorted
+    and every other value is promoted to the next level."""
+
+    def __init__(self, size: int) -> None:
+        self.size = max(size, 2)
+        self.levels = [[]]
+        self._offset = 0
+
+    def add(self, value: Number) -> None:
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self.size:
+            self._compact()
+
+    def merge(self, other: "_QuantileSketch") -> None:
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(values)
+        self._compact()
+
+    def _compact(self) -> None:
+        for level, values in enumerate(self.levels):
+            if len(values) < self.size:
+                continue
+            values.sort()
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(values[self._offset::2])
+            self._offset ^= 1
+            values.clear()
+
+    def quantile(self, q: float) -> Number:
+        if len(self.levels) == 1:
+            # Nothing was compacted, interpolate between the exact values
+            values = sorted(self.levels[0])
+            position = q * (len(values) - 1)
+            lower = floor(position)
+            upper = min(lower + 1, len(values) - 1)
+            return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+        weighted = sorted(
+            (value, 2**level) for level, values in enumerate(self.levels) for value in values
+        )
+        target = q * sum(weight for _, weight in weighted)
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
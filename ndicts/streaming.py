@@ -0,0 +1,283 @@
+"""Read and write NestedDicts as a stream of leaves, without holding the whole document in memory."""
+
+import json
+import re
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+from typing import IO, Any, Generator, Iterable, Tuple
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters of numbers and constants, a scalar is complete once another character follows
+_SCALAR = re.compile(r"[-+.\w]*")
+_CONSTANTS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+
+
+def iter_json(fp: IO[str], prefix: Tuple = (), chunk_size: int = 65536) -> Generator:
+    """
+    Parse a JSON object incrementally, yielding its leaves.
+
+    The leaves are yielded as (key, value) pairs, as by NestedDict.items.
+    Only chunk_size characters and the current leaf value are held in memory.
+    Nested objects are traversed, while arrays are leaf values as in a NestedDict.
+    Empty objects have no leaves, and are not yielded.
+
+    Args:
+        fp: Text file, or any object with a read method, containing a JSON object.
+        prefix:
+            Only the leaves whose key starts with prefix are yielded,
+            other subtrees are skipped without being built.
+            As in NestedDict.extract, an empty string matches any key.
+        chunk_size: Number of characters read from fp at a time.
+
+    Yields:
+        (key, value) pairs.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON.
+        ValueError: If the document is not a JSON object.
+
+    See Also:
+        NestedDict.from_json: Build a NestedDict from a JSON document.
+
+    Examples:
+        >>> from io import StringIO
+        >>> document = '{"a": {"x": 1, "y": [1, 2]}, "b": {"x": 3}}'
+        >>> list(iter_json(StringIO(document)))
+        [(('a', 'x'), 1), (('a', 'y'), [1, 2]), (('b', 'x'), 3)]
+        >>> list(iter_json(StringIO(document), prefix=("", "x")))
+        [(('a', 'x'), 1), (('b', 'x'), 3)]
+    """
+    tokens = _Tokenizer(fp, chunk_size)
+    kind, _ = tokens.read()
+    if kind != "{":
+        raise ValueError("the JSON document is not an object")
+    path = []
+    kind, token = tokens.read()
+    if kind != "}":
+        kind, token = _member(tokens, kind, token)
+    while True:
+        if kind == "}":
+            if not path:
+                break
+            path.pop()
+        else:
+            key = (*path, token)
+            tokens.expect(":")
+            kind, token = tokens.read()
+            if not _matches(key, prefix):
+                _value(tokens, kind, token, build=False)
+            elif kind == "{":
+                path.append(key[-1])
+                kind, token = tokens.read()
+                if kind != "}":
+                    kind, token = _member(tokens, kind, token)
+                continue
+            else:
+                value = _value(tokens, kind, token)
+                if len(key) >= len(prefix):
+                    yield key, value
+
+        kind, token = tokens.read()
+        if kind == ",":
+            kind, token = _member(tokens, *tokens.read())
+        elif kind != "}":
+            tokens.error("Expecting ',' delimiter")
+
+    if tokens.read()[0]:
+        tokens.error("Extra data")
+
+
+def iter_ndjson(fp: Iterable[str], prefix: Tuple = ()) -> Generator:
+    """
+    Read rows written by write_ndjson, yielding the leaves.
+
+    Each line is a JSON array holding the keys of a leaf followed by its value.
+
+    Args:
+        fp: Text file, or any iterable of lines.
+        prefix:
+            Only the leaves whose key starts with prefix are yielded.
+            As in NestedDict.extract, an empty string matches any key.
+
+    Yields:
+        (key, value) pairs.
+
+    Examples:
+        >>> list(iter_ndjson(['["a", "x", 1]', '["b", 2]']))
+        [(('a', 'x'), 1), (('b',), 2)]
+    """
+    for line in fp:
+        if not line.strip():
+            continue
+        *key, value = json.loads(line)
+        key = tuple(key)
+        if len(key) >= len(prefix) and _matches(key, prefix):
+            yield key, value
+
+
+def write_ndjson(nd, fp: IO[str]) -> None:
+    """
+    Write the rows of a NestedDict as newline delimited JSON, one row at a time.
+
+    Keys and values must be serializable to JSON.
+    Unlike keys of JSON objects, keys which are not strings are preserved.
+
+    Args:
+        nd: NestedDict, or any object with a rows method.
+        fp: Text file, or any object with a write method.
+
+    See Also:
+        NestedDict.to_ndjson: Write a NestedDict as newline delimited JSON.
+
+    Examples:
+        >>> from io import StringIO
+        >>> from ndicts import NestedDict
+        >>> fp = StringIO()
+        >>> write_ndjson(NestedDict({"a": {"x": 1}, "b": 2}), fp)
+        >>> print(fp.getvalue(), end="")
+        ["a", "x", 1]
+        ["b", 2]
+    """
+    encoder = json.JSONEncoder()
+    for row in nd.rows():
+        fp.write(encoder.encode(row))
+        fp.write("\n")
+
+
+def _matches(key: Tuple, prefix: Tuple) -> bool:
+    """Check whether key and prefix agree on their common levels."""
+    return all(p == "" or p == k for k, p in zip(key, prefix))
+
+
+def _member(tokens: "_Tokenizer", kind: str, token: Any) -> Tuple[str, Any]:
+    """Check that the token starting a member of an object is a key."""
+    if kind != "string":
+        tokens.error("Expecting property name enclosed in double quotes")
+    return kind, token
+
+
+def _value(tokens: "_Tokenizer", kind: str, token: Any, build: bool = True) -> Any:
+    """Read the value starting with the token, or skip it if build is False."""
+    if kind in ("string", "scalar"):
+        return token
+    if kind not in ("{", "["):
+        tokens.error("Expecting value")
+
+    # Nested arrays and objects are read with an explicit stack of open containers
+    root = {} if kind == "{" else []
+    stack = [root]
+    opened = True
+    while stack:
+        container = stack[-1]
+        kind, token = tokens.read()
+        if opened and kind == _closing(container):
+            stack.pop()
+        else:
+            if isinstance(container, dict):
+                key = _member(tokens, kind, token)[1]
+                tokens.expect(":")
+                kind, token = tokens.read()
+            if kind in ("{", "["):
+                value = {} if kind == "{" else []
+                stack.append(value)
+            else:
+                value = _value(tokens, kind, token)
+            if build:
+                if isinstance(container, dict):
+                    container[key] = value
+                else:
+                    container.append(value)
+            if kind in ("{", "["):
+                opened = True
+                continue
+
+        # A value was read, close the containers ending after it
+        while stack:
+            kind, _ = tokens.read()
+            if kind == ",":
+                opened = False
+                break
+            if kind != _closing(stack[-1]):
+                tokens.error("Expecting ',' delimiter")
+            stack.pop()
+    return root if build else None
+
+
+def _closing(container) -> str:
+    return "}" if isinstance(container, dict) else "]"
+
+
+class _Tokenizer:
+    """Split the text read from fp chunk by chunk into JSON tokens"""
+
+    def __init__(self, fp: IO[str], chunk_size: int) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read the next chunk, dropping the text already tokenized."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def read(self) -> Tuple[str, Any]:
+        """Return the kind of the next token and its value.
+        The kind is a structural character, "string", "scalar", or "" at the end."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or not self.fill():
+                break
+        if self.pos == len(self.text):
+            return "", None
+
+        char = self.text[self.pos]
+        if char in "{}[]:,":
+            self.pos += 1
+            return char, None
+        if char == '"':
+            while True:
+                try:
+                    string, self.pos = scanstring(self.text, self.pos + 1)
+                    return "string", string
+                except json.JSONDecodeError:
+                    # The string may continue in the next chunk
+                    if not self.fill():
+                        raise
+        # The number or constant may continue in the next chunk
+        while _SCALAR.match(self.text, self.pos).end() == len(self.text) and self.fill():
+            pass
+        match = NUMBER_RE.match(self.text, self.pos)
+        if match is not None:
+            integer, fraction, exponent = match.groups()
+            self.pos = match.end()
+            if fraction or exponent:
+                return "scalar", float(integer + (fraction or "") + (exponent or ""))
+            return "scalar", int(integer)
+        for constant, value in _CONSTANTS.items():
+            if self.text.startswith(constant, self.pos):
+                self.pos += len(constant)
+                return "scalar", value
+        self.error("Expecting value")
+
+    def expect(self, char: str) -> None:
+        if self.read()[0] != char:
+            self.error(f"Expecting {char!r} delimiter")
+
+    def error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self.text, self.pos)
@@ -0,0 +1,142 @@
+"""Tests for the ColumnarDataDict class"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ndicts import DataDict
+from ndicts.columnar import ColumnarDataDict
+
+
+@pytest.fixture
+def cdd():
+    return ColumnarDataDict.from_product(["ab", "xy"], values=[1, 2, 3, 4])
+
+
+def test_conversion(cdd):
+    dd = DataDict.from_product(["ab", "xy"], values=[1, 2, 3, 4])
+    assert cdd == dd
+    assert cdd.to_datadict() == dd
+    assert dd.to_columnar() == cdd
+    assert ColumnarDataDict(dd)._column.dtype.kind == "i"
+
+
+def test_mapping(cdd):
+    assert cdd["a", "y"] == 2
+    assert cdd["b"] == {"x": 3, "y": 4}
+    assert list(cdd) == [("a", "x"), ("a", "y"), ("b", "x"), ("b", "y")]
+    assert list(cdd.values()) == [1, 2, 3, 4]
+    assert list(cdd.rows())[-1] == ("b", "y", 4)
+    assert len(cdd) == 4
+    assert ("a", "x") in cdd
+    with pytest.raises(KeyError):
+        cdd["c"]
+
+
+def test_setitem_delitem(cdd):
+    cdd["c"] = 5.5
+    assert cdd["c"] == 5.5
+    assert cdd._column.dtype.kind == "f"
+    del cdd["a"]
+    assert cdd == DataDict({"b": {"x": 3, "y": 4}, "c": 5.5})
+    cdd["b"] = {"z": 6}
+    assert cdd == DataDict({"b": {"z": 6}, "c": 5.5})
+    del cdd["c"]
+    cdd["d", "e"] = 7
+    assert cdd == DataDict({"b": {"z": 6}, "d": {"e": 7}})
+    assert len(cdd) == 2
+    assert sorted(cdd._positions.values()) == [0, 1]
+
+
+def test_setitem_keeps_order(cdd):
+    dd = cdd.to_datadict()
+    for key, value in [("a", 5.0), (("b", "x"), {"u": 6, "v": 7}), ("a", {"z": 8}), ("b", {}), ("c", 9)]:
+        cdd[key] = value
+        dd[key] = value
+        assert list(cdd) == list(dd)
+        assert cdd.to_dict() == dd.to_dict()
+    assert sorted(cdd._positions.values()) == list(range(len(cdd)))
+
+
+def test_extract(cdd):
+    assert cdd.extract["a"] == DataDict({"a": {"x": 1, "y": 2}})
+    assert cdd.extract["", "y"] == DataDict({"a": {"y": 2}, "b": {"y": 4}})
+
+
+def test_delitem_after_extract(cdd):
+    extracted = cdd.extract["a"]
+    del cdd["a"]
+    assert cdd == DataDict({"b": {"x": 3, "y": 4}})
+    assert list(cdd.values()) == [3, 4]
+    assert extracted == DataDict({"a": {"x": 1, "y": 2}})
+    cdd["a", "x"] = 5
+    assert cdd["a"] == {"x": 5}
+    assert len(cdd) == 3
+
+
+def test_arithmetics(cdd):
+    dd = cdd.to_datadict()
+    assert cdd + cdd == dd + dd
+    assert cdd * 2 == dd * 2
+    assert 1 - cdd == 1 - dd
+    assert cdd / dd.extract["", "x"] == dd / dd.extract["", "x"]
+    assert dd - cdd.extract["a"] == dd - dd.extract["a"]
+    other = DataDict({"a": 10, "c": 1})
+    assert cdd.add(other, fill_value=0, how="outer") == dd.add(other, fill_value=0, how="outer")
+    assert cdd.mul(DataDict({"b": 2}), fill_value=0) == dd.mul(DataDict({"b": 2}), fill_value=0)
+    with pytest.raises(TypeError, match="incompatible keys"):
+        cdd + other
+
+
+def test_inplace_arithmetics(cdd):
+    dd = cdd.to_datadict()
+    values = cdd._values
+    cdd += cdd
+    cdd *= dd.extract["a"]
+    cdd -= 1
+    assert cdd._values is values
+    cdd /= 2
+    dd += dd
+    dd *= dd.extract["a"] / 2
+    dd -= 1
+    dd /= 2
+    assert cdd == dd
+    with pytest.raises(TypeError, match="incompatible keys"):
+        cdd += DataDict({"c": 1})
+
+
+def test_results_are_independent(cdd):
+    result = cdd + 1
+    result["c"] = 0
+    del result["a"]
+    assert cdd == ColumnarDataDict.from_product(["ab", "xy"], values=[1, 2, 3, 4])
+    copy = cdd.copy()
+    copy["a", "x"] = 0
+    assert cdd["a", "x"] == 1
+
+
+def test_to_columns(cdd):
+    cdd["a", "x"] = 10
+    del cdd["a", "y"]
+    *levels, values = cdd.to_columns()
+    assert levels == [["a", "b", "b"], ["x", "x", "y"]]
+    assert values.tolist() == [10, 3, 4]
+    assert DataDict.from_columns([*levels, values]) == cdd
+
+
+def test_apply(cdd):
+    assert cdd.apply(np.square) == cdd * cdd
+    assert cdd.apply(lambda x: x if x > 2 else 0) == DataDict.from_product(["ab", "xy"], values=[0, 0, 3, 4])
+    cdd.apply(np.negative, inplace=True)
+    assert cdd.total() == -10
+
+
+def test_reductions(cdd):
+    dd = cdd.to_datadict()
+    assert cdd.total() == dd.total()
+    assert cdd.mean() == dd.mean()
+    assert cdd.std() == pytest.approx(dd.std())
+    assert cdd.var(ddof=0) == pytest.approx(dd.var(ddof=0))
+    assert (cdd.min(), cdd.max(), cdd.count()) == (1, 4, 4)
+    assert cdd.describe() == pytest.approx(dd.describe())
+    assert cdd.reduce(lambda x, y: x * y) == 24
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ndicts import ConcurrentNestedDict, NestedDict
+
+
+def test_mapping():
+    d = {"a": {"x": 0, "y": {"z": 1}}, "b": 2}
+    cnd = ConcurrentNestedDict(d)
+    assert cnd.to_dict() == d
+    assert cnd.to_dict() is not d
+    assert len(cnd) == 3
+    assert cnd["a", "y", "z"] == 1
+    assert cnd["a"] == NestedDict({"x": 0, "y": {"z": 1}})
+    assert ("a", "y") in cnd
+    assert ("a", "w") not in cnd
+    with pytest.raises(KeyError):
+        cnd["a", "w"]
+
+    cnd["a", "y", "w"] = 3
+    cnd["c"] = {"x": 4}
+    del cnd["a", "y", "z"]
+    del cnd["b"]
+    assert cnd == NestedDict({"a": {"x": 0, "y": {"w": 3}}, "c": {"x": 4}})
+    assert len(cnd) == 3
+    assert list(cnd) == [("a", "x"), ("a", "y", "w"), ("c", "x")]
+    assert list(cnd.values()) == [0, 3, 4]
+    with pytest.raises(KeyError):
+        del cnd["b"]
+    with pytest.raises(KeyError):
+        del cnd["c", "x", "y"]
+    with pytest.raises(TypeError):
+        cnd["c", "x", "y"] = 5
+
+    del cnd["a", "y", "w"]
+    del cnd["a", "x"]
+    assert "a" not in cnd
+    assert len(cnd) == 1
+
+
+def test_snapshot():
+    value = {"x": 0}
+    cnd = ConcurrentNestedDict({"a": {"x": 0}})
+    cnd["b"] = value
+    value["x"] = 1
+    assert cnd["b", "x"] == 0
+
+    snapshot = cnd.snapshot()
+    cnd["a", "x"] = 2
+    del cnd["b"]
+    assert snapshot == NestedDict({"a": {"x": 0}, "b": {"x": 0}})
+    assert len(snapshot) == 2
+
+    snapshot["a", "y"] = 3
+    snapshot["b"]["x"] = 4
+    assert cnd == NestedDict({"a": {"x": 2}})
+    assert cnd.snapshot()._tree["a"] is cnd._state[0]["a"]
+
+
+def test_concurrent_writes():
+    cnd = ConcurrentNestedDict()
+
+    def write(thread):
+        for i in range(200):
+            cnd[thread % 4, thread, i] = i
+        for i in range(0, 200, 2):
+            del cnd[thread % 4, thread, i]
+
+    def read(_):
+        lengths = []
+        for _ in range(50):
+            snapshot = cnd.snapshot()
+            assert len(snapshot) == sum(1 for _ in snapshot)
+            lengths.append(sum(1 for _ in cnd))
+        return lengths
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        readers = [executor.submit(read, i) for i in range(4)]
+        list(executor.map(write, range(16)))
+        for reader in readers:
+            reader.result()
+
+    assert len(cnd) == 16 * 100
+    assert sum(1 for _ in cnd) == 16 * 100
+    assert cnd[3, 7, 199] == 199
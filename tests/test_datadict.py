@@ -1,5 +1,9 @@
 """Tests for the DataDict class"""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import operator
+
 import pytest
 
 from ndicts import DataDict, NestedDict
@@ -47,12 +51,130 @@ def test_arithmetics_extract(dd):
     assert dd * dd_extract == DataDict({"a": {"a": 4, "b": 4}, "b": {"a": 2, "b": 2}})
 
 
+def test_arithmetics_incompatible_keys(dd):
+    with pytest.raises(TypeError, match="incompatible keys"):
+        dd + DataDict({"c": 1})
+    with pytest.raises(TypeError, match="incompatible keys"):
+        dd + DataDict({"a": {"a": {"a": 1}}})
+    with pytest.raises(TypeError):
+        dd + "a"
+
+
+def test_arithmetics_reflected(dd):
+    assert 1 + dd == DataDict.from_product(["ab", "ab"], values=2)
+    assert 3 - dd == DataDict.from_product(["ab", "ab"], values=2)
+    assert 2 / dd == DataDict.from_product(["ab", "ab"], values=2.0)
+    assert 2**dd == DataDict.from_product(["ab", "ab"], values=2)
+    assert 0.5 + dd == DataDict.from_product(["ab", "ab"], values=1.5)
+
+
+def test_arithmetics_fill_value(dd):
+    other = DataDict({"a": 1, "c": {"a": 2}})
+    assert dd.sub(DataDict({"a": 1}), fill_value=1) == DataDict.from_product(["ab", "ab"], values=0)
+    assert dd.add(other, fill_value=0, how="outer") == DataDict(
+        {"a": {"a": 2, "b": 2}, "b": {"a": 1, "b": 1}, "c": {"a": 2}}
+    )
+    with pytest.raises(TypeError, match="incompatible keys"):
+        dd.add(other)
+    with pytest.raises(ValueError):
+        dd.add(other, how="outer")
+
+
+def test_arithmetics_result_is_independent(dd):
+    dd_extract = dd.extract["a"]
+    result = dd - dd_extract
+    result["b", "a"] = 5
+    assert dd["b", "a"] == 1
+
+
+def test_arithmetics_share_subtrees(dd):
+    result = dd - dd.extract["a"]
+    assert result._tree["b"] is dd._tree["b"]
+    result["b", "a"] = 5
+    dd["b", "b"] = 6
+    assert dd == DataDict({"a": {"a": 1, "b": 1}, "b": {"a": 1, "b": 6}})
+    assert result == DataDict({"a": {"a": 0, "b": 0}, "b": {"a": 5, "b": 1}})
+
+
+def test_inplace_arithmetics(dd):
+    tree = dd._tree
+    dd += dd
+    dd *= DataDict({"a": 3})
+    dd -= 1
+    dd **= DataDict({"b": {"a": 2}})
+    dd /= 1
+    assert dd == DataDict({"a": {"a": 5.0, "b": 5.0}, "b": {"a": 1.0, "b": 1.0}})
+    assert dd._tree is tree
+
+    with pytest.raises(TypeError, match="incompatible keys"):
+        dd += DataDict({"c": 1})
+    assert dd == DataDict({"a": {"a": 5.0, "b": 5.0}, "b": {"a": 1.0, "b": 1.0}})
+    with pytest.raises(TypeError):
+        dd += "a"
+
+
+def test_inplace_arithmetics_copy_on_write(dd):
+    dd_copy = dd.copy(cow=True)
+    dd_copy += DataDict({"a": 1})
+    assert dd == DataDict.from_product(["ab", "ab"], values=1)
+    assert dd_copy == DataDict({"a": {"a": 2, "b": 2}, "b": {"a": 1, "b": 1}})
+    assert dd_copy._tree["b"] is dd._tree["b"]
+
+
 def test_apply(dd):
     assert dd.apply(lambda x: 2 * x + 1) == DataDict.from_product(["ab", "ab"], values=3)
     dd.apply(lambda x: 2 * x + 1, inplace=True)
     assert dd == DataDict.from_product(["ab", "ab"], values=3)
 
 
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_apply_parallel(level):
+    dd = DataDict.from_product(["abc", range(10), "xy"], values=range(-30, 30))
+    dd["d"] = -1
+    dd["e", 0] = {}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        result = dd.apply(abs, executor=executor, level=level)
+        assert list(result.items()) == list(dd.apply(abs).items())
+        assert isinstance(result, DataDict)
+
+        dd_copy = dd.copy(cow=True)
+        dd_copy.apply(abs, inplace=True, executor=executor, level=level)
+        assert dd_copy == result
+        assert dd["a", 0, "x"] == -30
+        assert len(dd_copy) == len(dd)
+
+
+def test_apply_processes(dd):
+    assert dd.apply(abs, workers=2) == dd.apply(abs)
+
+
+@pytest.mark.parametrize("level", [1, 2])
+def test_reduce_parallel(level):
+    dd = DataDict.from_product(["abc", range(10)], values=range(30))
+    dd["d", 0] = {}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        assert dd.reduce(operator.add, executor=executor, level=level) == dd.reduce(operator.add)
+        assert dd.reduce(operator.add, 5, executor=executor, level=level) == dd.reduce(operator.add) + 5
+        assert dd.reduce(max, executor=executor, level=level) == 29
+        assert dd.total(executor=executor, level=level) == dd.total()
+        assert dd.std(executor=executor, level=level) == pytest.approx(dd.std())
+        assert dd.var(ddof=0, executor=executor, level=level) == pytest.approx(dd.var(ddof=0))
+        stats = dd.stats(sketch_size=8, executor=executor, level=level)
+        assert (stats.count, stats.min, stats.max) == (30, 0, 29)
+        assert DataDict().total(executor=executor) == 0
+        with pytest.raises(TypeError):
+            DataDict().reduce(operator.add, executor=executor)
+
+
+def test_apply_async(dd):
+    async def double(value):
+        return 2 * value
+
+    result = asyncio.run(dd.apply_async(double))
+    assert isinstance(result, DataDict)
+    assert result == dd * 2
+
+
 def test_reduce(dd):
     assert dd.reduce(lambda x, y: x + y) == sum(dd.values())
     assert dd.reduce(lambda x, y: x + y, 3) == sum(dd.values()) + 3
@@ -66,5 +188,78 @@ def test_mean(dd):
     assert dd.mean() == 1
 
 
+def test_mean_after_mutation_through_reference():
+    d = {"a": {"x": 1}, "b": 2}
+    dd = DataDict(d)
+    assert dd.mean() == 1.5
+    d["a"]["y"] = 6
+    assert dd.mean() == 3
+    dd["b"] = {"x": 2}
+    dd["b"]["y"] = 3
+    assert dd.mean() == 3
+
+
 def test_std(dd):
     assert dd.std() == 0
+
+
+def test_var(dd):
+    dd["a", "a"] = 3
+    assert dd.var() == pytest.approx(1)
+    assert dd.var(ddof=0) == pytest.approx(0.75)
+
+
+def test_min_max_count(dd):
+    dd["a", "a"] = 3
+    assert dd.min() == 1
+    assert dd.max() == 3
+    assert dd.count() == 4
+
+
+def test_describe(dd):
+    assert dd.describe() == {
+        "count": 4, "mean": 1, "std": 0, "min": 1, "25%": 1, "50%": 1, "75%": 1, "max": 1
+    }
+    assert dd.quantile(0.5) == 1
+
+
+def test_groupby():
+    dd = DataDict.from_product(["ab", "xy", "uv"], values=range(8))
+    assert dd.groupby(0).sum() == DataDict({"a": 6, "b": 22})
+    assert dd.groupby(1).mean() == DataDict({"x": 2.5, "y": 4.5})
+    assert dd.groupby([0, 2]).count() == DataDict.from_product(["ab", "uv"], values=2)
+    assert dd.groupby(-1).min() == DataDict({"u": 0, "v": 1})
+    assert dd.groupby((2, 0)).max() == DataDict({"u": {"a": 2, "b": 6}, "v": {"a": 3, "b": 7}})
+    assert dd.groupby(0).agg(sorted) == DataDict({"a": [0, 1, 2, 3], "b": [4, 5, 6, 7]})
+
+
+def test_groupby_errors(dd):
+    dd["c"] = 1
+    with pytest.raises(ValueError):
+        dd.groupby(1).sum()
+    with pytest.raises(ValueError):
+        dd.groupby([])
+
+
+def test_ndarray():
+    np = pytest.importorskip("numpy")
+    dd = DataDict.from_product(["ab", "xyz"], values=range(6))
+    array, labels = dd.to_ndarray(dtype=float)
+    assert array.dtype == float
+    assert labels == [["a", "b"], ["x", "y", "z"]]
+    assert (array == np.arange(6).reshape(2, 3)).all()
+    assert DataDict.from_ndarray(array, labels) == dd
+
+    # Keys out of the order of the product
+    shuffled = DataDict({"b": {"y": 4, "x": 3}, "a": {"x": 0, "y": 1}})
+    array, labels = shuffled.to_ndarray()
+    assert labels == [["b", "a"], ["y", "x"]]
+    assert array.tolist() == [[4, 3], [1, 0]]
+    assert DataDict.from_ndarray(array, labels) == shuffled
+
+    assert DataDict.from_ndarray([[1, 2]]) == DataDict({0: {0: 1, 1: 2}})
+    for not_product in [DataDict({"a": {"x": 0}, "b": {"y": 1}}), DataDict({"a": {"x": 0}, "b": 1}), DataDict()]:
+        with pytest.raises(ValueError):
+            not_product.to_ndarray()
+    with pytest.raises(ValueError):
+        DataDict.from_ndarray(np.zeros((2, 2)), labels=["abc", "xy"])
@@ -0,0 +1,87 @@
+"""Tests for the FrozenNestedDict class"""
+
+import pickle
+
+import pytest
+
+from ndicts import FrozenNestedDict, NestedDict
+
+
+@pytest.fixture
+def nd():
+    return NestedDict({"a": {"x": 0, "y": {"u": 1, "v": [2]}}, "b": 3, "c": {}, "d": {"x": 4}})
+
+
+def test_read_api(nd):
+    fnd = FrozenNestedDict(nd)
+    assert len(fnd) == len(nd)
+    assert list(fnd) == list(nd)
+    assert list(fnd.items()) == list(nd.items())
+    assert list(fnd.values()) == list(nd.values())
+    assert list(fnd.rows()) == list(nd.rows())
+    assert fnd.to_dict() == {key: value for key, value in nd.to_dict().items() if value != {}}
+    assert fnd.to_nested_dict() == nd
+    assert fnd == nd
+    for key in nd:
+        assert fnd[key] == nd[key]
+        assert key in fnd
+    assert fnd["a", "y"] == FrozenNestedDict({"u": 1, "v": [2]})
+    assert isinstance(fnd["a"], FrozenNestedDict)
+    assert fnd.get(("a", "z"), "missing") == "missing"
+    assert ("a", "y") in fnd
+    for missing in [("z",), ("a", "z"), ("b", "x"), ("a", "y", "v", 0), ([],)]:
+        assert missing not in fnd
+        with pytest.raises(KeyError):
+            fnd[missing]
+    assert list(fnd.walk(max_depth=1)) == [
+        (key, FrozenNestedDict(value) if isinstance(value, dict) else value)
+        for key, value in nd.walk(max_depth=1)
+        if value != {}
+    ]
+
+
+def test_immutable(nd):
+    fnd = FrozenNestedDict(nd)
+    with pytest.raises(TypeError):
+        fnd["a", "x"] = 1
+    with pytest.raises(TypeError):
+        del fnd["b"]
+    with pytest.raises(AttributeError):
+        fnd.attribute = 1
+    assert fnd.copy() is fnd
+    nd["a", "x"] = 10
+    assert fnd["a", "x"] == 0
+
+
+def test_hash(nd):
+    with pytest.raises(TypeError):
+        hash(FrozenNestedDict(nd))
+    del nd["a", "y", "v"]
+    fnd = FrozenNestedDict(nd)
+    same = FrozenNestedDict({"d": {"x": 4}, "b": 3, "a": {"y": {"u": 1}, "x": 0}})
+    assert hash(fnd) == hash(same)
+    assert fnd == same
+    assert fnd != FrozenNestedDict({"b": 3})
+    assert fnd != FrozenNestedDict({"d": {"x": 4}, "b": 3, "a": {"y": {"u": 2}, "x": 0}})
+    assert len({fnd, same, FrozenNestedDict(fnd)}) == 1
+
+
+def test_shared_layouts():
+    fnd = FrozenNestedDict(NestedDict.from_product(["abc", "xyz"], values=range(9)))
+    assert fnd["a"]._root.positions is fnd["b"]._root.positions
+    assert FrozenNestedDict({"key" + "1": 0})._root.positions.keys() == {"key1"}
+
+
+def test_extract(nd):
+    fnd = FrozenNestedDict(nd)
+    for key in ["a", ("a", "y"), ("", "x"), ("a", ""), ("", "", "u"), "b"]:
+        assert fnd.extract[key] == nd.extract[key]
+    assert fnd.extract["a"]["a"]._root is fnd["a"]._root
+    assert fnd.extract["", "z"] == FrozenNestedDict()
+    with pytest.raises(KeyError):
+        fnd.extract["z"]
+
+
+def test_pickle(nd):
+    fnd = FrozenNestedDict(nd)
+    assert pickle.loads(pickle.dumps(fnd)) == fnd
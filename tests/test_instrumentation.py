@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from ndicts import DataDict, Instrumentation, NestedDict
+from ndicts import data_dict, instrumentation, nested_dict
+
+
+def test_disabled():
+    getitem = NestedDict.__dict__["__getitem__"]
+    walk = nested_dict._walk
+    stats = Instrumentation()
+    with stats:
+        assert NestedDict.__dict__["__getitem__"] is not getitem
+        assert nested_dict._walk is not walk
+        assert data_dict._walk is nested_dict._walk
+    assert NestedDict.__dict__["__getitem__"] is getitem
+    assert nested_dict._walk is walk
+    assert data_dict._walk is walk
+    assert not stats.enabled
+
+    NestedDict({"a": 0}).copy()
+    assert stats.summary() == {
+        "node_visits": 0, "traversals": 0, "deepcopies": 0, "bytes_copied": 0, "calls": {}, "time": {}
+    }
+
+
+def test_counters():
+    nd = NestedDict.from_product(["ab", "xyz"], values=0)
+    with Instrumentation() as stats:
+        list(nd.items())
+        nd.extract["", "x"]
+        nd_copy = nd.copy()
+        nd_cow = nd.copy(cow=True)
+        nd_cow["a", "x"] = 1
+    assert stats.traversals >= 2
+    assert stats.node_visits >= 6 + 2
+    assert stats.deepcopies == 1
+    assert stats.bytes_copied > 0
+    assert stats.calls["NestedDict.copy"] == 2
+    assert stats.calls["NestedDict.__setitem__"] >= 1
+    assert set(stats.time) == set(stats.calls)
+    assert nd_copy == nd
+
+    stats.reset()
+    assert stats.traversals == 0
+
+
+def test_data_dict():
+    dd = DataDict.from_product(["ab", "xy"], values=1.0)
+    with Instrumentation() as stats:
+        dd + dd
+        dd * 2
+        dd.std()
+    assert stats.calls["_Arithmetics.__add__"] == 1
+    assert stats.calls["DataDict._arithmetic_operation"] == 2
+    assert stats.calls["DataDict.std"] == 1
+    assert stats.bytes_copied > 0
+
+
+def test_nested_and_callback():
+    events = []
+    outer = Instrumentation(callback=lambda *event: events.append(event))
+    with outer:
+        NestedDict({"a": {"x": 0}}).copy()
+        with Instrumentation() as inner:
+            len(NestedDict({"a": {"x": 0, "y": 1}}))
+        assert outer.enabled
+    assert (inner.traversals, inner.node_visits) == (1, 2)
+    assert outer.deepcopies == 1
+    assert outer.node_visits == 2
+    assert ("traversals", "_count_leaves", 1) in events
+    assert ("deepcopies", "deepcopy", 1) in events
+    assert sum(amount for kind, _, amount in events if kind == "bytes_copied") == outer.bytes_copied
+
+
+def test_threads():
+    getitem = NestedDict.__dict__["__getitem__"]
+    walk = nested_dict._walk
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    barrier = threading.Barrier(8)
+
+    def run():
+        barrier.wait()
+        for _ in range(50):
+            with Instrumentation() as stats:
+                nd["a", "x"]
+                list(nd.items())
+            assert stats.calls["NestedDict.__getitem__"] >= 1
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert NestedDict.__dict__["__getitem__"] is getitem
+    assert nested_dict._walk is walk
+
+
+def test_callback_not_counted():
+    seen = NestedDict()
+
+    def callback(kind, name, amount):
+        seen[kind, name] = seen.get((kind, name), 0) + 1
+
+    with Instrumentation(callback=callback) as stats:
+        NestedDict({"a": {"x": 0}}).copy()
+    assert seen["time", "NestedDict.copy"] == 1
+    assert "NestedDict.__setitem__" not in stats.calls
+
+
+def test_enable_failure(monkeypatch):
+    getitem = NestedDict.__dict__["__getitem__"]
+    walk = nested_dict._walk
+
+    def fail(func):
+        raise RuntimeError
+
+    monkeypatch.setattr(instrumentation, "_counted_own", fail)
+    stats = Instrumentation()
+    with pytest.raises(RuntimeError):
+        stats.enable()
+    assert not stats.enabled
+    assert NestedDict.__dict__["__getitem__"] is getitem
+    assert nested_dict._walk is walk
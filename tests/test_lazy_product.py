@@ -0,0 +1,129 @@
+"""Tests for the LazyProduct class"""
+
+from itertools import product
+
+import pytest
+
+import more_itertools
+
+from ndicts import LazyProduct, NestedDict
+
+ITERABLES = [("A", "B", "C"), ("a", "b"), range(3)]
+
+
+def test_matches_from_product():
+    values = list(range(18))
+    lp = LazyProduct(ITERABLES, values=values)
+    nd = NestedDict.from_product(ITERABLES, values=values)
+    assert len(lp) == len(nd)
+    assert list(lp) == list(nd)
+    assert list(lp.items()) == list(nd.items())
+    assert list(lp.values()) == list(nd.values())
+    assert list(lp.rows()) == list(nd.rows())
+    assert lp.materialize() == nd
+    assert lp.to_dict() == nd.to_dict()
+    for key in product(*ITERABLES):
+        assert lp[key] == nd[key]
+    assert lp["B"] == nd["B"]
+    assert lp["B", "a"] == nd["B", "a"]
+
+
+def test_repeated_keys():
+    iterables = ["aba", "xy"]
+    lp = LazyProduct(iterables, values=range(6))
+    assert lp.materialize() == NestedDict.from_product(iterables, values=range(6))
+
+
+def test_values():
+    assert LazyProduct(["ab", "xy"], values=0)["a", "y"] == 0
+    assert LazyProduct(["ab", "xy"], values="xyz")["a", "y"] == "xyz"
+    assert LazyProduct(["ab", "xy"], values=lambda key: "".join(key))["b", "x"] == "bx"
+    with pytest.raises(more_itertools.UnequalIterablesError):
+        LazyProduct(["ab", "xy"], values=range(3))
+
+
+def test_contains():
+    lp = LazyProduct(ITERABLES)
+    assert ("A", "a", 0) in lp
+    assert ("A", "a") in lp
+    assert "A" in lp
+    assert ("D",) not in lp
+    assert ("A", "a", 3) not in lp
+    assert ("A", "a", 0, 0) not in lp
+    assert ([],) not in lp
+    with pytest.raises(KeyError):
+        lp["A", "a", 3]
+
+
+def test_set_delete():
+    lp = LazyProduct(ITERABLES, values=0)
+    nd = NestedDict.from_product(ITERABLES, values=0)
+    for mapping in lp, nd:
+        mapping["A", "a", 0] = 1
+        del mapping["B", "b", 1]
+        del mapping["C", "a"]
+        mapping["C", "a", 2] = 2
+        mapping["D", "d"] = 3
+        mapping["A", "b"] = 4
+        mapping["B", "a"] = {"x": 5, "y": {"z": 6}}
+    assert len(lp) == len(nd)
+    assert lp.materialize() == nd
+    assert dict(lp.items()) == dict(nd.items())
+    for key in nd:
+        assert lp[key] == nd[key]
+
+    with pytest.raises(KeyError):
+        del lp["C", "a", 0]
+    with pytest.raises(TypeError):
+        lp["A", "a", 0, "x"] = 1
+
+    del lp["B"]
+    del nd["B"]
+    assert len(lp) == len(nd)
+    assert lp.materialize() == nd
+
+
+def test_set_leaf_and_subtree():
+    lp = LazyProduct(ITERABLES, values=0)
+    nd = NestedDict.from_product(ITERABLES, values=0)
+    for mapping in lp, nd:
+        mapping["A", "a", 0] = {"u": 1}
+        mapping["A", "a", 0, "v"] = 2
+        mapping["A", "a", 1] = {"u": 3}
+        mapping["A", "a", 1] = 4
+    assert len(lp) == len(nd)
+    assert lp.materialize() == nd
+
+    lp = LazyProduct(["ab"], values=0)
+    del lp["a"]
+    lp["a"] = {"u": 1}
+    lp["a"] = 5
+    assert len(lp) == 2
+    assert dict(lp.items()) == {("a",): 5, ("b",): 0}
+
+
+def test_extract():
+    lp = LazyProduct(ITERABLES, values=range(18))
+    nd = NestedDict.from_product(ITERABLES, values=range(18))
+    for key in ["A", ("A", "b"), ("", "b"), ("", "", 2), ("B", "", 0)]:
+        assert lp.extract[key].materialize() == nd.extract[key]
+        assert len(lp.extract[key]) == len(nd.extract[key])
+    with pytest.raises(KeyError):
+        lp.extract["D"]
+
+    del lp["A", "b", 0]
+    del nd["A", "b", 0]
+    lp["A", "x"] = 1
+    nd["A", "x"] = 1
+    assert lp.extract["A"].materialize() == nd.extract["A"]
+    assert len(lp.extract["A"]) == len(nd.extract["A"])
+    assert lp.extract["B"].materialize() == nd.extract["B"]
+
+
+def test_large():
+    lp = LazyProduct([range(1000)] * 3, values=lambda key: sum(key))
+    assert len(lp) == 10**9
+    assert lp[999, 1, 2] == 1002
+    del lp[999]
+    assert len(lp) == 10**9 - 10**6
+    assert 999 not in lp
@@ -1,12 +1,16 @@
 """Tests for the NestedDict class"""
 
+import asyncio
 from itertools import product
+import sys
+
 import pytest
 
 import more_itertools
 
 from ndicts import __version__
 from ndicts import NestedDict
+from ndicts.nested_dict import _build_index
 
 
 def test_init():
@@ -37,6 +41,29 @@ def test_init_classmethods():
     assert NestedDict.from_product(iterables, values=0) == NestedDict.from_tuples(tuples, values=0)
 
 
+def test_from_tuples_bulk():
+    tuples = [("a", "x", "u"), ("a", "x", "v"), ("b", "x"), ("a", "y"), ("a", "x", "u"), "c", ("b",)]
+    nd = NestedDict.from_tuples(tuples, values=range(7))
+    expected = NestedDict()
+    for key, value in zip(tuples, range(7)):
+        expected[key] = value
+    assert nd.to_dict() == expected.to_dict()
+    assert len(nd) == len(expected) == 5
+    assert nd._length == 5
+
+
+def test_from_product_bulk():
+    iterables = [["a", "b", "a"], "xy", range(2)]
+    nd = NestedDict.from_product(iterables, values=range(12))
+    expected = NestedDict.from_tuples(product(*iterables), values=range(12))
+    assert nd.to_dict() == expected.to_dict()
+    assert nd._length == len(expected) == 8
+
+    assert NestedDict.from_product(["ab", ""], values=0) == NestedDict()
+    with pytest.raises(more_itertools.UnequalIterablesError):
+        NestedDict.from_product(["ab", ""], values=[0])
+
+
 def test_getitem():
     nd = NestedDict({"a": {"a": 0}})
     assert nd["a", "a"] == 0
@@ -110,11 +137,44 @@ def test_iter_items():
         assert value is None
 
 
+def test_views_match_lookups():
+    nd = NestedDict({"a": {"a": 0, "b": {"c": 1}}, "b": 2, "c": {}})
+    assert list(nd.values()) == [nd[key] for key in nd]
+    assert list(nd.items()) == [(key, nd[key]) for key in nd]
+    assert (("a", "b", "c"), 1) in nd.items()
+    assert 2 in nd.values()
+
+
 def test_len():
     assert len(NestedDict()) == 0
     assert len(NestedDict.from_product(["ab", "ab"])) == 4
 
 
+def test_len_tracks_mutations():
+    nd = NestedDict.from_product(["ab", "ab"])
+    nd["a", "a"] = 1
+    assert len(nd) == 4
+    nd["c"] = 0
+    assert len(nd) == 5
+    nd["a"] = 0
+    assert len(nd) == 4
+    del nd["b", "a"]
+    assert len(nd) == 3
+    del nd["b"]
+    assert len(nd) == 2
+    nd["d"] = {"a": 0, "b": {"c": 0}}
+    assert len(nd) == 4
+
+
+def test_len_after_direct_mutation():
+    nd = NestedDict({"a": {"a": 0}})
+    assert len(nd) == 1
+    nd._ndict["b"] = 0
+    assert len(nd) == 2
+    nd["a"]["b"] = 0
+    assert len(nd) == 3
+
+
 def test_bool():
     assert bool(NestedDict()) is False
     assert bool(NestedDict.from_tuples("a")) is True
@@ -131,6 +191,97 @@ def test_extract():
     assert nd.extract["", "x"] == NestedDict.from_product(["ab", "x"])
 
 
+def test_extract_wildcard_deep():
+    nd = NestedDict({"a": {"x": {"u": 0}, "y": 1}, "b": {"x": 2}, "c": 3})
+    assert nd.extract["", "x"] == NestedDict({"a": {"x": {"u": 0}}, "b": {"x": 2}})
+    assert nd.extract["", "", "u"] == NestedDict({"a": {"x": {"u": 0}}})
+    assert nd.extract["", "z"] == NestedDict()
+
+
+def test_extract_with_index():
+    nd = NestedDict.from_product(["ab", "xy", "uv"], values=0)
+    nd.build_index()
+    nd["c", "x"] = 1
+    nd["a", "y", "u"] = {"w": 2}
+    nd["b", "x"] = 3
+    del nd["a", "x"]
+    del nd["b", "y", "u"]
+    expected = NestedDict(nd.to_dict())
+    for pattern in [("", "x"), ("", "y", "v"), ("a", "", "u"), ("", "", "u", "w"), ("", "z")]:
+        assert nd.extract[pattern] == expected.extract[pattern]
+    assert nd._index == _build_index(nd.to_dict())
+
+    nd._ndict["d"] = {"x": 4}
+    assert nd.extract["", "x"] == NestedDict({"b": {"x": 3}, "c": {"x": 1}, "d": {"x": 4}})
+
+    nd.drop_index()
+    nd["e"] = 5
+    assert nd._index is None
+
+
+def test_extract_with_index_and_references():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    nd.build_index()
+    index = nd._index
+    subtree = nd["a"]
+    nd.extract["b"]
+    assert nd._index is index
+    subtree["z"] = 1
+    subtree["w"] = {"z": 2}
+    del subtree["x"]
+    assert nd.extract["", "z"] == NestedDict({"a": {"z": 1}})
+    assert nd.extract["", "", "z"] == NestedDict({"a": {"w": {"z": 2}}})
+    assert nd.extract["", "x"] == NestedDict({"b": {"x": 0}})
+    assert nd._index is index
+
+    del nd["a"]
+    nd["a", "y"] = 3
+    assert nd.extract["", "x"] == NestedDict({"b": {"x": 0}})
+    assert nd.extract["", "y"] == NestedDict({"a": {"y": 3}, "b": {"y": 0}})
+
+    d = {"a": {"x": 0}}
+    nd = NestedDict(d)
+    nd.build_index()
+    d["b"] = {"x": 1}
+    assert nd.extract["", "x"] == NestedDict({"a": {"x": 0}, "b": {"x": 1}})
+
+
+def test_copy_with_index_and_references():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    nd.build_index()
+    subtree = nd["a"]
+    subtree["z"] = 1
+    nd_copy = nd.copy()
+    assert nd_copy.extract["", "z"] == NestedDict({"a": {"z": 1}})
+    assert len(nd_copy) == 5
+
+
+def test_walk():
+    nd = NestedDict({"a": {"aa": 0, "ab": {"aba": 1}}, "b": 2, "c": {}})
+    assert list(nd.walk()) == list(nd.items())
+    assert list(nd.walk(max_depth=1)) == [(("a",), nd["a"]), (("b",), 2), (("c",), {})]
+    assert [key for key, _ in nd.walk(preorder=True)] == [
+        ("a",), ("a", "aa"), ("a", "ab"), ("a", "ab", "aba"), ("b",), ("c",)
+    ]
+    assert [key for key, _ in nd.walk(max_depth=2, preorder=True)] == [
+        ("a",), ("a", "aa"), ("a", "ab"), ("b",), ("c",)
+    ]
+
+
+def test_deep_traversal():
+    depth = 5 * sys.getrecursionlimit()
+    nd = NestedDict()
+    nd[("a",) * depth] = 0
+    nd["b"] = 1
+    assert list(nd) == [("a",) * depth, ("b",)]
+    assert list(nd.values()) == [0, 1]
+    assert len(nd) == 2
+    assert list(nd.rows())[-1] == ("b", 1)
+    assert list(nd.extract["", "a"].values()) == [0]
+    del nd[("a",) * depth]
+    assert list(nd) == [("b",)]
+
+
 def test_rows():
     nd = NestedDict.from_product(["abc", "xyz"], values=0)
     data = [row for row in nd.rows()]
@@ -138,6 +289,395 @@ def test_rows():
     assert data == data_check
 
 
+def test_columns():
+    nd = NestedDict({"a": {"x": {"u": 0}, "y": 1}, "b": 2, "c": {}, "d": {"x": {"v": 3}}})
+    columns = nd.to_columns()
+    assert columns == [list(column) for column in zip(*[
+        (*key, *[None] * (3 - len(key)), value) for key, value in nd.items()
+    ])]
+    assert NestedDict.from_columns(columns) == nd
+    assert NestedDict().to_columns() == [[]]
+    assert NestedDict.from_columns([[]]) == NestedDict()
+
+    nd = NestedDict.from_product(["abc", "xyz"], values=range(9))
+    assert nd.to_columns() == [list(column) for column in zip(*nd.rows())]
+    assert NestedDict.from_columns(nd.to_columns()) == nd
+
+    with pytest.raises(more_itertools.UnequalIterablesError):
+        NestedDict.from_columns([["a", "b"], [0]])
+    with pytest.raises(ValueError):
+        NestedDict.from_columns([[0]])
+
+
+def test_accessor():
+    nd = NestedDict({"a": {"b": {"c": 0, "d": 1}}, "x": 2})
+    abc = nd.accessor(("a", "b", "c"))
+    assert abc.get() == 0
+    abc.set(10)
+    assert nd["a", "b", "c"] == 10
+    assert len(nd) == 3
+
+    # The cached node is dropped when the structure changes
+    del nd["a"]
+    assert abc.get(default=None) is None
+    with pytest.raises(KeyError):
+        abc.get()
+    abc.set(20)
+    assert nd["a", "b", "c"] == 20
+    nd["a"] = {"b": {"c": 30}}
+    assert abc.get() == 30
+    assert len(nd) == 2
+
+    # Subtrees are handed out as by __getitem__
+    ab = nd.accessor(("a", "b"))
+    assert ab.get() == {"c": 30}
+    ab.set(1)
+    assert nd.to_dict() == {"a": {"b": 1}, "x": 2}
+    assert len(nd) == 2
+    with pytest.raises(KeyError):
+        abc.get()
+    assert nd.accessor(([],)).get(0) == 0
+
+    with pytest.raises(ValueError):
+        nd.accessor()
+
+
+def test_accessor_batch():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    nd.build_index()
+    batch = nd.accessor(("a", "x"), ("b", "y"), ("c", "z"))
+    assert batch.get(default=None) == (0, 0, None)
+    batch.set([1, 2, 3])
+    assert batch.get() == (1, 2, 3)
+    assert len(nd) == 5
+    assert nd.extract["", "z"] == NestedDict({"c": {"z": 3}})
+    with pytest.raises(more_itertools.UnequalIterablesError):
+        batch.set([1, 2])
+
+
+def test_accessor_copy_on_write():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    ax = nd.accessor(("a", "x"))
+    ax.get()
+    copy = nd.copy(cow=True)
+    ax.set(1)
+    copy.accessor(("a", "x")).set(2)
+    assert nd["a", "x"] == 1
+    assert copy["a", "x"] == 2
+    assert nd["b"] is not copy["b"]
+
+
+def test_accessor_with_references():
+    d = {"a": {"b": {"x": 0}}}
+    nd = NestedDict(d)
+    abx = nd.accessor(("a", "b", "x"))
+    assert abx.get() == 0
+    d["a"]["b"] = {"x": 1}
+    assert abx.get() == 1
+    abx.set(2)
+    assert d == {"a": {"b": {"x": 2}}}
+
+    nd = NestedDict({"a": {"b": {"x": 0}}, "c": {"x": 0}}, copy=True)
+    abx, cx = nd.accessor(("a", "b", "x")), nd.accessor(("c", "x"))
+    assert (abx.get(), cx.get()) == (0, 0)
+    nd["a"]["b"] = {"x": 3}
+    nd["c"]["x"] = 4
+    assert (abx.get(), cx.get()) == (3, 4)
+    assert cx._version == nd._version
+
+
+def test_reads_keep_caches():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    bx = nd.accessor(("b", "x"))
+    bx.get()
+    digest = nd.digest()
+    version, digests = nd._version, dict(nd._digests)
+    for _ in range(2):
+        a = nd["a"]
+        nd.accessor(("a",)).get()
+    assert nd._version == version
+    assert bx._version == version
+    assert nd._digests.keys() == digests.keys() - {id(nd._tree)}
+
+    a["x"] = 1
+    assert bx.get() == 0
+    assert nd.digest() != digest
+    assert nd == NestedDict.from_tuples([("a", "x"), ("a", "y"), ("b", "x"), ("b", "y")], [1, 0, 0, 0])
+    nd["a"] = {"x": 0, "y": 0}
+    assert nd.digest() == digest
+    a["y"] = 2
+    assert nd.digest() == digest
+    assert len(nd) == 4
+
+
+def test_get_many():
+    nd = NestedDict({"a": {"x": 0, "y": {"u": 1}}, "b": 2})
+    keys = [("b",), ("a", "y", "u"), "b", ("a", "x")]
+    assert nd.get_many(keys) == [nd[key] for key in keys]
+    assert nd.get_many([("a", "y")]) == [{"u": 1}]
+    assert nd.get_many([("a", "z"), ("b", "z"), ([],)], default=None) == [None, None, None]
+    with pytest.raises(KeyError):
+        nd.get_many([("a", "x"), ("a", "z")])
+
+
+@pytest.mark.parametrize("cow", [False, True])
+@pytest.mark.parametrize("indexed", [False, True])
+def test_set_many(cow, indexed):
+    nd = NestedDict({"a": {"x": 0, "y": {"u": 1}}, "b": 2})
+    expected = nd.copy()
+    if indexed:
+        nd.build_index()
+    copy = nd.copy(cow=True) if cow else None
+    keys = [("a", "x"), ("a", "y"), ("a", "w", "v"), ("c", "d", "e"), ("c", "d", "f"), "b", ("c", "g")]
+    values = [10, 11, 12, {"h": 13}, 14, 15, 16]
+    nd.set_many(keys, values)
+    for key, value in zip(keys, values):
+        expected[key] = value
+    assert nd == expected
+    assert len(nd) == len(expected)
+    assert nd.extract["", "d"] == expected.extract["", "d"]
+    if cow:
+        assert copy == NestedDict({"a": {"x": 0, "y": {"u": 1}}, "b": 2})
+
+    nd.set_many([("a", "x"), ("b",)], values=0)
+    assert nd.get_many([("a", "x"), ("b",)]) == [0, 0]
+    with pytest.raises(more_itertools.UnequalIterablesError):
+        nd.set_many([("a", "x"), ("b",)], values=[1])
+
+
+@pytest.mark.parametrize("cow", [False, True])
+@pytest.mark.parametrize("indexed", [False, True])
+def test_delete_many(cow, indexed):
+    nd = NestedDict.from_product(["ab", "xy", "uv"], values=range(8))
+    expected = nd.copy()
+    if indexed:
+        nd.build_index()
+    copy = nd.copy(cow=True) if cow else None
+    keys = [("a", "x", "u"), ("a", "x", "v"), ("a", "y"), ("b", "x", "u"), ("b", "y", "u"), ("b", "y", "v")]
+    nd.delete_many(keys)
+    for key in keys:
+        del expected[key]
+    assert nd.to_dict() == expected.to_dict() == {"b": {"x": {"v": 5}}}
+    assert len(nd) == 1
+    assert nd.extract["", "", "v"] == expected
+    if cow:
+        assert copy == NestedDict.from_product(["ab", "xy", "uv"], values=range(8))
+
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    with pytest.raises(KeyError):
+        nd.delete_many([("a", "x"), ("a", "y"), ("a", "x")])
+    assert nd.to_dict() == {"b": {"x": 0, "y": 0}}
+    with pytest.raises(KeyError):
+        nd.delete_many([("b", "x", "z")])
+    nd.delete_many(["b"])
+    assert nd.to_dict() == {}
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_merge(indexed):
+    nd = NestedDict({"a": {"x": 0, "y": {"z": 1}}, "b": 2, "c": 3})
+    if indexed:
+        nd.build_index()
+    nd.merge({"a": {"x": 4, "y": 5}, "b": {"x": 6}, "d": {"x": 7}})
+    assert nd == NestedDict({"a": {"x": 4, "y": 5}, "b": {"x": 6}, "c": 3, "d": {"x": 7}})
+    assert len(nd) == 5
+    assert nd.extract["", "x"] == NestedDict({"a": {"x": 4}, "b": {"x": 6}, "d": {"x": 7}})
+
+    nd.merge(NestedDict({"a": {"x": 0}, "c": {"x": 1}, "e": 8}), strategy="keep")
+    assert nd == NestedDict({"a": {"x": 4, "y": 5}, "b": {"x": 6}, "c": 3, "d": {"x": 7}, "e": 8})
+    assert len(nd) == 6
+
+    nd.merge({"a": {"x": 1}, "b": {"x": 1}}, strategy=lambda value, other_value: value + other_value)
+    assert nd["a", "x"] == 5
+    assert nd["b", "x"] == 7
+
+    nd.merge({"a": {"x": 5}, "f": 9}, strategy="raise")
+    assert nd["f"] == 9
+    with pytest.raises(ValueError):
+        nd.merge({"g": 10, "a": {"x": 0}, "h": 11}, strategy="raise")
+    assert nd["g"] == 10
+    assert "h" not in nd
+    assert len(nd) == 8
+    with pytest.raises(ValueError):
+        nd.merge({}, strategy="unknown")
+
+
+def test_merge_copy_on_write():
+    nd = NestedDict({"a": {"x": 0}})
+    other = NestedDict({"a": {"y": 1}, "b": {"x": {"y": 2}}}, copy=True)
+    nd.merge(other)
+    assert nd._tree["b"] is other._tree["b"]
+    nd["b", "x", "y"] = 3
+    other["b", "x", "z"] = 4
+    assert nd == NestedDict({"a": {"x": 0, "y": 1}, "b": {"x": {"y": 3}}})
+    assert other == NestedDict({"a": {"y": 1}, "b": {"x": {"y": 2, "z": 4}}})
+
+    nd_copy = nd.copy(cow=True)
+    nd_copy.merge(NestedDict({"b": {"x": {"y": 5}}}))
+    assert nd["b", "x", "y"] == 3
+    assert nd_copy["b", "x", "y"] == 5
+
+
+def test_merge_overwrite_with_referenced_subtree():
+    nd = NestedDict({"a": 0, "b": 1}, copy=True)
+    other = NestedDict({"a": {"x": 1}, "b": {"x": 2}}, copy=True)
+    a, b = other["a"], other["b"]
+    nd.merge(other)
+    nd.merge(NestedDict({"b": 3}, copy=True))
+    nd.merge(other, strategy=lambda value, other_value: other_value)
+    a["y"] = 4
+    b["y"] = 5
+    assert nd == NestedDict({"a": {"x": 1}, "b": {"x": 2}})
+    assert len(nd) == 2
+
+
+def test_apply_async():
+    running = []
+
+    async def double(value):
+        running.append(1)
+        assert len(running) <= 3
+        try:
+            await asyncio.sleep(0.001 * (value % 3))
+        finally:
+            running.pop()
+        if value == 7:
+            raise ValueError(value)
+        return 2 * value
+
+    nd = NestedDict.from_product([range(4), range(5)], values=range(20))
+    expected = NestedDict()
+    expected.set_many(*zip(*[(key, 2 * value) for key, value in nd.items() if value != 7]))
+    result = asyncio.run(nd.apply_async(double, concurrency=3, return_exceptions=True))
+    assert list(result) == list(nd)
+    assert isinstance(result[1, 2], ValueError)
+    del result[1, 2]
+    assert result == expected
+    assert nd[1, 2] == 7
+
+    with pytest.raises(ValueError):
+        asyncio.run(nd.apply_async(double, concurrency=3))
+
+    nd_copy = nd.copy(cow=True)
+    del nd_copy[1, 2]
+    assert asyncio.run(nd_copy.apply_async(double, concurrency=3, inplace=True)) is None
+    assert nd_copy == expected
+    assert nd[0, 1] == 1
+
+    with pytest.raises(ValueError):
+        asyncio.run(nd.apply_async(double, concurrency=0))
+
+
+def test_apply_async_batches():
+    calls = []
+
+    async def lookup(values):
+        calls.append(len(values))
+        await asyncio.sleep(0)
+        return [str(value) for value in values]
+
+    nd = NestedDict({"a": {"x": 0, "y": 1}, "b": {"z": 2}, "c": 3})
+    result = asyncio.run(nd.apply_async(lookup, batch_size=3))
+    assert result == NestedDict({"a": {"x": "0", "y": "1"}, "b": {"z": "2"}, "c": "3"})
+    assert sorted(calls) == [1, 3]
+
+    async def wrong(values):
+        return values[:1]
+
+    result = asyncio.run(nd.apply_async(wrong, batch_size=2, return_exceptions=True))
+    assert isinstance(result["a", "x"], more_itertools.UnequalIterablesError)
+
+
+def test_diff():
+    nd = NestedDict({"a": {"x": 0, "y": {"z": 1}}, "b": 2, "c": {"x": 3}})
+    other = NestedDict({"a": {"x": 0, "y": 4}, "b": {"x": 5}, "d": {"x": 6}})
+    assert list(nd.diff(other)) == [
+        ("removed", ("a", "y", "z")),
+        ("added", ("a", "y")),
+        ("removed", ("b",)),
+        ("added", ("b", "x")),
+        ("removed", ("c", "x")),
+        ("added", ("d", "x")),
+    ]
+    assert list(nd.diff(nd.copy())) == []
+    assert list(nd.diff(nd.to_dict())) == []
+
+
+@pytest.mark.parametrize("digest", [False, True])
+def test_diff_copy_on_write(digest):
+    nd = NestedDict({"a": {"x": 0, "y": 1}, "b": {"x": 2}, "c": {}})
+    if digest:
+        nd.digest()
+    nd_copy = nd.copy(cow=True)
+    nd_copy["a", "y"] = 3
+    del nd_copy["b", "x"]
+    assert list(nd.diff(nd_copy)) == [("changed", ("a", "y")), ("removed", ("b", "x"))]
+    assert nd != nd_copy
+
+    nd_copy["a", "y"] = 1
+    nd_copy["b"] = {"x": 2}
+    assert list(nd.diff(nd_copy)) == []
+    assert nd == nd_copy
+    assert nd == NestedDict({"a": {"x": 0, "y": 1}, "b": {"x": 2}})
+
+
+def test_digest():
+    nd = NestedDict({"a": {"x": 0, "y": 1}, "b": 2})
+    other = NestedDict({"b": 2, "a": {"y": 1, "x": 0}, "c": {}})
+    assert nd.digest() == other.digest()
+    assert nd.digest() != NestedDict({"a": {"x": 0, "y": "1"}, "b": 2}).digest()
+
+    nd["a", "x"] = 3
+    assert nd.digest() != other.digest()
+    assert nd != other
+    nd.accessor(("a", "x")).set(0)
+    assert nd.digest() == other.digest()
+    del nd["a"]
+    other.delete_many([("a", "x"), ("a", "y")])
+    assert nd.digest() == other.digest()
+    nd.set_many([("a", "z")], [4])
+    assert nd.digest() != other.digest()
+    assert nd.copy().digest() == nd.digest()
+
+
+class Opaque:
+    """Value whose repr does not identify it."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Opaque) and self.value == other.value
+
+    def __repr__(self):
+        return "Opaque(...)"
+
+
+def test_digest_not_trusted():
+    for value, other_value in [(float("nan"), float("nan")), (Opaque(0), Opaque(1))]:
+        nd = NestedDict.from_tuples([("a", "x"), ("b",)], [value, 0])
+        other = NestedDict.from_tuples([("a", "x"), ("b",)], [other_value, 0])
+        assert nd.digest() == other.digest()
+        assert nd != other
+        assert list(nd.diff(other)) == [("changed", ("a", "x"))]
+
+    d = {"a": {"x": 0}}
+    nd = NestedDict(d)
+    other = NestedDict.from_tuples([("a", "x")], [0])
+    assert nd.digest() == other.digest()
+    assert nd == other
+    d["a"]["x"] = 1
+    assert nd.digest() != other.digest()
+    assert nd != other
+
+
+def test_equal_deep():
+    key = tuple(range(5 * sys.getrecursionlimit()))
+    nd = NestedDict.from_tuples([key, ("a",)], [0, 1])
+    assert nd == NestedDict.from_tuples([("a",), key], [1, 0])
+    assert nd != NestedDict.from_tuples([("a",), key], [1, 2])
+
+
 def test_copy():
     nd = NestedDict.from_tuples([("a", "a"), ("a", "b")])
     nd_copy = nd.copy()
@@ -145,6 +685,119 @@ def test_copy():
     assert nd is not nd_copy
 
 
+def test_copy_on_write():
+    d = {"a": {"a": {"a": 0}, "b": 1}, "b": {"a": 2}}
+    nd = NestedDict(d, copy=True)
+    nd_copy = nd.copy(cow=True)
+    assert nd_copy == nd
+    assert nd_copy._tree is nd._tree
+
+    nd_copy["a", "a", "b"] = 3
+    del nd_copy["b", "a"]
+    nd_copy["a"]["b"] = 4
+    nd["a", "a", "a"] = 5
+    assert nd == NestedDict({"a": {"a": {"a": 5}, "b": 1}, "b": {"a": 2}})
+    assert nd_copy == NestedDict({"a": {"a": {"a": 0, "b": 3}, "b": 4}})
+    assert len(nd) == 3
+    assert len(nd_copy) == 3
+
+    nd_copy_copy = nd_copy.copy(cow=True)
+    nd_copy_copy._ndict["a"]["a"]["a"] = 6
+    assert nd_copy["a", "a", "a"] == 0
+    assert d == {"a": {"a": {"a": 0}, "b": 1}, "b": {"a": 2}}
+
+
+def test_get_shared_subtree():
+    nd = NestedDict.from_product(["ab", "xy", "uv"], values=0)
+    nd_copy = nd.copy(cow=True)
+    subtree = nd_copy["a"]
+    assert type(subtree) is dict
+    assert type(subtree["x"]) is dict
+    assert nd_copy._tree["b"] is nd._tree["b"]
+    assert NestedDict(nd_copy["b"], copy=True) == NestedDict.from_product(["xy", "uv"], values=0)
+
+    subtree["x"]["u"] = 1
+    subtree["z"] = 2
+    del subtree["y"]
+    assert nd_copy.extract["a"] == NestedDict({"a": {"x": {"u": 1, "v": 0}, "z": 2}})
+    assert nd_copy["b"] == nd["b"]
+    assert len(nd_copy) == 7
+    assert nd == NestedDict.from_product(["ab", "xy", "uv"], values=0)
+
+    del nd_copy["a"]
+    nd_copy["a", "z"] = 1
+    subtree["y"] = 99
+    assert nd_copy["a"] == {"z": 1}
+
+
+def test_len_after_mutation_through_reference():
+    d = {"a": {"x": 0}, "b": 1}
+    nd = NestedDict(d)
+    assert len(nd) == 2
+    d["a"]["y"] = 1
+    assert len(nd) == 3
+    nd["a"]["z"] = 2
+    assert len(nd) == 4
+
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    assert len(nd) == 4
+    nd["a"]["z"] = 1
+    assert len(nd) == 5
+    subtree = {"x": 0}
+    nd["c"] = subtree
+    assert len(nd) == 6
+    subtree["y"] = 1
+    assert len(nd) == 7
+
+
+def test_extract_is_not_a_reference():
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    extracted = nd.extract["a"]
+    extracted["a", "z"] = 1
+    nd["a", "x"] = 2
+    assert len(nd) == 4
+    assert nd == NestedDict({"a": {"x": 2, "y": 0}, "b": {"x": 0, "y": 0}})
+    assert extracted == NestedDict({"a": {"x": 0, "y": 0, "z": 1}})
+
+    d = {"a": {"x": 0}}
+    extracted = NestedDict(d).extract["a"]
+    d["a"]["y"] = 1
+    assert extracted == NestedDict({"a": {"x": 0}})
+
+
+def test_copy_of_referenced_subtree():
+    d = {"a": {"x": 0}, "b": 1}
+    nd = NestedDict(d)
+    nd_copy = nd.copy(cow=True)
+    d["a"]["y"] = 1
+    assert len(nd) == 3
+    assert nd_copy == NestedDict({"a": {"x": 0}, "b": 1})
+
+    nd = NestedDict.from_product(["ab", "xy"], values=0)
+    subtree = nd["a"]
+    nd_copy = nd.copy(cow=True)
+    nd_copy["b", "x"] = 1
+    subtree["z"] = 1
+    assert len(nd_copy) == 4
+    assert nd_copy == NestedDict({"a": {"x": 0, "y": 0}, "b": {"x": 1, "y": 0}})
+    assert nd["a", "z"] == 1
+
+
+def test_set_below_leaf():
+    nd = NestedDict({"a": 1, "b": 2})
+    assert len(nd) == 2
+    version = nd._version
+    with pytest.raises(TypeError):
+        nd["a", "x"] = 3
+    with pytest.raises(TypeError):
+        nd.set_many([("b", "x")], 3)
+    assert nd._version == version
+    with pytest.raises(ValueError):
+        nd.merge({"a": {"x": 3}}, strategy="raise")
+    assert len(nd) == 2
+    assert nd == NestedDict({"a": 1, "b": 2})
+
+
 def test_to_dict():
     d = {"a": {"a": 0, "b": 1}, "b": 2}
     nd = NestedDict(d)
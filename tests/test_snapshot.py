@@ -0,0 +1,83 @@
+"""Tests for binary snapshots read through mmap"""
+
+import pytest
+
+from ndicts import DataDict, NestedDict, Snapshot
+
+DICTIONARY = {
+    "a": {"x": 1, "y": -2.5, "z": {"deep": "string"}},
+    "b": {"x": [1, 2], "y": True, "z": None, "empty": {}},
+    0: {(1, 2): 2 ** 70, 1.5: -2 ** 63},
+    "c": float("inf"),
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "nd.snapshot"
+    NestedDict(DICTIONARY).to_snapshot(path)
+    return path
+
+
+def test_round_trip(path):
+    nd = NestedDict(DICTIONARY)
+    with NestedDict.open_snapshot(path) as snapshot:
+        assert snapshot.to_dict() == DICTIONARY
+        assert list(snapshot.items()) == list(nd.items())
+        assert list(snapshot.rows()) == list(nd.rows())
+        assert len(snapshot) == len(nd)
+        assert snapshot == nd
+        materialized = snapshot.materialize()
+        assert isinstance(materialized, NestedDict)
+        assert materialized == nd
+        assert len(materialized) == len(nd)
+        assert type(snapshot["b", "y"]) is bool
+        assert type(snapshot[0, 1.5]) is int
+
+
+def test_getitem(path):
+    with Snapshot(path) as snapshot:
+        assert snapshot["a", "y"] == -2.5
+        assert snapshot[0, (1, 2)] == 2 ** 70
+        assert len(snapshot["a"]) == 3
+        assert snapshot["a"]["z", "deep"] == "string"
+        assert snapshot["b", "empty"].to_dict() == {}
+        assert ("a", "x") in snapshot
+        for key in [("a", "w"), ("a", "x", "y"), "d", ["a"]]:
+            assert key not in snapshot
+            with pytest.raises(KeyError):
+                snapshot[key]
+
+
+def test_lazy(path):
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 9
+        assert not snapshot._nodes
+        snapshot["a", "z", "deep"]
+        assert len(snapshot._nodes) == 3
+
+    with Snapshot(path, cache_size=2) as snapshot:
+        assert snapshot.to_dict() == DICTIONARY
+        assert len(snapshot._nodes) == 2
+
+
+def test_data_dict(tmp_path):
+    path = tmp_path / "dd.snapshot"
+    dd = DataDict.from_product(["ab", range(100)], values=[i / 2 for i in range(200)])
+    dd.to_snapshot(path)
+    with DataDict.open_snapshot(path) as snapshot:
+        assert snapshot["b", 3] == 51.5
+        materialized = snapshot.materialize()
+        assert isinstance(materialized, DataDict)
+        assert materialized == dd
+        assert snapshot["a"].materialize().total() == dd.extract["a"].total()
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        Snapshot(path)
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(ValueError):
+        Snapshot(path)
@@ -0,0 +1,60 @@
+"""Tests for the Statistics class"""
+
+import random
+import statistics
+
+import pytest
+
+from ndicts import Statistics
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(0)
+    return [rng.gauss(10, 3) for _ in range(10_000)]
+
+
+def test_moments(values):
+    stats = Statistics().update(values)
+    assert stats.count == len(values)
+    assert stats.total == pytest.approx(sum(values))
+    assert stats.mean() == pytest.approx(statistics.mean(values))
+    assert stats.var() == pytest.approx(statistics.variance(values))
+    assert stats.std(ddof=0) == pytest.approx(statistics.pstdev(values))
+    assert stats.min == min(values)
+    assert stats.max == max(values)
+
+
+def test_merge(values):
+    merged = Statistics(sketch_size=128)
+    for start in range(0, len(values), 3000):
+        merged.merge(Statistics(sketch_size=128).update(values[start:start + 3000]))
+    stats = Statistics(sketch_size=128).update(values)
+    assert merged.count == stats.count
+    assert merged.mean() == pytest.approx(stats.mean())
+    assert merged.var() == pytest.approx(stats.var())
+    assert (merged.min, merged.max) == (stats.min, stats.max)
+    assert merged.quantile(0.5) == pytest.approx(statistics.median(values), abs=0.2)
+
+
+def test_merge_empty():
+    stats = Statistics().update([1, 2])
+    assert stats.merge(Statistics()).mean() == 1.5
+    assert Statistics().merge(stats).mean() == 1.5
+
+
+def test_quantile(values):
+    stats = Statistics(sketch_size=256).update(values)
+    deciles = statistics.quantiles(values, n=10)
+    for q, expected in zip([i / 10 for i in range(1, 10)], deciles):
+        assert stats.quantile(q) == pytest.approx(expected, abs=0.2)
+
+    with pytest.raises(ValueError):
+        Statistics().update(values).quantile(0.5)
+    with pytest.raises(ValueError):
+        stats.quantile(2)
+
+
+def test_empty():
+    with pytest.raises(ZeroDivisionError):
+        Statistics().mean()
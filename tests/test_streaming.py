@@ -0,0 +1,101 @@
+"""Tests for streaming NestedDicts from and to JSON"""
+
+from io import StringIO
+import json
+import math
+
+import pytest
+
+from ndicts import DataDict, NestedDict
+from ndicts.streaming import iter_json, iter_ndjson, write_ndjson
+
+DOCUMENT = {
+    "a": {"x": 1, "y": -2.5e-3, "z": {"deep": "café 😀 \"quoted\"\n"}},
+    "b": {"x": [1, [2, {"k": [], "l": {}}], {"m": None}], "y": True, "empty": {}},
+    "c": False,
+    "d": {"x": {"x": 12345678901234567890}},
+}
+
+
+def expected(document, prefix=()):
+    nd = NestedDict(document)
+    return [
+        (key, value) for key, value in nd.items()
+        if len(key) >= len(prefix) and all(p in ("", k) for k, p in zip(key, prefix))
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 65536])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json(chunk_size, indent):
+    text = json.dumps(DOCUMENT, indent=indent)
+    assert list(iter_json(StringIO(text), chunk_size=chunk_size)) == expected(DOCUMENT)
+
+
+def test_iter_json_numbers():
+    document = {
+        "0": 35000000000.0, "1": -1.5e-300, "2": 2e+20, "3": 1E5, "4": -0.0, "5": 12345678901234567890,
+        "6": [0.1, -7, 6.02e23], "7": {"x": 123.456, "y": -math.inf},
+    }
+    text = json.dumps(document)
+    for chunk_size in range(1, len(text) + 2):
+        assert list(iter_json(StringIO(text), chunk_size=chunk_size)) == expected(document)
+    floats = {str(i): i * 1234.5678e10 for i in range(50)}
+    text = json.dumps(floats)
+    for chunk_size in range(1, 400):
+        assert dict(iter_json(StringIO(text), chunk_size=chunk_size)) == {(k,): v for k, v in floats.items()}
+
+
+@pytest.mark.parametrize("prefix", [(), ("a",), ("", "x"), ("b", "x"), ("d", "x", "x"), ("e",), ("c", "x")])
+def test_iter_json_prefix(prefix):
+    text = json.dumps(DOCUMENT)
+    assert list(iter_json(StringIO(text), prefix=prefix, chunk_size=5)) == expected(DOCUMENT, prefix)
+
+
+def test_iter_json_constants():
+    text = '{"nan": NaN, "inf": Infinity, "ninf": -Infinity, "null": null}'
+    items = dict(iter_json(StringIO(text), chunk_size=2))
+    assert math.isnan(items["nan",])
+    assert items["inf",] == math.inf
+    assert items["ninf",] == -math.inf
+    assert items["null",] is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['{"a": 1,}', '{"a" 1}', '{"a": [1, 2}', '{"a": {"b": 1}', '{"a": 1} 2', '{1: 2}', '{"a": "b', '{"a": tru}'],
+)
+def test_iter_json_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json(StringIO(text), chunk_size=3))
+
+
+def test_iter_json_not_object():
+    with pytest.raises(ValueError):
+        list(iter_json(StringIO("[1, 2]")))
+
+
+def test_from_json():
+    text = json.dumps(DOCUMENT)
+    nd = NestedDict.from_json(StringIO(text), chunk_size=4)
+    assert list(nd.items()) == list(NestedDict(DOCUMENT).items())
+    assert len(nd) == len(NestedDict(DOCUMENT))
+
+    dd = DataDict.from_json(StringIO('{"a": {"x": 1, "y": 2}, "b": {"x": 3}}'), prefix=("", "x"))
+    assert isinstance(dd, DataDict)
+    assert dd == DataDict({"a": {"x": 1}, "b": {"x": 3}})
+
+
+def test_ndjson_round_trip():
+    nd = NestedDict({"a": {0: [1, 2], 1: {"x": None}}, "b": "text", "c": {"d": 1.5}})
+    fp = StringIO()
+    nd.to_ndjson(fp)
+    fp.seek(0)
+    assert NestedDict.from_ndjson(fp) == nd
+
+    fp.seek(0)
+    assert list(iter_ndjson(fp, prefix=("a", 1))) == [(("a", 1, "x"), None)]
+
+    fp = StringIO()
+    write_ndjson(NestedDict(), fp)
+    assert fp.getvalue() == ""